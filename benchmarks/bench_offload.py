@@ -0,0 +1,76 @@
+"""Event-loop lag and throughput of transaction decode + classify, inline vs offloaded.
+
+A 1 ms ticker runs alongside a burst of decode/classify jobs; its overshoot
+is the latency every concurrent HTTP request would see during the burst.
+
+Usage: python benchmarks/bench_offload.py [transactions] [workers] [uvloop]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_tx_decode import make_payload
+from tg_solana_bot.offload import Offloader, install_uvloop
+from tg_solana_bot.tx_decoder import decode_parsed_transaction
+from tg_solana_bot.tx_parser import TransactionParser, classify_batch
+
+
+def decode_and_classify(parser: TransactionParser, body: bytes):
+    tx = decode_parsed_transaction(body)["result"]
+    return classify_batch(parser, [tx])[0]
+
+
+async def ticker(stop: asyncio.Event, lags: list, interval: float = 0.001) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_mode(mode: str, workers: int, bodies: list, parser: TransactionParser) -> None:
+    offloader = Offloader(mode, workers)
+    # Warm the pool (process start-up is not part of steady-state throughput).
+    await asyncio.gather(*(offloader.run(decode_and_classify, parser, bodies[0]) for _ in range(workers)))
+
+    stop = asyncio.Event()
+    lags: list = []
+    tick = asyncio.create_task(ticker(stop, lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    # Requests arrive concurrently in a burst, as with prefetching.
+    await asyncio.gather(*(offloader.run(decode_and_classify, parser, body) for body in bodies))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    offloader.close()
+
+    lags_ms = sorted(l * 1000 for l in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{mode:<8} {len(bodies) / elapsed:8.0f} tx/s   loop lag mean {statistics.mean(lags_ms):6.2f} ms"
+        f"   p99 {p99:6.2f} ms   max {lags_ms[-1]:6.2f} ms"
+    )
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    loop_name = "asyncio"
+    if len(sys.argv) > 3 and sys.argv[3] == "uvloop":
+        loop_name = "uvloop" if install_uvloop() else "asyncio (uvloop not installed)"
+    random.seed(7)
+    bodies = [make_payload() for _ in range(50)] * (n // 50 or 1)
+    parser = TransactionParser(*(f"wallet{i}" for i in range(4)))
+    print(f"{len(bodies)} transactions of {len(bodies[0]) / 1024:.1f} KiB, {workers} workers, {loop_name}")
+    for mode in ("inline", "thread", "process"):
+        asyncio.run(run_mode(mode, workers, bodies, parser))
+
+
+if __name__ == "__main__":
+    main()
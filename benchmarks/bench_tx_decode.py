@@ -0,0 +1,98 @@
+"""Compare getTransaction decode cost: stdlib json vs the fast decode path.
+
+Usage: python benchmarks/bench_tx_decode.py [iterations]
+"""
+import json
+import random
+import string
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tg_solana_bot.tx_decoder import decode_transaction_response, decoder_name
+
+
+def _key() -> str:
+    return "".join(random.choice(string.ascii_letters + string.digits) for _ in range(44))
+
+
+def make_payload(n_accounts: int = 40, n_logs: int = 120, n_inner: int = 30) -> bytes:
+    """Build a swap-sized getTransaction response."""
+    keys = [_key() for _ in range(n_accounts)]
+    mint = _key()
+
+    def balance(i: int, amount: int) -> dict:
+        return {
+            "accountIndex": i,
+            "mint": mint,
+            "owner": keys[i],
+            "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+            "uiTokenAmount": {
+                "amount": str(amount),
+                "decimals": 6,
+                "uiAmount": amount / 1e6,
+                "uiAmountString": str(amount / 1e6),
+            },
+        }
+
+    instr = {"programIdIndex": 3, "accounts": list(range(12)), "data": _key() * 3, "stackHeight": None}
+    result = {
+        "slot": 300000000,
+        "blockTime": 1730000000,
+        "version": 0,
+        "meta": {
+            "err": None,
+            "fee": 5000,
+            "preBalances": [random.randint(0, 10**12) for _ in keys],
+            "postBalances": [random.randint(0, 10**12) for _ in keys],
+            "preTokenBalances": [balance(i, 1000000 + i) for i in range(8)],
+            "postTokenBalances": [balance(i, 1000500 + i) for i in range(8)],
+            "innerInstructions": [{"index": i, "instructions": [instr] * 6} for i in range(n_inner)],
+            "logMessages": [f"Program {_key()} invoke [2] consumed {i} of 200000 compute units" for i in range(n_logs)],
+            "rewards": [],
+            "loadedAddresses": {"writable": [_key() for _ in range(4)], "readonly": [_key() for _ in range(4)]},
+            "computeUnitsConsumed": 123456,
+            "status": {"Ok": None},
+        },
+        "transaction": {
+            "signatures": [_key() + _key()],
+            "message": {
+                "accountKeys": keys,
+                "header": {"numRequiredSignatures": 1, "numReadonlySignedAccounts": 0, "numReadonlyUnsignedAccounts": 9},
+                "instructions": [instr] * 6,
+                "recentBlockhash": _key(),
+                "addressTableLookups": [{"accountKey": _key(), "writableIndexes": [1, 2], "readonlyIndexes": [3]}],
+            },
+        },
+    }
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": result}).encode()
+
+
+def bench(name, fn, body: bytes, iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(body)
+    per_tx_us = (time.perf_counter() - start) / iterations * 1e6
+
+    tracemalloc.start()
+    retained = [fn(body) for _ in range(100)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    print(f"{name:<22} {per_tx_us:9.1f} us/tx   retained {current / 100 / 1024:7.1f} KiB/tx   peak {peak / 1024:8.1f} KiB")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    random.seed(7)
+    body = make_payload()
+    print(f"payload {len(body) / 1024:.1f} KiB, {iterations} iterations")
+    bench("stdlib json", lambda b: json.loads(b), body, iterations)
+    bench(f"fast ({decoder_name()})", decode_transaction_response, body, iterations)
+
+
+if __name__ == "__main__":
+    main()
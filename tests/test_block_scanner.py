@@ -0,0 +1,110 @@
+import asyncio
+
+from tg_solana_bot.block_scanner import BLOCK_DECODE_BYTES, CHECKPOINT_KEY, BlockScanner
+from tg_solana_bot.governor import RequestGovernor
+
+
+class FakeClient:
+    def __init__(self, governor=None, tip=10_000):
+        self.governor = governor
+        self.tip = tip
+        self.blocks_requested = []
+
+    async def get_slot(self, priority="polling"):
+        return self.tip
+
+    async def get_blocks(self, start_slot, end_slot, priority="polling"):
+        self.blocks_requested.append((start_slot, end_slot))
+        return list(range(start_slot, end_slot + 1))
+
+    async def get_block_matches(self, slot, watched, priority="polling"):
+        return {"blockTime": None, "matches": []}
+
+
+class DictState:
+    def __init__(self):
+        self.data = {}
+
+    def load_last_signature(self, key):
+        return self.data.get(key)
+
+    def save_last_signature(self, key, value):
+        self.data[key] = value
+
+    def save_last_signatures(self, values):
+        self.data.update(values)
+
+
+class FixedHeadroom:
+    def __init__(self, headroom):
+        self._headroom = headroom
+
+    def headroom(self):
+        return self._headroom
+
+
+async def _no_matches(matches):
+    pass
+
+
+def _scanner(client, **kwargs):
+    scanner = BlockScanner(client, DictState(), _no_matches, **kwargs)
+    scanner.watch("Wallet", ["Wallet", "TokenAccount"])
+    return scanner
+
+
+def test_lagging_scanner_hands_back_without_skipping_slots():
+    client = FakeClient(tip=10_000)
+    scanner = _scanner(client, mode="blocks", max_lag_slots=1500)
+    scanner.state.save_last_signature(CHECKPOINT_KEY, "5000")
+    scanner.active = True
+
+    assert asyncio.run(scanner.scan_once()) == 0
+    assert not scanner.active
+    assert scanner.state.load_last_signature(CHECKPOINT_KEY) == "5000"
+    assert client.blocks_requested == []
+
+
+def test_block_mode_refused_above_governor_rate():
+    scanner = _scanner(FakeClient(RequestGovernor(rate=10, burst=20)), mode="blocks")
+    assert "governor" in scanner.block_mode_blocker()
+    asyncio.run(scanner.decide())
+    asyncio.run(scanner.decide())
+    assert not scanner.active
+
+    scanner = _scanner(FakeClient(RequestGovernor(rate=50, burst=50)), mode="blocks")
+    assert scanner.block_mode_blocker() is None
+    asyncio.run(scanner.decide())
+    asyncio.run(scanner.decide())
+    assert scanner.active
+
+
+def test_block_mode_refused_without_memory_headroom():
+    scanner = _scanner(FakeClient(), mode="blocks", memory=FixedHeadroom(BLOCK_DECODE_BYTES // 2))
+    assert "memory" in scanner.block_mode_blocker()
+
+    scanner = _scanner(FakeClient(), mode="blocks", fetch_concurrency=4, memory=FixedHeadroom(BLOCK_DECODE_BYTES * 2))
+    assert scanner.block_concurrency() == 2
+
+
+def test_auto_switches_to_blocks_when_polling_costs_more_and_back():
+    scanner = _scanner(FakeClient(RequestGovernor(rate=50, burst=50)), mode="auto", window_seconds=0)
+
+    scanner.observe(10_000)
+    asyncio.run(scanner.decide())
+    assert scanner._arming_slot == 10_000 and not scanner.active
+    asyncio.run(scanner.decide())
+    assert scanner.active
+    assert scanner.state.load_last_signature(CHECKPOINT_KEY) == "9999"
+
+    # Quiet again: polling two addresses is far cheaper than following every block.
+    asyncio.run(scanner.decide())
+    assert not scanner.active
+
+
+def test_auto_stays_on_signatures_below_the_required_rate():
+    scanner = _scanner(FakeClient(RequestGovernor(rate=10, burst=20)), mode="auto", window_seconds=0)
+    scanner.observe(10_000)
+    asyncio.run(scanner.decide())
+    asyncio.run(scanner.decide())
+    assert not scanner.active and scanner._arming_slot is None
@@ -0,0 +1,97 @@
+import asyncio
+
+from tg_solana_bot.burn_watcher import CHECKPOINT_PREFIX, BurnWatcher
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.tx_parser import TransactionParser
+
+MINT = "Mint1111111111111111111111111111111111111111"
+INCINERATOR = "1nc1nerator11111111111111111111111111111111"
+
+
+class FakeClient:
+    def __init__(self):
+        self.paged = []
+        self.account_lookups = []
+
+    async def get_token_accounts_for_mint(self, owner, mint):
+        self.account_lookups.append((owner, mint))
+        return ["IncineratorMintAccount"]
+
+    async def get_signatures_for_address(self, address, **kwargs):
+        self.paged.append(address)
+        return []
+
+
+class DictState:
+    def __init__(self):
+        self.data = {}
+
+    def load_last_signature(self, key):
+        return self.data.get(key)
+
+    def save_last_signature(self, key, value):
+        self.data[key] = value
+
+
+async def _on_burn(stream, tx, details):
+    pass
+
+
+def test_streams_are_the_mint_and_the_incinerators_mint_accounts():
+    client = FakeClient()
+    watcher = BurnWatcher(client, DictState(), None, _on_burn, MINT, INCINERATOR)
+
+    async def scenario():
+        first = await watcher.streams()
+        again = await watcher.streams()
+        for stream in again:
+            await watcher.poll_stream(stream)
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert first == again == [MINT, "IncineratorMintAccount"]
+    assert client.account_lookups == [(INCINERATOR, MINT)]
+    assert INCINERATOR not in client.paged
+
+
+class BurnClient:
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.fetched = []
+
+    async def get_signatures_for_address(self, address, **kwargs):
+        return [{"signature": "sig3", "err": None}, {"signature": "sig2", "err": {"InstructionError": [0, "Custom"]}}]
+
+    async def get_parsed_transaction(self, signature, priority="live"):
+        self.fetched.append(signature)
+        return self.transactions[signature]
+
+
+def _burn_of(amount):
+    balance = {"accountIndex": 1, "mint": MINT, "owner": "holderA"}
+    return ParsedTransaction.from_rpc(
+        {
+            "transaction": {"signatures": ["sig3"], "message": {"accountKeys": ["holderA"]}},
+            "meta": {
+                "err": None,
+                "preTokenBalances": [dict(balance, uiTokenAmount={"amount": str(amount), "decimals": 6})],
+                "postTokenBalances": [dict(balance, uiTokenAmount={"amount": "0", "decimals": 6})],
+            },
+        }
+    )
+
+
+def test_failed_signatures_are_skipped_before_fetching():
+    client = BurnClient({"sig3": _burn_of(5_000_000)})
+    state = DictState()
+    state.save_last_signature(CHECKPOINT_PREFIX + MINT, "sig1")
+    burns = []
+
+    async def on_burn(stream, tx, details):
+        burns.append(details)
+
+    watcher = BurnWatcher(client, state, TransactionParser("p", "s", MINT, INCINERATOR), on_burn, MINT)
+    assert asyncio.run(watcher.poll_stream(MINT)) == 1
+    assert client.fetched == ["sig3"]
+    assert watcher.skipped == 1
+    assert burns[0]["amount"] == "5"
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+from tg_solana_bot.main import Runtime, process_wallet_and_token_accounts
+from tg_solana_bot.state import StateStore
+
+WALLET = "Wallet1111111111111111111111111111111111111"
+
+
+class FakeClient:
+    governor = None
+
+    def __init__(self, signatures, fail_with=None):
+        self.signatures = signatures
+        self.fail_with = fail_with
+        self.fetched = []
+
+    async def get_token_accounts_by_owner(self, owner):
+        return []
+
+    async def get_signatures_for_address(self, address, before=None, limit=25, **kwargs):
+        return [{"signature": s} for s in self.signatures]
+
+    async def get_parsed_transaction(self, signature, priority="live"):
+        self.fetched.append(signature)
+        if self.fail_with is not None:
+            raise self.fail_with
+        return None
+
+
+def _runtime(tmp_path, client):
+    settings = SimpleNamespace(
+        primary_wallet_address=WALLET,
+        secondary_wallet_address="",
+        bullieve_mint_address="",
+        burn_incinerator_address="",
+        tx_prefetch_concurrency=2,
+        signature_backfill_max_pages=10,
+        signature_max_attempts=3,
+    )
+    state = StateStore(str(tmp_path / "state.json"))
+    return Runtime(client, None, state, None, settings, None, None, None)
+
+
+def _poll_with_failing_fetch(tmp_path, fail_with):
+    client = FakeClient(["sig3", "sig2", "sig1"], fail_with=fail_with)
+    rt = _runtime(tmp_path, client)
+    rt.state.save_last_signature(WALLET, "sig1")
+    asyncio.run(process_wallet_and_token_accounts(rt, WALLET))
+    return rt, client
+
+
+def test_checkpoint_holds_when_transaction_is_missing(tmp_path):
+    rt, client = _poll_with_failing_fetch(tmp_path, None)
+    assert "sig2" in client.fetched
+    assert rt.state.load_last_signature(WALLET) == "sig1"
+    assert "sig2" not in rt.recent
+
+
+def test_checkpoint_holds_when_fetch_raises(tmp_path):
+    rt, client = _poll_with_failing_fetch(tmp_path, RuntimeError("HTTP 503"))
+    assert rt.state.load_last_signature(WALLET) == "sig1"
+    assert "sig2" not in rt.recent and "sig3" not in rt.recent
+
+
+def test_unfetchable_signature_is_dead_lettered_after_max_attempts(tmp_path):
+    client = FakeClient(["sig3", "sig2", "sig1"])
+    rt = _runtime(tmp_path, client)
+    rt.state.save_last_signature(WALLET, "sig1")
+    for _ in range(2):
+        asyncio.run(process_wallet_and_token_accounts(rt, WALLET))
+        assert rt.state.load_last_signature(WALLET) == "sig1"
+
+    asyncio.run(process_wallet_and_token_accounts(rt, WALLET))
+
+    # sig3 cannot be fetched either and starts its own attempts.
+    assert rt.state.load_last_signature(WALLET) == "sig2"
+    assert list(rt.state.load_dead_letters()) == ["sig2"]
+    assert rt.state.load_dead_letters()["sig2"]["address"] == WALLET
+    assert WALLET in rt.state.get_all_signatures()
+    assert "_dead_letters" not in rt.state.get_all_signatures()
+
+
+class PagingClient(FakeClient):
+    """Serves ``count`` signatures newest first, honouring ``before`` and ``limit``."""
+
+    def __init__(self, count):
+        super().__init__([f"sig{n}" for n in range(count, 0, -1)])
+        self.priorities = {}
+
+    async def get_signatures_for_address(self, address, before=None, limit=25, priority="polling", **kwargs):
+        start = self.signatures.index(before) + 1 if before else 0
+        page = self.signatures[start:start + limit]
+        for sig in page:
+            self.priorities[sig] = priority
+        return [{"signature": s} for s in page]
+
+    async def get_parsed_transaction(self, signature, priority="live"):
+        self.priorities[signature] = (self.priorities[signature], priority)
+        return None
+
+
+def test_catch_up_pages_and_their_fetches_use_backfill_priority(tmp_path):
+    client = PagingClient(60)
+    rt = _runtime(tmp_path, client)
+    rt.state.save_last_signature(WALLET, "sig1")
+    asyncio.run(process_wallet_and_token_accounts(rt, WALLET))
+
+    assert client.priorities["sig60"] == ("polling", "live")
+    assert client.priorities["sig36"] == ("polling", "live")
+    assert client.priorities["sig35"] == ("backfill", "backfill")
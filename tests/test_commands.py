@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+from tg_solana_bot.commands import CommandBot
+
+
+class RecordingStore:
+    def __init__(self):
+        self.prices = {}
+
+    def set_price(self, key, price):
+        self.prices[key] = price
+        return True
+
+
+def _bot():
+    store = RecordingStore()
+    runtime = SimpleNamespace(price_client=SimpleNamespace(manual_price_store=store))
+    return CommandBot(runtime, "token", transport=None, admin_user_ids=["7"]), store
+
+
+def _setprice(bot, value):
+    message = {"from": {"id": 7}}
+    return asyncio.run(bot._cmd_setprice(message, ["BULLIEVE", value]))
+
+
+def test_setprice_rejects_zero_and_non_finite_prices():
+    bot, store = _bot()
+    for value in ("0", "-1", "nan", "inf"):
+        assert _setprice(bot, value) == "Price must be a positive number."
+    assert store.prices == {}
+
+    assert _setprice(bot, "0.5").startswith("Manual price for BULLIEVE")
+    assert store.prices == {"BULLIEVE": 0.5}
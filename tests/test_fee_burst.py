@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tg_solana_bot.fee_burst import FeeBursts
+from tg_solana_bot.main import Runtime, process_signature
+
+SOL = "So11111111111111111111111111111111111111112"
+
+
+class FakeClient:
+    governor = None
+
+    def get_first_signer_address(self, tx):
+        return "Signer"
+
+
+class FakePrices:
+    async def get_usd_price(self, mint):
+        return 100.0
+
+
+class RecordingSinks:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event):
+        self.events.append(event)
+
+
+def _fee(rt, sig, amount, block_time):
+    tx = SimpleNamespace(signature=sig, slot=1, block_time=block_time, decimals_for=lambda mint: 9)
+    classified = (tx, "fee_income", {"mint": SOL, "amount": amount})
+    asyncio.run(process_signature(rt, None, "Wallet", "Wallet", sig, classified))
+
+
+def test_fees_in_one_window_edit_a_single_alert():
+    settings = SimpleNamespace(notify_fee_media_url="fee.png")
+    sinks = RecordingSinks()
+    rt = Runtime(FakeClient(), None, None, FakePrices(), settings, None, None, sinks, fee_bursts=FeeBursts(60))
+
+    _fee(rt, "sig1", "1.5", 1000)
+    _fee(rt, "sig2", "0.5", 1030)
+    _fee(rt, "sig3", "2", 1200)
+
+    alerts = [e.key for e in sinks.events if e.kind == "alert"]
+    assert alerts == ["sig1", "sig3"]
+    updates = [e for e in sinks.events if e.kind == "update"]
+    assert [e.key for e in updates] == ["sig1", "sig1", "sig3"]
+    assert "FEES COLLECTED: 2 SOL (~$200.00)" in updates[1].caption
+    assert "SWAPS IN THIS BURST: 2" in updates[1].caption
+    assert "SWAPS IN THIS BURST" not in updates[2].caption
+
+
+class FailingOnceSinks(RecordingSinks):
+    def __init__(self):
+        super().__init__()
+        self.failed = False
+
+    async def emit(self, event):
+        if event.kind == "alert" and not self.failed:
+            self.failed = True
+            raise RuntimeError("database is locked")
+        await super().emit(event)
+
+
+def test_retry_after_failed_enqueue_sends_the_alert_once():
+    settings = SimpleNamespace(notify_fee_media_url="fee.png")
+    sinks = FailingOnceSinks()
+    rt = Runtime(FakeClient(), None, None, FakePrices(), settings, None, None, sinks, fee_bursts=FeeBursts(60))
+
+    with pytest.raises(RuntimeError):
+        _fee(rt, "sig1", "1.5", 1000)
+    _fee(rt, "sig1", "1.5", 1000)
+
+    assert [e.key for e in sinks.events if e.kind == "alert"] == ["sig1"]
+    update = [e for e in sinks.events if e.kind == "update"][-1]
+    assert "FEES COLLECTED: 1.5 SOL (~$150.00)" in update.caption
+    assert "SWAPS IN THIS BURST" not in update.caption
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from tg_solana_bot.governor import RequestGovernor
+
+
+def test_waiting_requests_are_admitted_by_priority():
+    async def scenario():
+        governor = RequestGovernor(rate=50, burst=1, live_reserve=0)
+        await governor.acquire("getTransaction", "polling")
+        order = []
+
+        async def request(priority):
+            await governor.acquire("getTransaction", priority)
+            order.append(priority)
+
+        tasks = [asyncio.create_task(request(p)) for p in ("backfill", "discovery", "polling", "live")]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["live", "polling", "discovery", "backfill"]
+
+
+def test_live_requests_can_use_the_reserve():
+    async def scenario():
+        governor = RequestGovernor(rate=0.01, burst=10, live_reserve=0.2)
+        for _ in range(8):
+            await governor.acquire("getTransaction", "backfill")
+        try:
+            await asyncio.wait_for(governor.acquire("getTransaction", "backfill"), timeout=0.05)
+            blocked = False
+        except asyncio.TimeoutError:
+            blocked = True
+        await asyncio.wait_for(governor.acquire("getTransaction", "live"), timeout=0.05)
+        return blocked, governor.admitted
+
+    blocked, admitted = asyncio.run(scenario())
+    assert blocked
+    assert admitted["backfill"] == 8 and admitted["live"] == 1
+
+
+def test_penalize_pauses_every_priority():
+    async def scenario():
+        governor = RequestGovernor(rate=100, burst=10)
+        governor.penalize(0.2)
+        started = time.monotonic()
+        await governor.acquire("getTransaction", "live")
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.2
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from tg_solana_bot.ledger import EventLedger
+from tg_solana_bot.main import Runtime, _record_in_ledger
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.tx_parser import TransactionParser
+
+MINT = "HighDecimalMint111111111111111111111111111"
+PRIMARY = "Primary111111111111111111111111111111111111"
+
+
+def _fee_tx(pre_base, post_base):
+    def balance(amount):
+        ui = amount / 10**9
+        return {
+            "accountIndex": 1,
+            "mint": MINT,
+            "owner": PRIMARY,
+            "uiTokenAmount": {"amount": str(amount), "decimals": 9, "uiAmount": ui},
+        }
+
+    return ParsedTransaction.from_rpc(
+        {
+            "slot": 5,
+            "blockTime": 1_700_000_000,
+            "transaction": {"signatures": ["sig1"], "message": {"accountKeys": ["Swapper"]}},
+            "meta": {"err": None, "preTokenBalances": [balance(pre_base)], "postTokenBalances": [balance(post_base)]},
+        }
+    )
+
+
+def test_ledger_records_exact_base_units_for_large_amounts(tmp_path):
+    # 987654321.123456789 tokens: more digits than a float holds.
+    tx = _fee_tx(1, 987_654_321_123_456_790)
+    event_type, details = TransactionParser(PRIMARY, "", "", "").classify_event(tx)
+    assert event_type == "fee_income"
+    assert details["amount_base"] == 987_654_321_123_456_789
+
+    ledger = EventLedger(str(tmp_path / "ledger.sqlite3"))
+    rt = Runtime(None, None, None, None, SimpleNamespace(), None, None, None, ledger=ledger)
+    rt.mint_decimals[MINT] = 9
+    _record_in_ledger(rt, tx, event_type, details)
+
+    assert ledger.total("fee_income", MINT).amount_base == 987_654_321_123_456_789
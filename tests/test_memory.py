@@ -0,0 +1,58 @@
+from tg_solana_bot.memory import MemoryBudget
+from tg_solana_bot.state import RecentSignatures
+
+
+class FakeCache:
+    def __init__(self, entries, entry_bytes=100):
+        self.entries = entries
+        self.entry_bytes = entry_bytes
+
+    def approx_bytes(self):
+        return self.entries * self.entry_bytes
+
+    def shrink(self, fraction):
+        count = int(self.entries * fraction)
+        self.entries -= count
+        return count
+
+
+def test_enforce_shrinks_below_the_low_water_mark():
+    budget = MemoryBudget(4000, cache_fraction=0.25, low_water=0.8)
+    cache = FakeCache(16)
+    budget.register("cache", cache)
+
+    assert budget.enforce() == {"cache": 8}
+    assert cache.approx_bytes() <= 800
+    # Back under budget: nothing more is evicted on later cycles.
+    assert budget.enforce() == {}
+    assert cache.entries == 8
+
+
+def test_capacity_is_restored_after_the_cooldown():
+    budget = MemoryBudget(64 * 1024 * 1024, cache_fraction=0.25, cooldown_seconds=0)
+    recent = RecentSignatures(max_size=400)
+    for n in range(400):
+        recent.add(f"sig{n}")
+    recent.shrink(0.5)
+    assert recent.max_size == 200
+
+    budget.register("recent", recent)
+    budget.enforce()
+    assert recent.max_size == 400
+    assert not recent.restore()
+
+
+def test_command_snapshots_do_not_reset_the_cycle_baseline():
+    import tracemalloc
+
+    was_tracing = tracemalloc.is_tracing()
+    budget = MemoryBudget(64 * 1024 * 1024, trace_frames=1)
+    try:
+        budget.top_allocators(limit=1)
+        cycle_baseline = budget._trace_snapshots["cycle"]
+        budget.top_allocators(limit=1, baseline="command")
+        assert budget._trace_snapshots["cycle"] is cycle_baseline
+        assert "command" in budget._trace_snapshots
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
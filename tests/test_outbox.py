@@ -0,0 +1,115 @@
+import asyncio
+
+from tg_solana_bot.outbox import Outbox, OutboxWorker
+
+
+class SlowNotifier:
+    message_index = None
+    chat_ids = ["1"]
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_media_to(self, chat_id, media_url, caption, media_type):
+        await asyncio.sleep(0.01)
+        self.sent.append(caption)
+        return 0
+
+
+def test_drain_does_not_race_the_running_worker(tmp_path):
+    async def scenario():
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+        notifier = SlowNotifier()
+        worker = OutboxWorker(outbox, notifier, batch_size=5)
+        for i in range(30):
+            outbox.enqueue_send(f"event{i}", notifier.chat_ids, {"caption": str(i)})
+        task = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.02)
+        drained = await worker.drain(5.0)
+        outbox.close()
+        return drained, task.done(), notifier.sent
+
+    drained, stopped, sent = asyncio.run(scenario())
+    assert drained and stopped
+    assert sorted(sent, key=int) == [str(i) for i in range(30)]
+
+
+class RecordingNotifier:
+    chat_ids = ["1"]
+
+    def __init__(self, message_index, sent, edited):
+        self.message_index = message_index
+        self.sent = sent
+        self.edited = edited
+
+    async def send_media_to(self, chat_id, media_url, caption, media_type):
+        await asyncio.sleep(0.005)
+        self.sent.append(caption)
+        return len(self.sent)
+
+    async def edit_caption_in(self, chat_id, message_id, caption):
+        self.edited.append((message_id, caption))
+        return True
+
+
+def test_instances_sharing_an_outbox_deliver_each_row_once(tmp_path):
+    from tg_solana_bot.message_index import MessageIndex
+
+    db_path = str(tmp_path / "outbox.sqlite3")
+    sent, edited = [], []
+
+    async def scenario():
+        workers = []
+        for owner in ("a", "b"):
+            outbox = Outbox(db_path, owner=owner)
+            notifier = RecordingNotifier(MessageIndex(db_path), sent, edited)
+            workers.append(OutboxWorker(outbox, notifier, batch_size=3))
+        for i in range(20):
+            workers[0].outbox.enqueue_send(f"event{i}", ["1"], {"caption": str(i)})
+        await asyncio.gather(*(w.drain(5.0) for w in workers))
+        # Instance b edits a message that instance a may have sent.
+        workers[1].outbox.enqueue_edit("event0", ["1"], "edited")
+        await workers[1].drain(5.0)
+
+    asyncio.run(scenario())
+    assert sorted(sent, key=int) == [str(i) for i in range(20)]
+    assert len(edited) == 1 and edited[0][1] == "edited"
+
+
+def test_drain_delivers_rows_of_a_cancelled_pass(tmp_path):
+    async def scenario():
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), owner="a")
+        notifier = SlowNotifier()
+        worker = OutboxWorker(outbox, notifier, batch_size=10)
+        for i in range(10):
+            outbox.enqueue_send(f"event{i}", notifier.chat_ids, {"caption": str(i)})
+        task = asyncio.create_task(worker.deliver_once())
+        await asyncio.sleep(0.035)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        sent_before = len(notifier.sent)
+        drained = await OutboxWorker(outbox, notifier, batch_size=10).drain(5.0)
+        outbox.close()
+        return sent_before, drained, notifier.sent
+
+    sent_before, drained, sent = asyncio.run(scenario())
+    assert 0 < sent_before < 10
+    assert drained
+    assert sorted(sent, key=int) == [str(i) for i in range(10)]
+
+
+def test_restart_reclaims_rows_leased_to_the_same_owner(tmp_path):
+    db_path = str(tmp_path / "outbox.sqlite3")
+    crashed = Outbox(db_path, owner="a")
+    crashed.enqueue_send("event0", ["1"], {"caption": "0"})
+    assert len(crashed.due()) == 1
+    crashed.close()
+
+    async def scenario():
+        outbox = Outbox(db_path, owner="a")
+        notifier = SlowNotifier()
+        drained = await OutboxWorker(outbox, notifier).drain(5.0)
+        outbox.close()
+        return drained, notifier.sent
+
+    assert asyncio.run(scenario()) == (True, ["0"])
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from tg_solana_bot.pool_pricer import PoolPricer
+from tg_solana_bot.price_client import PriceClient
+
+TOKEN = "Token1111111111111111111111111111111111111"
+
+
+def _vault(amount, decimals=6):
+    return {"data": {"parsed": {"info": {"tokenAmount": {"amount": str(amount), "decimals": decimals}}}}}
+
+
+class FakeRpc:
+    """Answers getMultipleAccounts with queued (slot, accounts) results."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    async def get_multiple_accounts(self, pubkeys):
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class FakeManualPrices:
+    def __init__(self, prices):
+        self.prices = prices
+
+    def get_price(self, mint_or_symbol):
+        return self.prices.get(mint_or_symbol)
+
+
+def _pricer(tmp_path, rpc, quote="USDC", ttl=30.0):
+    path = tmp_path / "pools.json"
+    path.write_text(json.dumps({TOKEN: {"symbol": "TKN", "base_vault": "B", "quote_vault": "Q", "quote": quote}}))
+    return PoolPricer(rpc, str(path), ttl_seconds=ttl)
+
+
+def _price_client(pricer, jupiter, manual):
+    client = PriceClient(FakeManualPrices(manual), pool_pricer=pricer)
+
+    async def jupiter_price(mint):
+        return jupiter.get(mint)
+
+    client._get_jupiter_price = jupiter_price
+    return client
+
+
+def test_pool_price_wins_over_jupiter_and_manual(tmp_path):
+    # 1,000 tokens against 2 SOL, with SOL priced by Jupiter
+    pricer = _pricer(tmp_path, FakeRpc((100, [_vault(1000 * 10**6), _vault(2 * 10**9, 9)])), quote="SOL")
+
+    async def scenario():
+        client = _price_client(pricer, {TOKEN: 9.0, "SOL": 150.0}, {TOKEN: 5.0})
+        return await client.get_usd_price(TOKEN)
+
+    assert asyncio.run(scenario()) == pytest.approx(0.3)
+
+
+def test_falls_back_to_jupiter_then_manual(tmp_path):
+    # The pool has no reserves on either read
+    pricer = _pricer(tmp_path, FakeRpc((100, [None, None]), (101, [None, None])))
+
+    async def scenario():
+        with_jupiter = _price_client(pricer, {TOKEN: 9.0}, {TOKEN: 5.0})
+        pricer._refreshed_at = 0.0
+        manual_only = _price_client(pricer, {}, {TOKEN: 5.0})
+        return await with_jupiter.get_usd_price(TOKEN), await manual_only.get_usd_price(TOKEN)
+
+    assert asyncio.run(scenario()) == (9.0, 5.0)
+
+
+def test_a_read_from_an_older_slot_keeps_the_newer_quote(tmp_path):
+    pricer = _pricer(
+        tmp_path,
+        FakeRpc(
+            (100, [_vault(1000 * 10**6), _vault(2000 * 10**6)]),
+            (90, [_vault(1000 * 10**6), _vault(1000 * 10**6)]),
+            (110, [_vault(1000 * 10**6), _vault(3000 * 10**6)]),
+        ),
+    )
+
+    async def scenario():
+        prices = []
+        for _ in range(3):
+            pricer._refreshed_at = 0.0
+            prices.append(await pricer.get_usd_price(TOKEN))
+        return prices
+
+    assert asyncio.run(scenario()) == [2.0, 2.0, 3.0]
+    assert pricer.quote("TKN").slot == 110
+
+
+def test_quotes_are_not_served_after_ten_ttls(tmp_path):
+    ttl = 30.0
+    pricer = _pricer(
+        tmp_path,
+        FakeRpc((100, [_vault(1000 * 10**6), _vault(2000 * 10**6)]), RuntimeError("rpc down"), RuntimeError("rpc down")),
+        ttl=ttl,
+    )
+
+    async def scenario():
+        fresh = await pricer.get_usd_price(TOKEN)
+        # The RPC keeps failing, so the last quote ages in place.
+        pricer.quote(TOKEN).fetched_at = time.time() - ttl * 9
+        pricer._refreshed_at = 0.0
+        stale = await pricer.get_usd_price(TOKEN)
+        pricer.quote(TOKEN).fetched_at = time.time() - ttl * 10 - 1
+        pricer._refreshed_at = 0.0
+        expired = await pricer.get_usd_price(TOKEN)
+        return fresh, stale, expired
+
+    assert asyncio.run(scenario()) == (2.0, 2.0, None)
@@ -0,0 +1,81 @@
+import asyncio
+
+from tg_solana_bot.pending_store import PendingStore
+from tg_solana_bot.reconciler import FinalityReconciler
+
+
+class FakeClient:
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    async def get_signature_statuses(self, signatures):
+        return [self.statuses.get(sig) for sig in signatures]
+
+
+class FakeState:
+    def __init__(self):
+        self.finalized = {}
+
+    def save_finalized_signature(self, address, signature):
+        self.finalized[address] = signature
+
+
+class RecordingSinks:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event):
+        self.events.append(event)
+
+
+def _reconciler(db_path, client, state, sinks):
+    store = PendingStore(db_path, "local")
+    reconciler = FinalityReconciler(client, state, None, drop_after_seconds=150.0, sinks=sinks, store=store)
+    return reconciler, store
+
+
+def test_alerts_tracked_before_a_restart_are_finalized_or_retracted(tmp_path):
+    db_path = str(tmp_path / "outbox.sqlite3")
+    state, sinks = FakeState(), RecordingSinks()
+
+    before, store = _reconciler(db_path, FakeClient({}), state, sinks)
+    before.track("Wallet", "sig1", "BUY 1")
+    before.track("Wallet", "sig2")
+    before.track("Wallet", "sig3", "SELL 3")
+    before.update_caption("sig3", "SELL 3 (edited)")
+    store.close()
+
+    client = FakeClient({
+        "sig1": {"confirmationStatus": "finalized", "err": None},
+        "sig2": {"confirmationStatus": "finalized", "err": None},
+        "sig3": {"confirmationStatus": "confirmed", "err": {"InstructionError": [0, "Custom"]}},
+    })
+    after, store = _reconciler(db_path, client, state, sinks)
+    assert after.load() == 3
+    asyncio.run(after.reconcile_once())
+
+    assert state.finalized == {"Wallet": "sig2"}
+    assert [(e.key, e.status) for e in sinks.events] == [("sig3", "retracted"), ("sig1", "finalized")]
+    assert "SELL 3 (edited)" in sinks.events[0].caption
+    assert after.pending_count == 0
+    assert store.load() == []
+    store.close()
+
+
+def test_unresolved_signatures_stay_pending_across_restarts(tmp_path):
+    db_path = str(tmp_path / "outbox.sqlite3")
+    state, sinks = FakeState(), RecordingSinks()
+
+    before, store = _reconciler(db_path, FakeClient({}), state, sinks)
+    before.track("Wallet", "sig1", "BUY 1")
+    before.track("Wallet", "sig2", "BUY 2")
+    before.max_pending = 1
+    before.track("Wallet", "sig3", "BUY 3")
+    asyncio.run(before.reconcile_once())
+    store.close()
+
+    after, store = _reconciler(db_path, FakeClient({}), state, sinks)
+    assert after.load() == 2
+    assert [sig for _, sig, _, _ in store.load()] == ["sig2", "sig3"]
+    assert sinks.events == []
+    store.close()
@@ -0,0 +1,47 @@
+import asyncio
+
+from tg_solana_bot.sharding import ShardCoordinator
+
+
+def test_unfinished_claim_is_reclaimed_after_restart(tmp_path):
+    db_path = str(tmp_path / "shards.sqlite3")
+
+    async def scenario():
+        first = ShardCoordinator(db_path, "a")
+        assert await first.claim("sig1") is True
+        # Same process, still in flight: not claimable twice.
+        assert await first.claim("sig1") is None
+        other = ShardCoordinator(db_path, "b")
+        assert await other.claim("sig1") is None
+        # Crash: the restarted instance takes its claim back.
+        restarted = ShardCoordinator(db_path, "a")
+        assert await restarted.claim("sig1") is True
+        await restarted.complete("sig1")
+        assert await other.claim("sig1") is False
+
+    asyncio.run(scenario())
+
+
+def test_expired_claim_of_another_instance_is_reclaimed(tmp_path):
+    db_path = str(tmp_path / "shards.sqlite3")
+
+    async def scenario():
+        dead = ShardCoordinator(db_path, "a", claim_lease_seconds=-1)
+        assert await dead.claim("sig1") is True
+        return await ShardCoordinator(db_path, "b").claim("sig1")
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_cancelled_work_releases_its_claim(tmp_path):
+    db_path = str(tmp_path / "shards.sqlite3")
+
+    async def scenario():
+        shards = ShardCoordinator(db_path, "a")
+        task = asyncio.create_task(shards.run_once("sig1", lambda: asyncio.sleep(3600)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return await ShardCoordinator(db_path, "b").claim("sig1")
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,57 @@
+import asyncio
+
+from tg_solana_bot.sinks import EventSink, SinkEvent, SinkFanout
+
+
+class SlowDurableSink(EventSink):
+    name = "durable"
+    durable = True
+
+    def __init__(self, seen_by_queued):
+        self.seen_by_queued = seen_by_queued
+        self.queued_at_send = []
+
+    async def send(self, events):
+        self.queued_at_send.append(self.seen_by_queued())
+
+
+class StuckSink(EventSink):
+    def __init__(self, name="stuck"):
+        self.name = name
+
+    async def send(self, events):
+        await asyncio.sleep(3600)
+
+
+def test_queued_sinks_get_the_event_before_the_durable_write():
+    async def scenario():
+        fanout = SinkFanout([], queue_size=10)
+        durable = SlowDurableSink(lambda: sum(fanout.pending().values()))
+        fanout.sinks = [durable, StuckSink("jsonl"), StuckSink("webhook")]
+        fanout.start()
+        await fanout.emit(SinkEvent("alert", "sig1"))
+        await fanout.close(timeout=0.01)
+        return durable.queued_at_send
+
+    # Both queued sinks already held the event when the durable sink was written.
+    assert asyncio.run(scenario()) == [2]
+
+
+def test_shrink_drops_the_oldest_queued_events():
+    async def scenario():
+        fanout = SinkFanout([StuckSink()], queue_size=10)
+        fanout.start()
+        for n in range(6):
+            await fanout.emit(SinkEvent("event", f"sig{n}"))
+        # The worker holds sig0; five remain queued.
+        await asyncio.sleep(0)
+        size = fanout.approx_bytes()
+        removed = fanout.shrink(0.5)
+        left = fanout.pending()["stuck"]
+        await fanout.close(timeout=0.01)
+        return size, removed, left, fanout.dropped
+
+    size, removed, left, dropped = asyncio.run(scenario())
+    assert size > 0
+    assert (removed, left) == (2, 3)
+    assert dropped == {"stuck": 2}
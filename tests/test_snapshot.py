@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from tg_solana_bot.price_client import PriceClient
+from tg_solana_bot.snapshot import WarmStartSnapshot
+from tg_solana_bot.solana_client import SolanaClient
+
+OWNER = "Owner111111111111111111111111111111111111111"
+MINT = "Mint1111111111111111111111111111111111111111"
+
+
+class NoManualPrices:
+    def get_price(self, mint):
+        return None
+
+
+def _restored_clients(tmp_path):
+    """Clients restored from a snapshot whose entries are older than every TTL."""
+    fetched_at = time.time() - 3600
+    snapshot = WarmStartSnapshot(str(tmp_path / "snapshot.json"))
+    snapshot.save({
+        "token_accounts": {OWNER: {"fetched_at": fetched_at, "accounts": ["TokenAccount1"]}},
+        "prices": {MINT: [1.25, fetched_at]},
+    })
+    sections = snapshot.load()
+    client = SolanaClient("http://rpc.invalid", token_accounts_ttl_seconds=600)
+    client.import_token_accounts(sections["token_accounts"])
+    prices = PriceClient(NoManualPrices(), cache_ttl_seconds=60)
+    prices.import_cache(sections["prices"])
+    return client, prices
+
+
+def test_restored_token_accounts_are_served_without_rpc(tmp_path):
+    client, _ = _restored_clients(tmp_path)
+    calls = []
+
+    async def fetch(owner):
+        calls.append(owner)
+        return ["TokenAccount1", "TokenAccount2"]
+
+    client._fetch_token_accounts_by_owner = fetch
+
+    async def scenario():
+        first = await client.get_token_accounts_by_owner(OWNER)
+        calls_during_lookup = list(calls)
+        await asyncio.sleep(0)
+        await asyncio.gather(*client._background)
+        return first, calls_during_lookup, await client.get_token_accounts_by_owner(OWNER)
+
+    first, calls_during_lookup, refreshed = asyncio.run(scenario())
+    assert first == ["TokenAccount1"]
+    assert calls_during_lookup == []
+    assert refreshed == ["TokenAccount1", "TokenAccount2"]
+    assert calls == [OWNER]
+
+
+def test_restored_prices_are_served_without_a_price_request(tmp_path):
+    _, prices = _restored_clients(tmp_path)
+    calls = []
+
+    async def jupiter(mint):
+        calls.append(mint)
+        return 2.5
+
+    prices._get_jupiter_price = jupiter
+
+    async def scenario():
+        first = await prices.get_usd_price(MINT)
+        calls_during_lookup = list(calls)
+        await asyncio.gather(*prices._background)
+        return first, calls_during_lookup, await prices.get_usd_price(MINT)
+
+    first, calls_during_lookup, refreshed = asyncio.run(scenario())
+    assert first == 1.25
+    assert calls_during_lookup == []
+    assert refreshed == 2.5
@@ -0,0 +1,69 @@
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.tx_parser import TransactionParser
+
+MINT = "BuLLieveMint1111111111111111111111111111111"
+INCINERATOR = "1nc1nerator11111111111111111111111111111111"
+
+
+def _balance(index, owner, amount, mint=MINT):
+    return {
+        "accountIndex": index,
+        "mint": mint,
+        "owner": owner,
+        "uiTokenAmount": {"amount": str(amount), "decimals": 6, "uiAmount": amount / 1e6},
+    }
+
+
+def _tx(pre, post, err=None):
+    return ParsedTransaction.from_rpc(
+        {
+            "slot": 1,
+            "transaction": {"signatures": ["sig"], "message": {"accountKeys": ["holderA"]}},
+            "meta": {"err": err, "preTokenBalances": pre, "postTokenBalances": post},
+        }
+    )
+
+
+def _parser():
+    return TransactionParser("primary", "secondary", MINT, INCINERATOR)
+
+
+def test_net_supply_decrease_is_a_burn():
+    tx = _tx([_balance(1, "holderA", 5_000_000)], [_balance(1, "holderA", 3_500_000)])
+    details = _parser().classify_mint_burn(tx)
+    assert details["method"] == "burn"
+    assert details["amount"] == "1.5"
+    assert details["burner"] == "holderA"
+
+
+def test_transfer_into_the_incinerator_is_a_burn():
+    tx = _tx(
+        [_balance(1, "holderA", 5_000_000), _balance(2, INCINERATOR, 0)],
+        [_balance(1, "holderA", 3_000_000), _balance(2, INCINERATOR, 2_000_000)],
+    )
+    details = _parser().classify_mint_burn(tx)
+    assert details["method"] == "incinerator"
+    assert details["amount"] == "2"
+    assert details["burner"] == "holderA"
+
+
+def test_transfer_between_holders_is_not_a_burn():
+    tx = _tx(
+        [_balance(1, "holderA", 5_000_000), _balance(2, "holderB", 0)],
+        [_balance(1, "holderA", 3_000_000), _balance(2, "holderB", 2_000_000)],
+    )
+    assert _parser().classify_mint_burn(tx) is None
+
+
+def test_other_mints_are_ignored():
+    tx = _tx([_balance(1, "holderA", 5_000_000, mint="Other")], [_balance(1, "holderA", 0, mint="Other")])
+    assert _parser().classify_mint_burn(tx) is None
+
+
+def test_failed_transaction_is_skipped():
+    tx = _tx(
+        [_balance(1, "holderA", 5_000_000)],
+        [_balance(1, "holderA", 3_500_000)],
+        err={"InstructionError": [0, "Custom"]},
+    )
+    assert _parser().classify_mint_burn(tx) is None
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from tg_solana_bot.governor import DEFAULT_METHOD_CREDITS
+from tg_solana_bot.models import ParsedTransaction
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "blockscan:slot"
+INGEST_MODES = ("auto", "signatures", "blocks")
+# Mainnet averages ~400ms per slot.
+SLOTS_PER_SECOND = 2.5
+# Rough peak footprint of one full mainnet block while it is decoded.
+BLOCK_DECODE_BYTES = 40 * 1024 * 1024
+
+BlockMatch = Tuple[ParsedTransaction, Tuple[str, ...]]
+MatchCallback = Callable[[List[BlockMatch]], Awaitable[None]]
+
+
+class BlockScanner:
+    """Follows confirmed blocks and picks out the transactions that touch watched addresses.
+
+    A busy wallet costs a signature page per address per poll plus one
+    ``getTransaction`` per signature. Reading every block instead costs a
+    fixed ``getBlock`` per slot however many watched transactions it holds,
+    and filtering happens locally (in the offload worker, when the client has
+    one). Checkpoints are slots, stored under ``blockscan:slot``; the
+    per-address signature checkpoints are kept current too, so polling can
+    take over again at any time.
+
+    In ``auto`` mode the scanner compares the credits per second of both
+    engines over each window and switches when blocks are cheaper. Once
+    blocks are being read, filtering another address costs nothing, so every
+    watched address moves to block mode together. Block mode is refused
+    when the request governor's rate cannot sustain it or when the memory
+    budget has no room to decode a block. With the default credits
+    (``getBlock`` = 10) it needs ``RPC_REQUESTS_PER_SECOND`` of about 26;
+    below that, ``auto`` stays on signature polling and says so at start.
+
+    Slots are never skipped: when the scanner falls more than
+    ``max_lag_slots`` behind (for example because blocks keep failing to
+    load), it hands back to signature polling, which pages back to each
+    address's checkpoint and so backfills the gap. ``blocks`` mode re-arms
+    once that has run.
+    """
+
+    def __init__(
+        self,
+        client,
+        state,
+        on_matches: MatchCallback,
+        mode: str = "auto",
+        poll_interval_seconds: float = 10.0,
+        interval_seconds: float = 2.0,
+        max_slots: int = 150,
+        max_lag_slots: int = 1500,
+        fetch_concurrency: int = 4,
+        window_seconds: float = 300.0,
+        memory=None,
+    ):
+        if mode not in INGEST_MODES:
+            logger.warning(f"[blockscan] unknown ingest mode {mode!r}, using auto")
+            mode = "auto"
+        self.client = client
+        self.state = state
+        self.on_matches = on_matches
+        self.mode = mode
+        self.poll_interval_seconds = poll_interval_seconds
+        self.interval_seconds = interval_seconds
+        self.max_slots = max_slots
+        self.max_lag_slots = max_lag_slots
+        self.fetch_concurrency = fetch_concurrency
+        self.window_seconds = window_seconds
+        self.memory = memory
+        # address -> owner wallet
+        self.watched: Dict[str, str] = {}
+        self.active = False
+        self.scanned = 0
+        self.matched = 0
+        self.lag_slots = 0
+        self._arming_slot: Optional[int] = None
+        self._window_started = time.monotonic()
+        self._window_fetches = 0
+        governor = client.governor
+        if mode != "signatures" and governor is not None and self.block_cost() > governor.rate:
+            logger.warning(
+                f"[blockscan] block mode needs RPC_REQUESTS_PER_SECOND >= {self.block_cost():.0f} "
+                f"(getBlock costs {self._credits('getBlock'):g} credits), the governor allows {governor.rate:g}; "
+                "staying on signature polling"
+            )
+
+    def watch(self, wallet: str, addresses: List[str]):
+        """Replace the addresses watched for ``wallet``."""
+        self.watched = {a: w for a, w in self.watched.items() if w != wallet}
+        self.watched.update((a, wallet) for a in addresses)
+
+    def observe(self, fetches: int):
+        """Count transactions the signature poller had to fetch."""
+        self._window_fetches += fetches
+
+    def _credits(self, method: str) -> float:
+        governor = self.client.governor
+        if governor is not None:
+            return governor.cost(method)
+        return DEFAULT_METHOD_CREDITS.get(method, 1.0)
+
+    def signature_cost(self, fetches_per_second: float) -> float:
+        """Credits per second of polling every watched address by signature."""
+        polls = len(self.watched) * self._credits("getSignaturesForAddress") / self.poll_interval_seconds
+        return polls + fetches_per_second * self._credits("getTransaction")
+
+    def block_cost(self) -> float:
+        """Credits per second of following every block."""
+        polls = (self._credits("getSlot") + self._credits("getBlocks")) / self.interval_seconds
+        return polls + SLOTS_PER_SECOND * self._credits("getBlock")
+
+    def block_concurrency(self) -> int:
+        """Blocks that may be decoded at once within the memory budget (0: none)."""
+        if self.memory is None:
+            return self.fetch_concurrency
+        headroom = self.memory.headroom()
+        if headroom is None:
+            return self.fetch_concurrency
+        return min(self.fetch_concurrency, headroom // BLOCK_DECODE_BYTES)
+
+    def block_mode_blocker(self) -> Optional[str]:
+        """Why block mode cannot run right now, or None if it can."""
+        governor = self.client.governor
+        if governor is not None and self.block_cost() > governor.rate:
+            return f"needs {self.block_cost():.1f} credits/s, the governor allows {governor.rate:g}"
+        if self.block_concurrency() < 1:
+            return f"no memory headroom to decode a {BLOCK_DECODE_BYTES // (1024 * 1024)}MB block"
+        return None
+
+    async def decide(self):
+        """Switch engines when the last window shows the other one is cheaper.
+
+        Called after each poll cycle. Switching to blocks takes two calls:
+        the first records the current slot, the poll cycle in between covers
+        everything up to it, and the second starts scanning from there.
+        """
+        if self.mode == "signatures":
+            return
+        if self._arming_slot is not None:
+            self._activate(self._arming_slot)
+            self._arming_slot = None
+            return
+        blocker = self.block_mode_blocker()
+        if self.active and blocker is not None:
+            self._fall_back(blocker)
+            return
+        if self.mode == "blocks":
+            if not self.active and blocker is None:
+                await self._arm()
+            return
+        elapsed = time.monotonic() - self._window_started
+        if elapsed < self.window_seconds:
+            return
+        rate = self._window_fetches / elapsed
+        self._window_started = time.monotonic()
+        self._window_fetches = 0
+        signature_cost, block_cost = self.signature_cost(rate), self.block_cost()
+        logger.info(
+            f"[blockscan] {rate:.2f} tx/s, signatures={signature_cost:.1f} credits/s blocks={block_cost:.1f} credits/s"
+        )
+        if not self.active and signature_cost > block_cost:
+            if blocker is not None:
+                logger.info(f"[blockscan] block mode would be cheaper but {blocker}")
+                return
+            await self._arm()
+        elif self.active and signature_cost < block_cost / 2:
+            # The gap to block_cost keeps a borderline rate from flapping.
+            self._fall_back("signature polling is cheaper")
+
+    async def _arm(self):
+        self._arming_slot = await self.client.get_slot()
+        logger.info(f"[blockscan] switching to block mode from slot {self._arming_slot}")
+
+    def _activate(self, slot: int):
+        self.state.save_last_signature(CHECKPOINT_KEY, str(slot - 1))
+        self.active = True
+
+    def _fall_back(self, reason: str):
+        self.active = False
+        logger.warning(f"[blockscan] switching back to signature polling: {reason}")
+
+    async def run(self):
+        while True:
+            if self.active:
+                try:
+                    await self.scan_once()
+                except Exception as exc:
+                    logger.error(f"[blockscan] scan failed: {exc}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def scan_once(self) -> int:
+        """Scan the blocks after the checkpoint; returns the number of matching transactions."""
+        watched = frozenset(self.watched)
+        if not watched:
+            return 0
+        tip = await self.client.get_slot()
+        saved = self.state.load_last_signature(CHECKPOINT_KEY)
+        checkpoint = int(saved) if saved else None
+        if checkpoint is None:
+            self._fall_back("no slot checkpoint")
+            return 0
+        if tip - checkpoint > self.max_lag_slots:
+            # Signature polling resumes from the per-address checkpoints, which cover the gap.
+            self._fall_back(f"{tip - checkpoint} slots behind")
+            return 0
+        if tip <= checkpoint:
+            return 0
+
+        end = min(tip, checkpoint + self.max_slots)
+        slots = await self.client.get_blocks(checkpoint + 1, end)
+        concurrency = self.block_concurrency()
+        if concurrency < 1:
+            self._fall_back("no memory headroom to decode blocks")
+            return 0
+        blocks = await self._fetch_blocks(slots, watched, concurrency)
+        done = checkpoint
+        latest: Dict[str, str] = {}
+        found = 0
+        for slot, block in zip(slots, blocks):
+            if not self.active:
+                # Handed back to signature polling mid-pass.
+                break
+            if block is None:
+                # Fetch failed: keep the checkpoint before it so the next pass retries.
+                logger.warning(f"[blockscan] stopped at slot {slot}, retrying next pass")
+                break
+            matches = block.get("matches") or []
+            if matches:
+                try:
+                    await self.on_matches(matches)
+                except Exception as exc:
+                    logger.error(f"[blockscan] processing slot {slot} failed: {exc}")
+                    break
+                for tx, addresses in matches:
+                    for address in addresses:
+                        latest[address] = tx.signature
+                found += len(matches)
+            done = slot
+        else:
+            # Slots past the last block in the range were skipped by the leader.
+            done = slots[-1] if slots else (end if end < tip else checkpoint)
+
+        self.scanned += len(slots)
+        self.matched += found
+        self._window_fetches += found
+        self.lag_slots = tip - done
+        # A crash before this point replays the range; recent signatures and the outbox ignore repeats.
+        latest[CHECKPOINT_KEY] = str(done)
+        self.state.save_last_signatures(latest)
+        logger.info(f"[blockscan] slots {checkpoint + 1}..{done} blocks={len(slots)} matched={found} lag={self.lag_slots}")
+        return found
+
+    async def _fetch_blocks(
+        self, slots: List[int], watched: FrozenSet[str], concurrency: int
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Matching transactions of each block (None when the fetch failed), in slot order."""
+        limit = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(slot: int) -> Optional[Dict[str, Any]]:
+            async with limit:
+                try:
+                    return await self.client.get_block_matches(slot, watched)
+                except Exception as exc:
+                    logger.error(f"[blockscan] get_block failed slot={slot}: {exc}")
+                    return None
+
+        return list(await asyncio.gather(*(fetch(s) for s in slots)))
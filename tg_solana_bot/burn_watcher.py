@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.offload import Offloader
+from tg_solana_bot.tx_parser import TransactionParser, classify_mint_burns
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "burnwatch:"
+
+BurnCallback = Callable[[str, ParsedTransaction, Dict[str, Any]], Awaitable[None]]
+
+
+class BurnWatcher:
+    """Follows the mint's signature stream, and the incinerator's token accounts
+    for that mint, for burns by any holder.
+
+    Runs as its own task with its own checkpoints (stored under
+    ``burnwatch:<address>``), so a busy mint never delays the wallet
+    pollers. Streams are chosen by account membership: every transaction in
+    them touches the mint or the incinerator's account for it, so nothing
+    unrelated is fetched. Signature metadata then drops failed and
+    already-seen transactions before any body is fetched; only the rest is
+    fetched, decoded and classified with ``classify_mint_burn``.
+    """
+
+    def __init__(
+        self,
+        client,
+        state,
+        tx_parser: TransactionParser,
+        on_burn: BurnCallback,
+        mint: str,
+        incinerator: str = "",
+        recent=None,
+        shards=None,
+        offloader: Optional[Offloader] = None,
+        interval_seconds: float = 30.0,
+        page_limit: int = 100,
+        max_pages: int = 5,
+        fetch_concurrency: int = 4,
+        accounts_ttl_seconds: float = 600.0,
+    ):
+        self.client = client
+        self.state = state
+        self.tx_parser = tx_parser
+        self.on_burn = on_burn
+        self.mint = mint
+        self.incinerator = incinerator
+        self.accounts_ttl_seconds = accounts_ttl_seconds
+        self._incinerator_accounts: List[str] = []
+        self._accounts_fetched_at = 0.0
+        self.recent = recent
+        self.shards = shards
+        self.offloader = offloader or Offloader("inline")
+        self.interval_seconds = interval_seconds
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self.fetch_concurrency = fetch_concurrency
+        self.fetched = 0
+        self.skipped = 0
+
+    async def streams(self) -> List[str]:
+        """The mint plus the incinerator's token accounts for it (refreshed every ``accounts_ttl_seconds``)."""
+        # A transfer that also creates the incinerator's account names the mint, so the
+        # mint stream covers it; later plain transfers only name the token account.
+        if self.incinerator and time.time() - self._accounts_fetched_at > self.accounts_ttl_seconds:
+            try:
+                self._incinerator_accounts = await self.client.get_token_accounts_for_mint(self.incinerator, self.mint)
+                self._accounts_fetched_at = time.time()
+            except Exception as exc:
+                logger.error(f"[burnwatch] incinerator token accounts lookup failed: {exc}")
+        return [s for s in dict.fromkeys([self.mint] + self._incinerator_accounts) if s]
+
+    async def run(self):
+        while True:
+            for stream in await self.streams():
+                if self.shards is not None and not self.shards.owns(stream):
+                    continue
+                try:
+                    await self.poll_stream(stream)
+                except Exception as exc:
+                    logger.error(f"[burnwatch] poll failed stream={stream}: {exc}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def poll_stream(self, stream: str) -> int:
+        """Process new signatures of one stream; returns the number of burns found."""
+        key = CHECKPOINT_PREFIX + stream
+        checkpoint = self.state.load_last_signature(key)
+        entries = await self._new_signatures(stream, checkpoint)
+        if not entries:
+            return 0
+        newest = entries[0]["signature"]
+        if checkpoint is None:
+            logger.info(f"[burnwatch] stream={stream} initialize checkpoint to {newest} (skip history)")
+            self.state.save_last_signature(key, newest)
+            return 0
+
+        candidates = [e["signature"] for e in reversed(entries) if self._is_candidate(e)]
+        self.skipped += len(entries) - len(candidates)
+        burns = 0
+        done = checkpoint
+        for sig, tx, details in await self._fetch_and_classify(candidates):
+            if tx is None:
+                # Fetch failed: keep the checkpoint before it so the next pass retries.
+                logger.warning(f"[burnwatch] stream={stream} stopped at {sig}, retrying next pass")
+                newest = done
+                break
+            if details is not None:
+                handled = await self._process_once(sig, lambda: self.on_burn(stream, tx, details))
+                if handled is None:
+                    logger.info(f"[burnwatch] {sig} is being processed by another instance, retrying next pass")
+                    newest = done
+                    break
+                if handled:
+                    burns += 1
+                    if self.recent is not None:
+                        self.recent.add(sig)
+            done = sig
+        # A crash before this point replays the batch; the outbox and ledger ignore repeats.
+        self.state.save_last_signature(key, newest)
+        logger.info(
+            f"[burnwatch] stream={stream} new={len(entries)} fetched={len(candidates)} burns={burns}"
+        )
+        return burns
+
+    async def _new_signatures(self, stream: str, checkpoint: Optional[str]) -> List[Dict[str, Any]]:
+        """Signatures newer than ``checkpoint``, newest first, at most ``max_pages`` pages."""
+        if checkpoint is None:
+            return await self.client.get_signatures_for_address(stream, limit=1, priority="discovery")
+        entries: List[Dict[str, Any]] = []
+        before = None
+        for _ in range(self.max_pages):
+            page = await self.client.get_signatures_for_address(
+                stream, before=before, limit=self.page_limit, until=checkpoint, priority="discovery"
+            )
+            entries.extend(page)
+            if len(page) < self.page_limit:
+                return entries
+            before = page[-1]["signature"]
+        logger.warning(
+            f"[burnwatch] stream={stream} more than {len(entries)} new signatures, older ones are skipped"
+        )
+        return entries
+
+    def _is_candidate(self, entry: Dict[str, Any]) -> bool:
+        # Failed transactions burn nothing; seen ones were handled by the wallet pollers.
+        if entry.get("err") is not None:
+            return False
+        return self.recent is None or entry.get("signature") not in self.recent
+
+    async def _process_once(self, signature: str, work) -> Optional[bool]:
+        if self.shards is None:
+            await work()
+            return True
+        return await self.shards.run_once(signature, work)
+
+    async def _fetch_and_classify(self, sigs: List[str]):
+        """(signature, tx or None, burn details or None) for each signature, in order."""
+        if not sigs:
+            return []
+        limit = asyncio.Semaphore(max(1, self.fetch_concurrency))
+
+        async def fetch(sig: str) -> Optional[ParsedTransaction]:
+            async with limit:
+                try:
+                    # These produce burn alerts; still below live wallet fetches.
+                    return await self.client.get_parsed_transaction(sig, priority="polling")
+                except Exception as exc:
+                    logger.error(f"[burnwatch] get_transaction failed signature={sig}: {exc}")
+                    return None
+
+        txs = await asyncio.gather(*(fetch(s) for s in sigs))
+        self.fetched += len(sigs)
+        found = [tx for tx in txs if tx is not None]
+        results = iter(await self.offloader.run(classify_mint_burns, self.tx_parser, found) if found else [])
+        return [(sig, tx, next(results) if tx is not None else None) for sig, tx in zip(sigs, txs)]
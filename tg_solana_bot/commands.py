@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from tg_solana_bot.transport import HttpTransport
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Per-user token bucket: ``burst`` commands, refilled at ``per_minute``."""
+
+    def __init__(self, per_minute: float = 10.0, burst: int = 5):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+
+    def allow(self, user_id: int) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(user_id, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now)
+            return False
+        self._buckets[user_id] = (tokens - 1, now)
+        return True
+
+
+class CommandBot:
+    """Answers chat commands by long-polling ``getUpdates``.
+
+    Every answer is built from in-memory state on the runtime (status
+    counters, price cache, manual prices, ledger aggregates), so commands
+    never issue RPC calls or wait on the polling pipeline.
+    """
+
+    def __init__(
+        self,
+        runtime,
+        bot_token: str,
+        transport: HttpTransport,
+        api_url: str = "https://api.telegram.org",
+        admin_user_ids: Optional[List[str]] = None,
+        rate_per_minute: float = 10.0,
+        poll_timeout: int = 25,
+    ):
+        self.runtime = runtime
+        self.transport = transport
+        self.base_url = f"{api_url.rstrip('/')}/bot{bot_token}"
+        self.admin_user_ids = {str(u) for u in (admin_user_ids or [])}
+        self.rate_limiter = RateLimiter(per_minute=rate_per_minute)
+        self.poll_timeout = poll_timeout
+        self._offset: Optional[int] = None
+        self._handlers: Dict[str, Callable[[Dict[str, Any], List[str]], Awaitable[str]]] = {
+            "/start": self._cmd_help,
+            "/help": self._cmd_help,
+            "/stats": self._cmd_stats,
+            "/price": self._cmd_price,
+            "/setprice": self._cmd_setprice,
+            "/lag": self._cmd_lag,
+            "/status": self._cmd_status,
+            "/mem": self._cmd_mem,
+        }
+
+    async def run(self):
+        while True:
+            try:
+                updates = await self._get_updates()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"[commands] getUpdates failed: {exc}")
+                await asyncio.sleep(5)
+                continue
+            for update in updates:
+                self._offset = update["update_id"] + 1
+                try:
+                    await self.handle_update(update)
+                except Exception as exc:
+                    logger.error(f"[commands] update {update.get('update_id')} failed: {exc}")
+
+    async def _get_updates(self) -> List[Dict[str, Any]]:
+        session = await self.transport.get_session()
+        payload: Dict[str, Any] = {"timeout": self.poll_timeout, "allowed_updates": ["message"]}
+        if self._offset is not None:
+            payload["offset"] = self._offset
+        timeout = self.transport.timeout(read=self.poll_timeout + 10)
+        async with session.post(f"{self.base_url}/getUpdates", json=payload, timeout=timeout) as response:
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            data = await self.transport.read_json(response)
+        return data.get("result", [])
+
+    async def handle_update(self, update: Dict[str, Any]) -> Optional[str]:
+        """Dispatch one update; returns the reply text (None if ignored)."""
+        message = update.get("message") or {}
+        text = (message.get("text") or "").strip()
+        if not text.startswith("/"):
+            return None
+        chat_id = str((message.get("chat") or {}).get("id", ""))
+        user_id = (message.get("from") or {}).get("id", 0)
+        if not self._authorised(chat_id, user_id):
+            return None
+
+        parts = text.split()
+        command = parts[0].split("@", 1)[0].lower()
+        handler = self._handlers.get(command)
+        if handler is None:
+            return None
+        if not self.rate_limiter.allow(user_id):
+            logger.info(f"[commands] rate limited user={user_id} command={command}")
+            return None
+
+        reply = await handler(message, parts[1:])
+        await self._reply(chat_id, message.get("message_id"), reply)
+        return reply
+
+    def _authorised(self, chat_id: str, user_id: int) -> bool:
+        # Alert chats, or an admin talking to the bot directly.
+        return chat_id in self.runtime.notifier.chat_ids or str(user_id) in self.admin_user_ids
+
+    async def _reply(self, chat_id: str, reply_to: Optional[int], text: str):
+        session = await self.transport.get_session()
+        payload: Dict[str, Any] = {"chat_id": chat_id, "text": text}
+        if reply_to:
+            payload["reply_to_message_id"] = reply_to
+            payload["allow_sending_without_reply"] = True
+        async with session.post(f"{self.base_url}/sendMessage", json=payload) as response:
+            if response.status != 200:
+                logger.error(f"[commands] reply to {chat_id} failed: {response.status}")
+
+    async def _cmd_help(self, message, args) -> str:
+        return (
+            "/stats - fee and burn totals\n"
+            "/price <mint|symbol> - cached USD price\n"
+            "/setprice <mint|symbol> <usd> - set a manual price (admins)\n"
+            "/lag - time since each wallet was polled\n"
+            "/status - bot health\n"
+            "/mem - memory use and top allocators"
+        )
+
+    async def _cmd_stats(self, message, args) -> str:
+        ledger = self.runtime.ledger
+        if ledger is None:
+            return "Ledger disabled."
+        lines = []
+        day_ago = int(time.time()) - 86400
+        for event_type, label in (("fee_income", "FEES"), ("burn", "BURNED")):
+            totals = ledger.totals(event_type)
+            if not totals:
+                continue
+            last_day = ledger.sum_since(event_type, day_ago, "hour")
+            lines.append(f"{label}:")
+            for total in totals[:5]:
+                day = last_day.get(total.mint, {})
+                lines.append(
+                    f"  {_label(total.mint)}: {total.amount:,.6g} all-time (~${total.usd:,.2f}, {total.count} events)"
+                    f", 24h {day.get('amount', 0):,.6g} (~${day.get('usd', 0):,.2f})"
+                )
+        return "\n".join(lines) or "No events recorded yet."
+
+    async def _cmd_price(self, message, args) -> str:
+        if not args:
+            return "Usage: /price <mint|symbol>"
+        key = args[0]
+        price_client = self.runtime.price_client
+        cached = price_client.cached_entry(key)
+        if cached is not None:
+            price, fetched_at = cached
+            return f"{key}: ${price:,.8g} (cached {time.time() - fetched_at:.0f}s ago)"
+        manual = price_client.manual_price_store.get_price(key)
+        if manual is not None:
+            return f"{key}: ${manual:,.8g} (manual)"
+        return f"No cached price for {key}."
+
+    async def _cmd_setprice(self, message, args) -> str:
+        user_id = str((message.get("from") or {}).get("id", ""))
+        if user_id not in self.admin_user_ids:
+            return "Only admins can set prices."
+        if len(args) != 2:
+            return "Usage: /setprice <mint|symbol> <usd>"
+        try:
+            price = float(args[1])
+        except ValueError:
+            return f"Not a number: {args[1]}"
+        if not math.isfinite(price) or price <= 0:
+            return "Price must be a positive number."
+        if self.runtime.price_client.manual_price_store.set_price(args[0], price):
+            return f"Manual price for {args[0]} set to ${price:,.8g}"
+        return "Could not save the price, see logs."
+
+    async def _cmd_lag(self, message, args) -> str:
+        status = self.runtime.status
+        now = time.time()
+        lines = []
+        for wallet, polled_at in status.last_poll_by_wallet.items():
+            lines.append(f"{_label(wallet)}: polled {now - polled_at:.0f}s ago")
+        if status.last_cycle_seconds is not None:
+            lines.append(f"last cycle took {status.last_cycle_seconds:.1f}s")
+        lines.append(f"outbox pending: {self.runtime.outbox.pending_count()}")
+        if self.runtime.reconciler is not None:
+            lines.append(f"awaiting finality: {self.runtime.reconciler.pending_count}")
+        return "\n".join(lines)
+
+    async def _cmd_status(self, message, args) -> str:
+        status = self.runtime.status
+        lines = [
+            f"uptime: {status.uptime / 3600:.1f}h, cycles: {status.cycles}",
+        ]
+        if status.time_to_first_poll is not None:
+            lines.append(f"time to first poll: {status.time_to_first_poll * 1000:.0f}ms")
+        if status.events_by_type:
+            lines.append("events: " + ", ".join(f"{k}={v}" for k, v in sorted(status.events_by_type.items())))
+        governor = self.runtime.client.governor
+        if governor is not None:
+            queued = governor.queued()
+            lines.append(
+                "rpc: " + ", ".join(
+                    f"{name} {governor.admitted[name]} sent/{queued[name]} queued/{governor.waited[name]:.0f}s waited"
+                    for name in queued
+                )
+            )
+        scanner = self.runtime.block_scanner
+        if scanner is not None:
+            engine = "blocks" if scanner.active else "signatures"
+            lines.append(
+                f"ingest: {engine} ({scanner.mode}), {scanner.scanned} blocks scanned, "
+                f"{scanner.matched} matched, lag {scanner.lag_slots} slots"
+            )
+        sinks = self.runtime.sinks
+        pending = sinks.pending()
+        if pending:
+            lines.append(
+                "sinks: " + ", ".join(
+                    f"{name} {count} queued/{sinks.dropped.get(name, 0)} dropped" for name, count in pending.items()
+                )
+            )
+        if self.runtime.shards is not None:
+            shards = self.runtime.shards
+            lines.append(f"instance: {shards.instance_id}, members: {len(shards.members)}")
+        return "\n".join(lines)
+
+    async def _cmd_mem(self, message, args) -> str:
+        memory = self.runtime.memory
+        if memory is None:
+            return "Memory budget disabled."
+        lines = [memory.report()]
+        top = memory.top_allocators(limit=5, baseline="command")
+        if not top:
+            lines.append("Set MEMORY_TRACE_FRAMES to see top allocators.")
+        for location, size, growth in top:
+            lines.append(f"{location}: {size / 1024:.0f}KiB ({growth / 1024:+.0f}KiB)")
+        return "\n".join(lines)
+
+
+def _label(address: str) -> str:
+    if len(address) > 12:
+        return f"{address[:4]}…{address[-4:]}"
+    return address
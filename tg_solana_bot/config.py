@@ -1,13 +1,32 @@
 import os
+import socket
 from dataclasses import dataclass
 from typing import List, Optional
 
+# Settings that can change at runtime without restarting the bot.
+HOT_RELOAD_FIELDS = (
+    "telegram_chat_id",
+    "telegram_chat_ids",
+    "primary_wallet_address",
+    "secondary_wallet_address",
+    "notify_fee_media_url",
+    "notify_burn_media_url",
+    "poll_interval_seconds",
+)
+
 
 def _get_env(name: str, default: str = "") -> str:
     value = os.getenv(name, default)
     return value.strip()
 
 
+def _get_bool(name: str, default: bool = False) -> bool:
+    value = _get_env(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
 @dataclass
 class Settings:
     telegram_bot_token: str
@@ -24,17 +43,95 @@ class Settings:
     state_file_path: str
     notify_fee_media_url: str
     notify_burn_media_url: str
+    http_pool_limit: int
+    http_pool_limit_per_host: int
+    http_dns_ttl_seconds: int
+    http_keepalive_seconds: float
+    http_connect_timeout_seconds: float
+    http_read_timeout_seconds: float
+    tx_fast_decode: bool
+    tx_rpc_trim: bool
+    solana_commitment: str
+    finality_reconcile: bool
+    finality_reconcile_interval_seconds: float
+    finality_drop_after_seconds: float
+    message_index_file_path: str
+    outbox_file_path: str
+    outbox_max_pending: int
+    fee_burst_window_seconds: float
+    config_file_path: str
+    watch_interval_seconds: float
+    sharding_enabled: bool
+    shard_db_path: str
+    instance_id: str
+    shard_lease_ttl_seconds: float
+    token_accounts_ttl_seconds: float
+    price_cache_ttl_seconds: float
+    snapshot_file_path: str
+    snapshot_interval_seconds: float
+    shutdown_deadline_seconds: float
+    ledger_file_path: str
+    telegram_api_url: str
+    telegram_commands_enabled: bool
+    telegram_admin_user_ids: List[str]
+    command_rate_per_minute: float
+    memory_ceiling_mb: float
+    memory_cache_fraction: float
+    memory_trace_frames: int
+    use_uvloop: bool
+    offload_mode: str
+    offload_workers: int
+    tx_prefetch_concurrency: int
+    burn_watch_enabled: bool
+    burn_watch_interval_seconds: float
+    burn_watch_max_pages: int
+    rpc_requests_per_second: float
+    rpc_burst: float
+    rpc_method_credits: str
+    rpc_live_reserve: float
+    pool_price_file_path: str
+    pool_price_ttl_seconds: float
+    event_log_enabled: bool
+    event_log_file_path: str
+    event_log_max_mb: int
+    event_log_backups: int
+    webhook_url: str
+    webhook_token: str
+    webhook_batch_size: int
+    sink_queue_size: int
+    ingest_mode: str
+    signature_backfill_max_pages: int
+    signature_max_attempts: int
+    block_scan_interval_seconds: float
+    block_scan_max_slots: int
+    block_fetch_concurrency: int
+    ingest_mode_window_seconds: float
+
+    def apply_hot_reload(self, new: "Settings") -> List[str]:
+        """Copy the hot-reloadable fields from ``new``; returns the names that changed."""
+        changed = []
+        for name in HOT_RELOAD_FIELDS:
+            value = getattr(new, name)
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed.append(name)
+        return changed
+
+
+def _get_list(name: str) -> List[str]:
+    value = _get_env(name)
+    return [v.strip() for v in value.split(",") if v.strip()]
 
 
 def load_settings() -> Settings:
     chat_id = _get_env("TELEGRAM_CHAT_ID")
-    chat_ids_env = _get_env("TELEGRAM_CHAT_IDS")
-    chat_ids: List[str] = []
-    if chat_ids_env:
-        chat_ids = [c.strip() for c in chat_ids_env.split(",") if c.strip()]
-    elif chat_id:
+    chat_ids: List[str] = _get_list("TELEGRAM_CHAT_IDS")
+    if not chat_ids and chat_id:
         chat_ids = [chat_id]
 
+    state_file_path = _get_env("STATE_FILE_PATH", os.path.join("tg_solana_bot", "state.json"))
+    data_dir = os.path.dirname(state_file_path)
+
     return Settings(
         telegram_bot_token=_get_env("TELEGRAM_BOT_TOKEN"),
         telegram_chat_id=chat_id,
@@ -56,9 +153,82 @@ def load_settings() -> Settings:
             "1nc1nerator11111111111111111111111111111111",
         ),
         poll_interval_seconds=int(_get_env("POLL_INTERVAL_SECONDS", "15")),
-        state_file_path=_get_env("STATE_FILE_PATH", os.path.join("tg_solana_bot", "state.json")),
+        state_file_path=state_file_path,
         notify_fee_media_url=_get_env("NOTIFY_FEE_MEDIA_URL"),
         notify_burn_media_url=_get_env("NOTIFY_BURN_MEDIA_URL"),
+        http_pool_limit=int(_get_env("HTTP_POOL_LIMIT", "20")),
+        http_pool_limit_per_host=int(_get_env("HTTP_POOL_LIMIT_PER_HOST", "8")),
+        http_dns_ttl_seconds=int(_get_env("HTTP_DNS_TTL_SECONDS", "300")),
+        http_keepalive_seconds=float(_get_env("HTTP_KEEPALIVE_SECONDS", "30")),
+        http_connect_timeout_seconds=float(_get_env("HTTP_CONNECT_TIMEOUT_SECONDS", "5")),
+        http_read_timeout_seconds=float(_get_env("HTTP_READ_TIMEOUT_SECONDS", "30")),
+        tx_fast_decode=_get_bool("TX_FAST_DECODE", True),
+        tx_rpc_trim=_get_bool("TX_RPC_TRIM", False),
+        solana_commitment=_get_env("SOLANA_COMMITMENT", "confirmed"),
+        finality_reconcile=_get_bool("FINALITY_RECONCILE", True),
+        finality_reconcile_interval_seconds=float(_get_env("FINALITY_RECONCILE_INTERVAL_SECONDS", "20")),
+        finality_drop_after_seconds=float(_get_env("FINALITY_DROP_AFTER_SECONDS", "150")),
+        # Legacy JSON message index, imported into the outbox database on start.
+        message_index_file_path=_get_env("MESSAGE_INDEX_FILE_PATH", os.path.join(data_dir, "message_index.json")),
+        outbox_file_path=_get_env("OUTBOX_FILE_PATH", os.path.join(data_dir, "outbox.sqlite3")),
+        outbox_max_pending=int(_get_env("OUTBOX_MAX_PENDING", "500")),
+        # Fees within this many seconds share one alert with a running total; 0 disables.
+        fee_burst_window_seconds=float(_get_env("FEE_BURST_WINDOW_SECONDS", "60")),
+        config_file_path=_get_env("CONFIG_FILE_PATH", ".env"),
+        watch_interval_seconds=float(_get_env("WATCH_INTERVAL_SECONDS", "2")),
+        sharding_enabled=_get_bool("SHARDING_ENABLED", False),
+        shard_db_path=_get_env("SHARD_DB_PATH", os.path.join(data_dir, "shards.sqlite3")),
+        instance_id=_get_env("INSTANCE_ID") or _get_env("FLY_MACHINE_ID") or f"{socket.gethostname()}-{os.getpid()}",
+        shard_lease_ttl_seconds=float(_get_env("SHARD_LEASE_TTL_SECONDS", "30")),
+        token_accounts_ttl_seconds=float(_get_env("TOKEN_ACCOUNTS_TTL_SECONDS", "600")),
+        price_cache_ttl_seconds=float(_get_env("PRICE_CACHE_TTL_SECONDS", "60")),
+        snapshot_file_path=_get_env("SNAPSHOT_FILE_PATH", os.path.join(data_dir, "snapshot.json")),
+        snapshot_interval_seconds=float(_get_env("SNAPSHOT_INTERVAL_SECONDS", "300")),
+        shutdown_deadline_seconds=float(_get_env("SHUTDOWN_DEADLINE_SECONDS", "20")),
+        ledger_file_path=_get_env("LEDGER_FILE_PATH", os.path.join(data_dir, "ledger.sqlite3")),
+        telegram_api_url=_get_env("TELEGRAM_API_URL", "https://api.telegram.org"),
+        # Telegram allows a single getUpdates consumer: enable on one instance when sharding.
+        telegram_commands_enabled=_get_bool("TELEGRAM_COMMANDS_ENABLED", True),
+        telegram_admin_user_ids=_get_list("TELEGRAM_ADMIN_USER_IDS"),
+        command_rate_per_minute=float(_get_env("COMMAND_RATE_PER_MINUTE", "10")),
+        # fly.toml gives the VM 256 MB; leave headroom for the interpreter and SQLite.
+        memory_ceiling_mb=float(_get_env("MEMORY_CEILING_MB", "200")),
+        memory_cache_fraction=float(_get_env("MEMORY_CACHE_FRACTION", "0.25")),
+        memory_trace_frames=int(_get_env("MEMORY_TRACE_FRAMES", "0")),
+        use_uvloop=_get_bool("USE_UVLOOP", True),
+        # inline | thread | process: where transaction decode and classification run.
+        offload_mode=_get_env("OFFLOAD_MODE", "thread").lower(),
+        offload_workers=int(_get_env("OFFLOAD_WORKERS", "2")),
+        tx_prefetch_concurrency=int(_get_env("TX_PREFETCH_CONCURRENCY", "4")),
+        burn_watch_enabled=_get_bool("BURN_WATCH_ENABLED", True),
+        burn_watch_interval_seconds=float(_get_env("BURN_WATCH_INTERVAL_SECONDS", "30")),
+        burn_watch_max_pages=int(_get_env("BURN_WATCH_MAX_PAGES", "5")),
+        # Provider limit in credits/sec; 0 disables the request governor.
+        rpc_requests_per_second=float(_get_env("RPC_REQUESTS_PER_SECOND", "10")),
+        rpc_burst=float(_get_env("RPC_BURST", "20")),
+        rpc_method_credits=_get_env("RPC_METHOD_CREDITS", ""),
+        rpc_live_reserve=float(_get_env("RPC_LIVE_RESERVE", "0.2")),
+        pool_price_file_path=_get_env("POOL_PRICE_FILE_PATH", os.path.join(data_dir, "price_pools.json")),
+        pool_price_ttl_seconds=float(_get_env("POOL_PRICE_TTL_SECONDS", "30")),
+        event_log_enabled=_get_bool("EVENT_LOG_ENABLED", True),
+        event_log_file_path=_get_env("EVENT_LOG_FILE_PATH", os.path.join(data_dir, "events.jsonl")),
+        event_log_max_mb=int(_get_env("EVENT_LOG_MAX_MB", "50")),
+        event_log_backups=int(_get_env("EVENT_LOG_BACKUPS", "10")),
+        # Empty disables the webhook sink.
+        webhook_url=_get_env("WEBHOOK_URL", ""),
+        webhook_token=_get_env("WEBHOOK_TOKEN", ""),
+        webhook_batch_size=int(_get_env("WEBHOOK_BATCH_SIZE", "50")),
+        sink_queue_size=int(_get_env("SINK_QUEUE_SIZE", "1000")),
+        # auto | signatures | blocks: how wallet transactions are discovered. Block mode
+        # needs RPC_REQUESTS_PER_SECOND of about 26 with the default getBlock=10 credits.
+        ingest_mode=_get_env("INGEST_MODE", "signatures").lower(),
+        signature_backfill_max_pages=int(_get_env("SIGNATURE_BACKFILL_MAX_PAGES", "10")),
+        # Cycles a signature whose transaction cannot be fetched is retried before it is dead-lettered.
+        signature_max_attempts=int(_get_env("SIGNATURE_MAX_ATTEMPTS", "5")),
+        block_scan_interval_seconds=float(_get_env("BLOCK_SCAN_INTERVAL_SECONDS", "2")),
+        block_scan_max_slots=int(_get_env("BLOCK_SCAN_MAX_SLOTS", "150")),
+        block_fetch_concurrency=int(_get_env("BLOCK_FETCH_CONCURRENCY", "4")),
+        ingest_mode_window_seconds=float(_get_env("INGEST_MODE_WINDOW_SECONDS", "300")),
     )
 
 
@@ -0,0 +1,57 @@
+import logging
+from typing import Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+class FeeBurst:
+    """Running total of the fees collected in one burst, shown in a single alert."""
+
+    __slots__ = ("key", "mint", "started_at", "amount", "count", "signer", "signatures", "alerted")
+
+    def __init__(self, key: str, mint: str, started_at: float):
+        self.key = key
+        self.mint = mint
+        self.started_at = started_at
+        self.amount = 0.0
+        self.count = 0
+        self.signer = ""
+        self.signatures: Set[str] = set()
+        # Set once the burst's alert is in the outbox.
+        self.alerted = False
+
+
+class FeeBursts:
+    """Groups fee income that arrives close together into one alert per mint.
+
+    The first fee of a burst is alerted as usual and its signature becomes
+    the burst's event key. Fees within ``window_seconds`` of it are added to
+    the running total, and that alert's caption is edited instead of a new
+    message being sent. Times are block times, so a backfill after downtime
+    groups fees the way they happened on-chain. A window of 0 disables
+    grouping.
+
+    Adding a signature that is already in the open burst changes nothing,
+    so a fee retried after its alert failed to queue is not counted twice.
+    """
+
+    def __init__(self, window_seconds: float = 60.0):
+        self.window_seconds = window_seconds
+        # mint -> open burst
+        self._open: Dict[str, FeeBurst] = {}
+
+    def add(self, mint: str, signature: str, amount: float, signer: str, when: float) -> FeeBurst:
+        """Add a fee to the open burst for ``mint``, or start a new one; returns the burst."""
+        burst = self._open.get(mint)
+        if burst is not None and signature in burst.signatures:
+            return burst
+        if burst is None or self.window_seconds <= 0 or abs(when - burst.started_at) > self.window_seconds:
+            burst = FeeBurst(signature, mint, when)
+            self._open[mint] = burst
+        burst.signatures.add(signature)
+        burst.amount += amount
+        burst.count += 1
+        burst.signer = signer
+        if burst.count > 1:
+            logger.info(f"[burst] {signature} joins {burst.key}: {burst.count} fees, {burst.amount:g} total")
+        return burst
@@ -0,0 +1,132 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value is admitted first.
+PRIORITIES = {"live": 0, "polling": 1, "discovery": 2, "backfill": 3}
+
+# Methods that cost more than one credit on common providers.
+DEFAULT_METHOD_CREDITS = {
+    "getBlock": 10,
+    "getProgramAccounts": 10,
+    "getTokenAccountsByOwner": 2,
+}
+
+
+def parse_method_credits(value: str) -> Dict[str, float]:
+    """Parse ``"getBlock=10,getTransaction=1"`` into a credits table."""
+    credits = dict(DEFAULT_METHOD_CREDITS)
+    for item in value.split(","):
+        method, _, cost = item.partition("=")
+        if method.strip() and cost.strip():
+            credits[method.strip()] = float(cost)
+    return credits
+
+
+class RequestGovernor:
+    """Token bucket that admits RPC requests by priority.
+
+    The bucket refills at ``rate`` credits per second up to ``burst``. A
+    request waits until its method's credits are available and no higher
+    priority request is waiting, so bursts stay under the provider's limit
+    before it starts answering 429. Non-live requests also leave
+    ``live_reserve`` of the bucket untouched, which keeps a live-alert
+    fetch from queueing behind a catch-up.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        method_credits: Optional[Dict[str, float]] = None,
+        live_reserve: float = 0.2,
+    ):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.method_credits = dict(DEFAULT_METHOD_CREDITS if method_credits is None else method_credits)
+        self.reserve = self.burst * live_reserve
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.waited: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+        self.admitted: Dict[str, int] = {name: 0 for name in PRIORITIES}
+
+    def cost(self, method: str) -> float:
+        return min(self.method_credits.get(method, 1.0), self.burst)
+
+    def queued(self) -> Dict[str, int]:
+        names = {v: k for k, v in PRIORITIES.items()}
+        counts = {name: 0 for name in PRIORITIES}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                counts[names[priority]] += 1
+        return counts
+
+    async def acquire(self, method: str, priority: str = "polling"):
+        level = PRIORITIES.get(priority, PRIORITIES["polling"])
+        cost = self.cost(method)
+        started = time.monotonic()
+        if not self._waiters and self._take(level, cost):
+            self.admitted[priority] = self.admitted.get(priority, 0) + 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), cost, future))
+        self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: give the credits back.
+                self._tokens = min(self.burst, self._tokens + cost)
+                self._pump()
+            raise
+        self.admitted[priority] = self.admitted.get(priority, 0) + 1
+        self.waited[priority] = self.waited.get(priority, 0.0) + time.monotonic() - started
+
+    def penalize(self, seconds: float):
+        """The provider answered 429: stop admitting anyone for ``seconds``."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - self.rate * seconds
+        logger.warning(f"[rpc] rate limited by provider, pausing admissions for {seconds}s")
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _floor(self, level: int, cost: float) -> float:
+        if level == PRIORITIES["live"]:
+            return 0.0
+        return min(self.reserve, self.burst - cost)
+
+    def _take(self, level: int, cost: float) -> bool:
+        self._refill()
+        if self._tokens - cost < self._floor(level, cost):
+            return False
+        self._tokens -= cost
+        return True
+
+    def _pump(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            level, _, cost, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._take(level, cost):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        if self._waiters:
+            level, _, cost, _ = self._waiters[0]
+            delay = max((cost + self._floor(level, cost) - self._tokens) / self.rate, 0.001)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
@@ -0,0 +1,190 @@
+import logging
+import os
+import sqlite3
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    signature TEXT NOT NULL,
+    type TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    amount_base INTEGER NOT NULL,
+    decimals INTEGER NOT NULL,
+    usd REAL,
+    block_time INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    PRIMARY KEY (signature, type, mint)
+);
+CREATE INDEX IF NOT EXISTS idx_events_type_mint_time ON events (type, mint, block_time);
+CREATE TABLE IF NOT EXISTS buckets (
+    type TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    amount_base INTEGER NOT NULL DEFAULT 0,
+    usd REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (type, mint, granularity, bucket_start)
+);
+CREATE TABLE IF NOT EXISTS totals (
+    type TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    amount_base INTEGER NOT NULL DEFAULT 0,
+    usd REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    decimals INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (type, mint)
+);
+"""
+
+GRANULARITIES = {"hour": 3600, "day": 86400}
+
+
+def to_base_units(amount: str, decimals: int) -> int:
+    """Convert a UI amount string to integer base units."""
+    scaled = Decimal(str(amount)) * (Decimal(10) ** decimals)
+    return int(scaled.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_base_units(amount_base: int, decimals: int) -> float:
+    return amount_base / (10 ** decimals) if decimals else float(amount_base)
+
+
+class LedgerTotal:
+    __slots__ = ("type", "mint", "amount_base", "decimals", "usd", "count")
+
+    def __init__(self, type: str, mint: str, amount_base: int, decimals: int, usd: float, count: int):
+        self.type = type
+        self.mint = mint
+        self.amount_base = amount_base
+        self.decimals = decimals
+        self.usd = usd
+        self.count = count
+
+    @property
+    def amount(self) -> float:
+        return from_base_units(self.amount_base, self.decimals)
+
+
+class EventLedger:
+    """SQLite record of classified events with incrementally kept aggregates.
+
+    Each new event updates its hourly and daily bucket and the all-time
+    total in the same transaction, so summaries are primary-key reads
+    instead of scans or RPC history fetches.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._ensure_directory()
+        # Opened off-loop at startup, then only used from the event loop thread.
+        self._conn = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _ensure_directory(self):
+        """Ensure the directory for the ledger database exists."""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def record_event(
+        self,
+        signature: str,
+        event_type: str,
+        mint: str,
+        amount_base: int,
+        decimals: int,
+        block_time: Optional[int],
+        slot: int = 0,
+        usd: Optional[float] = None,
+    ) -> bool:
+        """Store an event and fold it into the aggregates; False if already recorded."""
+        block_time = int(block_time or time.time())
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO events (signature, type, mint, amount_base, decimals, usd, block_time, slot) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (signature, event_type, mint, amount_base, decimals, usd, block_time, slot),
+            )
+            if cur.rowcount != 1:
+                return False
+            self._apply(event_type, mint, block_time, amount_base, usd or 0.0, 1, decimals)
+        return True
+
+    def set_usd(self, signature: str, event_type: str, mint: str, usd: float) -> None:
+        """Fill in the USD value of an event once its price is known."""
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT usd, block_time FROM events WHERE signature = ? AND type = ? AND mint = ?",
+                (signature, event_type, mint),
+            ).fetchone()
+            if row is None:
+                return
+            delta = usd - (row[0] or 0.0)
+            self._conn.execute(
+                "UPDATE events SET usd = ? WHERE signature = ? AND type = ? AND mint = ?",
+                (usd, signature, event_type, mint),
+            )
+            self._apply(event_type, mint, row[1], 0, delta, 0, None)
+
+    def _apply(
+        self, event_type: str, mint: str, block_time: int, amount_base: int, usd: float, count: int, decimals: Optional[int]
+    ) -> None:
+        for granularity, width in GRANULARITIES.items():
+            self._conn.execute(
+                "INSERT INTO buckets (type, mint, granularity, bucket_start, amount_base, usd, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (type, mint, granularity, bucket_start) DO UPDATE SET "
+                "amount_base = amount_base + excluded.amount_base, usd = usd + excluded.usd, "
+                "count = count + excluded.count",
+                (event_type, mint, granularity, block_time - block_time % width, amount_base, usd, count),
+            )
+        self._conn.execute(
+            "INSERT INTO totals (type, mint, amount_base, usd, count, decimals) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (type, mint) DO UPDATE SET "
+            "amount_base = amount_base + excluded.amount_base, usd = usd + excluded.usd, "
+            "count = count + excluded.count",
+            (event_type, mint, amount_base, usd, count, decimals or 0),
+        )
+
+    def total(self, event_type: str, mint: str) -> Optional[LedgerTotal]:
+        """All-time aggregate for (type, mint)."""
+        row = self._conn.execute(
+            "SELECT amount_base, decimals, usd, count FROM totals WHERE type = ? AND mint = ?",
+            (event_type, mint),
+        ).fetchone()
+        if row is None:
+            return None
+        return LedgerTotal(event_type, mint, row[0], row[1], row[2], row[3])
+
+    def totals(self, event_type: Optional[str] = None) -> List[LedgerTotal]:
+        query = "SELECT type, mint, amount_base, decimals, usd, count FROM totals"
+        params: tuple = ()
+        if event_type is not None:
+            query += " WHERE type = ?"
+            params = (event_type,)
+        return [LedgerTotal(*row) for row in self._conn.execute(query + " ORDER BY usd DESC", params)]
+
+    def sum_since(self, event_type: str, since: int, granularity: str = "day") -> Dict[str, Dict[str, float]]:
+        """Per-mint sums over buckets starting at or after ``since`` (epoch seconds)."""
+        width = GRANULARITIES[granularity]
+        rows = self._conn.execute(
+            "SELECT b.mint, SUM(b.amount_base), SUM(b.usd), SUM(b.count), t.decimals FROM buckets b "
+            "JOIN totals t ON t.type = b.type AND t.mint = b.mint "
+            "WHERE b.type = ? AND b.granularity = ? AND b.bucket_start >= ? GROUP BY b.mint",
+            (event_type, granularity, since - since % width),
+        ).fetchall()
+        return {
+            mint: {"amount": from_base_units(amount, decimals), "usd": usd, "count": count}
+            for mint, amount, usd, count, decimals in rows
+        }
+
+    def close(self):
+        self._conn.close()
@@ -1,20 +1,44 @@
 import asyncio
 import os
+import signal
 import sys
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
+from dataclasses import dataclass, field
 
 sys.path.append(str(Path(__file__).parent))
 
 from tg_solana_bot.config import load_settings
 from tg_solana_bot.solana_client import SolanaClient
-from tg_solana_bot.tx_parser import TransactionParser
+from tg_solana_bot.tx_parser import TransactionParser, classify_batch
 from tg_solana_bot.notifier import TelegramNotifier
 from tg_solana_bot.state import StateStore
 from dotenv import load_dotenv
 from tg_solana_bot.price_client import PriceClient
 from tg_solana_bot.manual_price_store import ManualPriceStore
+from tg_solana_bot.transport import HttpTransport
+from tg_solana_bot.reconciler import FinalityReconciler
+from tg_solana_bot.message_index import MessageIndex
+from tg_solana_bot.outbox import Outbox, OutboxWorker
+from tg_solana_bot.pending_store import PendingStore
+from tg_solana_bot.sinks import EventSink, JsonlFileSink, SinkEvent, SinkFanout, TelegramSink, WebhookSink
+from tg_solana_bot.watcher import FileWatcher
+from tg_solana_bot.sharding import ShardCoordinator
+from tg_solana_bot.snapshot import WarmStartSnapshot
+from tg_solana_bot.state import RecentSignatures
+from tg_solana_bot.status import RuntimeStatus
+from tg_solana_bot.ledger import EventLedger, to_base_units
+from tg_solana_bot.commands import CommandBot
+from tg_solana_bot.memory import MemoryBudget
+from tg_solana_bot.offload import Offloader, install_uvloop
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.block_scanner import BlockMatch, BlockScanner
+from tg_solana_bot.burn_watcher import BurnWatcher
+from tg_solana_bot.fee_burst import FeeBursts
+from tg_solana_bot.governor import RequestGovernor, parse_method_credits
+from tg_solana_bot.pool_pricer import PoolPricer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,7 +46,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-price_client: PriceClient
+
+@dataclass
+class Runtime:
+    """Long-lived components shared by the polling pipeline."""
+    client: SolanaClient
+    notifier: TelegramNotifier
+    state: StateStore
+    price_client: PriceClient
+    settings: Any
+    outbox: Outbox
+    outbox_worker: OutboxWorker
+    sinks: SinkFanout
+    reconciler: Optional[FinalityReconciler] = None
+    shards: Optional[ShardCoordinator] = None
+    status: RuntimeStatus = field(default_factory=RuntimeStatus)
+    recent: RecentSignatures = field(default_factory=RecentSignatures)
+    mint_decimals: Dict[str, int] = field(default_factory=dict)
+    ledger: Optional[EventLedger] = None
+    memory: Optional[MemoryBudget] = None
+    offloader: Offloader = field(default_factory=lambda: Offloader("inline"))
+    block_scanner: Optional[BlockScanner] = None
+    fee_bursts: FeeBursts = field(default_factory=FeeBursts)
+    # signature -> failed fetch attempts so far
+    fetch_failures: Dict[str, int] = field(default_factory=dict)
+
+class TransactionUnavailable(RuntimeError):
+    """The transaction behind a signature could not be fetched."""
+
 
 def _fmt_amount(val: float, max_decimals: int = 9) -> str:
     s = f"{val:.{max_decimals}f}".rstrip("0").rstrip(".")
@@ -32,13 +83,48 @@ def _fmt_amount(val: float, max_decimals: int = 9) -> str:
         s = "0"
     return s
 
-async def process_wallet_and_token_accounts(
-    client: SolanaClient,
-    notifier: TelegramNotifier,
-    state: StateStore,
-    wallet: str,
-    settings,
-) -> None:
+def _symbol_for_mint(mint: str) -> str:
+    if mint == "So11111111111111111111111111111111111111112" or mint.upper() == "SOL":
+        return "SOL"
+    if mint == "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v":
+        return "USDC"
+    if mint == "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB":
+        return "USDT"
+    return mint
+
+def _fee_caption(amt_txt: str, symbol: str, usd: Optional[float], signer: str, swaps: int = 1) -> str:
+    caption = (
+        "BULLIEVE-SWAP FEES COLLECTED! 💰\n\n"
+        f"FEES COLLECTED: {amt_txt} {symbol}"
+    )
+    if usd is not None:
+        caption += f" (~${usd:,.2f})"
+    if swaps > 1:
+        caption += f"\nSWAPS IN THIS BURST: {swaps}"
+    caption += (
+        f"\n\nBULLIEVER: {signer}\n\n"
+        "🔥 Let's burnnnnn 🔥"
+    )
+    return caption
+
+def _burn_caption(
+    amt_txt: str, symbol: str, usd: Optional[float], total_txt: Optional[str] = None, burner: Optional[str] = None
+) -> str:
+    caption = (
+        "BULLIEVE BURN! 🔥\n\n"
+        f"AMOUNT BURNED: {amt_txt} {symbol}"
+    )
+    if usd is not None:
+        caption += f" (~${usd:,.2f})"
+    if burner:
+        caption += f"\nBURNED BY: {burner}"
+    if total_txt:
+        caption += f"\nTOTAL BURNED TO DATE: {total_txt} {symbol}"
+    caption += "\n\n🔥 Let's burnnnnn 🔥"
+    return caption
+
+async def process_wallet_and_token_accounts(rt: Runtime, wallet: str) -> None:
+    client, state, settings = rt.client, rt.state, rt.settings
     try:
         token_accounts = await client.get_token_accounts_by_owner(wallet)
     except Exception as exc:
@@ -46,15 +132,21 @@ async def process_wallet_and_token_accounts(
         token_accounts = []
 
     addresses: List[str] = [wallet] + token_accounts
+    if rt.shards is not None:
+        addresses = [a for a in addresses if rt.shards.owns(a)]
     logger.info(f"[poll] owner={wallet} addresses={len(addresses)} (wallet + token accounts)")
+    if rt.block_scanner is not None:
+        rt.block_scanner.watch(wallet, addresses)
+        if rt.block_scanner.active:
+            return
 
-    processed_sigs: set[str] = set()
+    tx_parser = _transaction_parser(settings)
 
     for addr in addresses:
         try:
             last_sig = state.load_last_signature(addr)
             logger.info(f"[poll] addr={addr} last_sig={last_sig[:50]}..." if last_sig else f"[poll] addr={addr} last_sig=None")
-            signatures = await client.get_signatures_for_address(addr, before=None, limit=25)
+            signatures, first_page = await _signatures_since(rt, addr, last_sig)
         except Exception as exc:
             logger.error(f"[error] get_signatures_for_address failed addr={addr}: {exc}")
             continue
@@ -69,143 +161,668 @@ async def process_wallet_and_token_accounts(
             continue
 
         new_sigs: List[str] = []
-        for entry in signatures:
+        backlog = set()
+        for i, entry in enumerate(signatures):
             sig = entry.get("signature")
             if sig == last_sig:
                 break
             new_sigs.append(sig)
+            if i >= first_page:
+                backlog.add(sig)
 
         if not new_sigs:
             continue
 
         logger.info(f"[poll] addr={addr} new_sigs={len(new_sigs)}")
-
-        tx_parser = TransactionParser(
-            settings.primary_wallet_address,
-            settings.secondary_wallet_address,
-            settings.bullieve_mint_address,
-            settings.burn_incinerator_address,
+        to_fetch = [s for s in new_sigs if s not in rt.recent]
+        if rt.block_scanner is not None:
+            rt.block_scanner.observe(len(to_fetch))
+        # Catch-up beyond the first page must not eat into the live reserve.
+        live, catch_up = await asyncio.gather(
+            prefetch_signatures(rt, tx_parser, [s for s in to_fetch if s not in backlog]),
+            prefetch_signatures(rt, tx_parser, [s for s in to_fetch if s in backlog], priority="backfill"),
         )
+        prefetched = {**catch_up, **live}
 
         for sig in reversed(new_sigs):
-            if sig in processed_sigs:
-                continue
-            processed_sigs.add(sig)
+            if sig not in rt.recent:
+                try:
+                    # Another instance may already have handled it through a different address.
+                    handled = await _claim_and_process(
+                        rt, sig, lambda: process_signature(
+                            rt, tx_parser, wallet, addr, sig, prefetched.get(sig),
+                            priority="backfill" if sig in backlog else "live",
+                        )
+                    )
+                    rt.fetch_failures.pop(sig, None)
+                except TransactionUnavailable as exc:
+                    # Retried a few cycles; past that the address moves on without it.
+                    if not _dead_letter_after_retries(rt, addr, sig, exc):
+                        break
+                    handled = True
+                except Exception as exc:
+                    # Nothing was queued for this signature: keep the checkpoint
+                    # before it so the next cycle retries from here.
+                    logger.error(f"[error] processing failed signature={sig}: {exc}")
+                    break
+                if handled is None:
+                    logger.info(f"[shard] signature={sig} is being processed by another instance, retrying next cycle")
+                    break
+                rt.recent.add(sig)
+            # Oldest first, so the checkpoint never skips an unprocessed signature.
+            state.save_last_signature(addr, sig)
+
+
+def _dead_letter_after_retries(rt: Runtime, addr: str, sig: str, exc: Exception) -> bool:
+    """Count a failed fetch; True once ``sig`` has used its attempts and was dead-lettered."""
+    attempts = rt.fetch_failures.get(sig, 0) + 1
+    max_attempts = rt.settings.signature_max_attempts
+    if attempts < max_attempts:
+        rt.fetch_failures[sig] = attempts
+        logger.error(f"[error] processing failed signature={sig} attempt {attempts}/{max_attempts}: {exc}")
+        return False
+    rt.fetch_failures.pop(sig, None)
+    logger.error(f"[dead-letter] skipping signature={sig} addr={addr} after {attempts} attempts: {exc}")
+    rt.state.record_dead_letter(sig, addr, str(exc))
+    return True
+
+
+async def _signatures_since(
+    rt: Runtime, addr: str, last_sig: Optional[str], limit: int = 25
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Signatures newer than ``last_sig``, newest first, and how many came from the first page.
+
+    Pages back until ``last_sig`` (up to ``signature_backfill_max_pages``),
+    so a gap left by downtime or by block mode handing back is backfilled.
+    The extra pages are catch-up and are requested at ``backfill`` priority.
+    """
+    entries: List[Dict[str, Any]] = []
+    first_page = None
+    before = None
+    for _ in range(max(1, rt.settings.signature_backfill_max_pages)):
+        page = await rt.client.get_signatures_for_address(
+            addr, before=before, limit=limit, until=last_sig, priority="polling" if first_page is None else "backfill"
+        )
+        entries.extend(page)
+        if first_page is None:
+            first_page = len(page)
+        if last_sig is None or len(page) < limit:
+            return entries, first_page
+        before = page[-1]["signature"]
+        limit = 100
+    logger.warning(f"[poll] addr={addr} more than {len(entries)} new signatures, older ones are skipped")
+    return entries, first_page or 0
+
+
+Classified = Tuple[ParsedTransaction, str, Dict[str, Any]]
+
+
+def _transaction_parser(settings) -> TransactionParser:
+    return TransactionParser(
+        settings.primary_wallet_address,
+        settings.secondary_wallet_address,
+        settings.bullieve_mint_address,
+        settings.burn_incinerator_address,
+    )
+
+
+async def process_block_matches(rt: Runtime, tx_parser: TransactionParser, matches: List[BlockMatch]) -> None:
+    """Classify and process the watched transactions of one block, in block order.
+
+    Raises if a transaction could not be processed, so the scanner keeps its
+    checkpoint before this block.
+    """
+    matches = [(tx, addresses) for tx, addresses in matches if tx.signature not in rt.recent]
+    if not matches:
+        return
+    results = await rt.offloader.run(classify_batch, tx_parser, [tx for tx, _ in matches])
+    for (tx, addresses), (event_type, details) in zip(matches, results):
+        sig, addr = tx.signature, addresses[0]
+        wallet = rt.block_scanner.watched.get(addr, addr) if rt.block_scanner is not None else addr
+        classified = (tx, event_type, details)
+        handled = await _claim_and_process(
+            rt, sig, lambda: process_signature(rt, tx_parser, wallet, addr, sig, classified)
+        )
+        if handled is None:
+            raise RuntimeError(f"signature {sig} is being processed by another instance")
+        rt.recent.add(sig)
+
+
+async def _claim_and_process(rt: Runtime, sig: str, work: Callable[[], Awaitable[None]]) -> Optional[bool]:
+    """Run ``work`` unless another instance claimed ``sig``; see ``ShardCoordinator.claim``."""
+    if rt.shards is None:
+        await work()
+        return True
+    return await rt.shards.run_once(sig, work)
+
+
+async def prefetch_signatures(
+    rt: Runtime, tx_parser: TransactionParser, sigs: List[str], priority: str = "live"
+) -> Dict[str, Classified]:
+    """Fetch a batch of transactions concurrently and classify them in one offloaded call.
+
+    Signatures that could not be fetched are left out; ``process_signature``
+    fetches those again on its own.
+    """
+    if not sigs:
+        return {}
+    limit = asyncio.Semaphore(max(1, rt.settings.tx_prefetch_concurrency))
+
+    async def fetch(sig: str) -> Optional[ParsedTransaction]:
+        async with limit:
             try:
-                tx = await client.get_transaction(sig)
+                return await rt.client.get_parsed_transaction(sig, priority=priority)
             except Exception as exc:
                 logger.error(f"[error] get_transaction failed signature={sig}: {exc}")
-                continue
-            if not tx:
-                continue
-
-            event_type, details = tx_parser.parse_transaction_raw(
-                tx,
-                primary_wallet=settings.primary_wallet_address,
-                secondary_wallet=settings.secondary_wallet_address,
-                bullieve_mint=settings.bullieve_mint_address,
-                incinerator=settings.burn_incinerator_address,
-            )
-            logger.info(f"[event] owner={wallet} via={addr} sig={sig} type={event_type} details={details}")
-
-            if event_type == "fee_income":
-                mint = details.get("mint", "")
-                amount = float(details.get("amount", 0))
-                signer = client.get_first_signer_address(tx) or "unknown"
-                if mint == "So11111111111111111111111111111111111111112" or mint.upper() == "SOL":
-                    symbol = "SOL"
-                elif mint == "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v":
-                    symbol = "USDC"
-                elif mint == "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB":
-                    symbol = "USDT"
-                else:
-                    symbol = mint
-
-                usd = None
-                if amount and mint:
-                    usd_price = await price_client.get_usd_price(mint)
-                    if usd_price:
-                        usd = amount * usd_price
-                amt_txt = _fmt_amount(amount, 9)
-                
-                caption = (
-                    "BULLIEVE-SWAP FEES COLLECTED! 💰\n\n"
-                    f"FEES COLLECTED: {amt_txt} {symbol}"
-                )
-                if usd is not None:
-                    caption += f" (~${usd:,.2f})"
-                caption += (
-                    f"\n\nBULLIEVER: {signer}\n\n"
-                    "🔥 Let's burnnnnn 🔥"
-                )
+                return None
 
-                try:
-                    await notifier.send_media(settings.notify_fee_media_url, caption=caption, media_type="photo")
-                except Exception as exc:
-                    logger.error(f"[error] telegram send fee_income failed: {exc}")
-            elif event_type == "burn":
-                amount = float(details.get("amount", 0))
-                symbol = "BULLIEVE"
-                usd = None
-                try:
-                    usd_price = await price_client.get_usd_price(symbol) or await price_client.get_usd_price(
-                        settings.bullieve_mint_address
-                    )
-                    if usd_price:
-                        usd = amount * usd_price
-                except Exception as exc:
-                    logger.warning(f"Could not get USD price for burn: {exc}")
-                    usd = None
-                amt_txt = _fmt_amount(amount, 9)
-                
-                caption = (
-                    "BULLIEVE BURN! 🔥\n\n"
-                    f"AMOUNT BURNED: {amt_txt} {symbol}"
-                )
-                if usd is not None:
-                    caption += f" (~${usd:,.2f})"
-                caption += "\n\n🔥 Let's burnnnnn 🔥"
+    txs = [tx for tx in await asyncio.gather(*(fetch(s) for s in sigs)) if tx]
+    if not txs:
+        return {}
+    results = await rt.offloader.run(classify_batch, tx_parser, txs)
+    return {tx.signature: (tx, event_type, details) for tx, (event_type, details) in zip(txs, results)}
+
+
+async def process_signature(
+    rt: Runtime,
+    tx_parser: TransactionParser,
+    wallet: str,
+    addr: str,
+    sig: str,
+    classified: Optional[Classified] = None,
+    priority: str = "live",
+) -> None:
+    """Fetch, classify and queue notifications for one signature.
+
+    Raises when the transaction cannot be fetched, so the caller keeps its
+    checkpoint before this signature and retries it next cycle.
+    """
+    client, settings = rt.client, rt.settings
+    if classified is None:
+        try:
+            tx = await client.get_parsed_transaction(sig, priority=priority)
+        except Exception as exc:
+            raise TransactionUnavailable(f"get_transaction failed: {exc}") from exc
+        if not tx:
+            raise TransactionUnavailable("get_transaction returned no transaction")
+        event_type, details = (await rt.offloader.run(classify_batch, tx_parser, [tx]))[0]
+    else:
+        tx, event_type, details = classified
+
+    caption = None
+    logger.info(f"[event] owner={wallet} via={addr} sig={sig} type={event_type} details={details}")
+    rt.status.record_event(event_type)
+    if details.get("mint") and details["mint"] not in rt.mint_decimals:
+        rt.mint_decimals[details["mint"]] = tx.decimals_for(details["mint"])
+    if event_type in ("fee_income", "burn"):
+        _record_in_ledger(rt, tx, event_type, details)
+
+    if event_type == "fee_income":
+        mint = details.get("mint", "")
+        amount = float(details.get("amount", 0))
+        signer = client.get_first_signer_address(tx) or "unknown"
+        symbol = _symbol_for_mint(mint)
+        burst = rt.fee_bursts.add(mint, sig, amount, signer, tx.block_time or time.time())
+
+        if burst.key == sig and not burst.alerted:
+            # Alert right away; the USD value is filled in by editing the caption.
+            caption = _fee_caption(_fmt_amount(burst.amount, 9), symbol, None, burst.signer, burst.count)
+            await _queue_alert(rt, tx, event_type, details, settings.notify_fee_media_url, caption)
+            burst.alerted = True
+        else:
+            # Part of a running burst: its alert is edited with the new total below.
+            await rt.sinks.emit(_sink_event("event", tx, event_type, details))
+
+        usd_price = None
+        if amount and mint:
+            usd_price = await rt.price_client.get_usd_price(mint)
+        if usd_price:
+            _set_ledger_usd(rt, sig, "fee_income", mint, amount * usd_price)
+        if usd_price or burst.count > 1:
+            # Built after the price lookup so it carries every fee added meanwhile.
+            usd = burst.amount * usd_price if usd_price else None
+            burst_caption = _fee_caption(_fmt_amount(burst.amount, 9), symbol, usd, burst.signer, burst.count)
+            await _queue_caption_update(rt, burst.key, burst_caption, usd)
+            if burst.key == sig:
+                caption = burst_caption
+            elif rt.reconciler is not None:
+                rt.reconciler.update_caption(burst.key, burst_caption)
+    elif event_type == "burn":
+        caption = await _alert_burn(rt, tx, details)
+    elif event_type == "transfer_to_secondary":
+        await rt.sinks.emit(_sink_event("event", tx, event_type, details))
+
+    if rt.reconciler is not None:
+        rt.reconciler.track(addr, sig, caption)
+
+
+async def process_mint_burn(rt: Runtime, stream: str, tx: ParsedTransaction, details: Dict[str, Any]) -> None:
+    """Handle a burn found by the mint-wide BurnWatcher."""
+    sig = tx.signature
+    logger.info(f"[event] burn-watch via={stream} sig={sig} details={details}")
+    rt.status.record_event("burn")
+    mint = details.get("mint", "")
+    if mint and mint not in rt.mint_decimals:
+        rt.mint_decimals[mint] = tx.decimals_for(mint)
+    _record_in_ledger(rt, tx, "burn", details)
+    caption = await _alert_burn(rt, tx, details)
+    if rt.reconciler is not None:
+        rt.reconciler.track(stream, sig, caption)
 
-                try:
-                    await notifier.send_media(settings.notify_burn_media_url, caption=caption, media_type="photo")
-                except Exception as exc:
-                    logger.error(f"[error] telegram send burn failed: {exc}")
-            elif event_type == "transfer_to_secondary":
-                pass
 
-            state.save_last_signature(addr, new_sigs[0])
+async def _alert_burn(rt: Runtime, tx: ParsedTransaction, details: Dict[str, Any]) -> str:
+    """Queue a burn alert, then edit in the USD value; returns the latest caption."""
+    settings = rt.settings
+    sig = tx.signature
+    amount = float(details.get("amount", 0))
+    symbol = "BULLIEVE"
+    amt_txt = _fmt_amount(amount, 9)
+    burner = details.get("burner")
+
+    total_txt = _ledger_total_txt(rt, "burn", details.get("mint", ""))
+    caption = _burn_caption(amt_txt, symbol, None, total_txt, burner)
+    await _queue_alert(rt, tx, "burn", details, settings.notify_burn_media_url, caption)
+
+    usd = None
+    try:
+        usd_price = await rt.price_client.get_usd_price(symbol) or await rt.price_client.get_usd_price(
+            settings.bullieve_mint_address
+        )
+        if usd_price:
+            usd = amount * usd_price
+    except Exception as exc:
+        logger.warning(f"Could not get USD price for burn: {exc}")
+        usd = None
+    if usd is not None:
+        caption = _burn_caption(amt_txt, symbol, usd, total_txt, burner)
+        await _queue_caption_update(rt, sig, caption, usd)
+        _set_ledger_usd(rt, sig, "burn", details.get("mint", ""), usd)
+    return caption
+
+
+def _record_in_ledger(rt: Runtime, tx, event_type: str, details: Dict[str, Any]) -> None:
+    if rt.ledger is None:
+        return
+    mint = details.get("mint", "")
+    decimals = rt.mint_decimals.get(mint, 0)
+    # The classifiers give exact integer amounts; the UI string is only a fallback.
+    amount_base = details.get("amount_base")
+    if amount_base is None:
+        amount_base = to_base_units(details.get("amount", "0"), decimals)
+    try:
+        rt.ledger.record_event(
+            tx.signature,
+            event_type,
+            mint,
+            amount_base,
+            decimals,
+            tx.block_time,
+            tx.slot,
+        )
+    except Exception as exc:
+        logger.error(f"[ledger] could not record {event_type} {tx.signature}: {exc}")
+
+
+def _set_ledger_usd(rt: Runtime, sig: str, event_type: str, mint: str, usd: float) -> None:
+    if rt.ledger is None:
+        return
+    try:
+        rt.ledger.set_usd(sig, event_type, mint, usd)
+    except Exception as exc:
+        logger.error(f"[ledger] could not set USD for {sig}: {exc}")
+
+
+def _ledger_total_txt(rt: Runtime, event_type: str, mint: str) -> Optional[str]:
+    if rt.ledger is None:
+        return None
+    total = rt.ledger.total(event_type, mint)
+    if total is None:
+        return None
+    return _fmt_amount(total.amount, total.decimals or 9)
+
+
+def _sink_event(kind: str, tx: ParsedTransaction, event_type: str, details: Dict[str, Any], **fields: Any) -> SinkEvent:
+    return SinkEvent(
+        kind, tx.signature, event_type, details=details, slot=tx.slot, block_time=tx.block_time, **fields
+    )
+
+
+async def _queue_alert(
+    rt: Runtime, tx: ParsedTransaction, event_type: str, details: Dict[str, Any], media_url: str, caption: str
+) -> None:
+    """Hand an alert to every sink; Telegram's copy is in the durable outbox when this returns."""
+    await rt.sinks.emit(_sink_event("alert", tx, event_type, details, caption=caption, media_url=media_url))
+
+
+async def _queue_caption_update(rt: Runtime, event_key: str, caption: str, usd: Optional[float] = None) -> None:
+    try:
+        await rt.sinks.emit(SinkEvent("update", event_key, caption=caption, usd=usd))
+    except Exception as exc:
+        logger.error(f"[error] could not queue caption update for {event_key}: {exc}")
+
+
+def _reload_settings(rt: Runtime) -> None:
+    """Re-read the config file and apply the settings that can change live."""
+    load_dotenv(rt.settings.config_file_path, override=True)
+    changed = rt.settings.apply_hot_reload(load_settings())
+    if not changed:
+        return
+    if "telegram_chat_ids" in changed or "telegram_chat_id" in changed:
+        rt.notifier.chat_id = rt.settings.telegram_chat_id
+        rt.notifier.chat_ids = list(rt.settings.telegram_chat_ids)
+    logger.info(f"[config] hot-reloaded {', '.join(changed)}")
+
+
+async def run_cycle(rt: Runtime) -> None:
+    """Poll every watched wallet once."""
+    status = rt.status
+    status.last_cycle_started = time.monotonic()
+    for wallet in (rt.settings.primary_wallet_address, rt.settings.secondary_wallet_address):
+        await process_wallet_and_token_accounts(rt, wallet)
+        status.last_poll_by_wallet[wallet] = time.time()
+        if status.first_poll_at is None:
+            status.first_poll_at = time.monotonic()
+            logger.info(f"[metric] time_to_first_poll_ms={status.time_to_first_poll * 1000:.0f}")
+    if rt.block_scanner is not None:
+        try:
+            await rt.block_scanner.decide()
+        except Exception as exc:
+            logger.error(f"[blockscan] ingest mode decision failed: {exc}")
+    status.cycles += 1
+    status.last_cycle_seconds = time.monotonic() - status.last_cycle_started
+    if rt.memory is not None:
+        rt.memory.enforce()
+        logger.info(f"[metric] memory {rt.memory.report()}")
+        for location, size, growth in rt.memory.top_allocators(limit=3):
+            logger.info(f"[metric] alloc {location} size={size} growth={growth:+d}")
+
+
+def _snapshot_sections(rt: Runtime) -> Dict[str, Any]:
+    return {
+        "token_accounts": rt.client.export_token_accounts(),
+        "prices": rt.price_client.export_cache(),
+        "mint_decimals": dict(rt.mint_decimals),
+        "recent_signatures": rt.recent.export(),
+    }
+
+
+def _restore_snapshot(rt: Runtime, sections: Dict[str, Any]) -> None:
+    if not sections:
+        return
+    rt.client.import_token_accounts(sections.get("token_accounts", {}))
+    rt.price_client.import_cache(sections.get("prices", {}))
+    rt.mint_decimals.update(sections.get("mint_decimals", {}))
+    rt.recent.load(sections.get("recent_signatures", []))
+    logger.info(
+        f"[start] warm start: {len(sections.get('token_accounts', {}))} owners, "
+        f"{len(sections.get('prices', {}))} prices, {len(rt.recent)} recent signatures"
+    )
+
+
+def _install_signal_handlers(stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows / non-main thread: fall back to KeyboardInterrupt
+            pass
+
+
+async def _shutdown(rt: Runtime, snapshot: WarmStartSnapshot, deadline: float) -> None:
+    """Drain queued alerts, flush checkpoints and persist the snapshot within ``deadline``."""
+    started = time.monotonic()
+    try:
+        await rt.outbox_worker.drain(max(deadline - 1.0, 0.5))
+    except Exception as exc:
+        logger.error(f"[stop] outbox drain failed: {exc}")
+    if rt.reconciler is not None:
+        try:
+            await asyncio.wait_for(rt.reconciler.reconcile_once(), timeout=max(deadline - (time.monotonic() - started), 0.5))
+        except Exception as exc:
+            logger.warning(f"[stop] final finality check skipped: {exc}")
+    await rt.sinks.close(max(deadline - (time.monotonic() - started), 0.5))
+    await asyncio.to_thread(snapshot.save, _snapshot_sections(rt))
+    logger.info(f"[stop] shutdown finished in {time.monotonic() - started:.2f}s")
 
 
 async def main() -> None:
-    if os.path.exists(".env"):
-        load_dotenv(".env")
+    status = RuntimeStatus()
+    config_file = os.getenv("CONFIG_FILE_PATH", ".env")
+    if os.path.exists(config_file):
+        load_dotenv(config_file)
     settings = load_settings()
     logger.info(
         f"[start] polling every {settings.poll_interval_seconds}s on primary={settings.primary_wallet_address} secondary={settings.secondary_wallet_address}"
     )
-    client = SolanaClient(settings.solana_rpc_url, settings.solana_alt_rpc_url)
-    global price_client
-    manual_store = ManualPriceStore(settings.manual_price_file_path)
-    price_client = PriceClient(manual_store)
-    notifier = TelegramNotifier(settings.telegram_bot_token, settings.telegram_chat_id, settings.telegram_chat_ids)
+    stop = asyncio.Event()
+    _install_signal_handlers(stop)
+
+    snapshot = WarmStartSnapshot(settings.snapshot_file_path)
+    # File-backed stores are independent: open them in parallel off the loop.
+    sections, manual_store, outbox, ledger = await asyncio.gather(
+        asyncio.to_thread(snapshot.load),
+        asyncio.to_thread(ManualPriceStore, settings.manual_price_file_path),
+        asyncio.to_thread(Outbox, settings.outbox_file_path, settings.instance_id),
+        asyncio.to_thread(EventLedger, settings.ledger_file_path),
+    )
+    # Shares the outbox database, so it is opened once the outbox has created it.
+    message_index = await asyncio.to_thread(
+        MessageIndex, settings.outbox_file_path, settings.message_index_file_path
+    )
+    pending_store = None
+    if settings.finality_reconcile:
+        # The default instance id changes with the pid, so a single instance
+        # keeps its rows under a fixed owner to find them again after a restart.
+        owner = settings.instance_id if settings.sharding_enabled else "local"
+        pending_store = await asyncio.to_thread(PendingStore, settings.outbox_file_path, owner)
+
+    transport = HttpTransport.from_settings(settings)
+    offloader = Offloader(settings.offload_mode, settings.offload_workers)
+    logger.info(
+        f"[start] event loop {type(asyncio.get_running_loop()).__module__}, "
+        f"offload={offloader.mode} workers={offloader.workers}"
+    )
+    governor = None
+    if settings.rpc_requests_per_second > 0:
+        governor = RequestGovernor(
+            settings.rpc_requests_per_second,
+            burst=settings.rpc_burst,
+            method_credits=parse_method_credits(settings.rpc_method_credits),
+            live_reserve=settings.rpc_live_reserve,
+        )
+    client = SolanaClient(
+        settings.solana_rpc_url,
+        settings.solana_alt_rpc_url,
+        transport=transport,
+        fast_decode=settings.tx_fast_decode,
+        rpc_trim=settings.tx_rpc_trim,
+        commitment=settings.solana_commitment,
+        token_accounts_ttl_seconds=settings.token_accounts_ttl_seconds,
+        offloader=offloader,
+        governor=governor,
+    )
+    pool_pricer = PoolPricer(client, settings.pool_price_file_path, ttl_seconds=settings.pool_price_ttl_seconds)
+    price_client = PriceClient(
+        manual_store,
+        transport=transport,
+        cache_ttl_seconds=settings.price_cache_ttl_seconds,
+        pool_pricer=pool_pricer,
+    )
+    notifier = TelegramNotifier(
+        settings.telegram_bot_token,
+        settings.telegram_chat_id,
+        settings.telegram_chat_ids,
+        transport=transport,
+        message_index=message_index,
+        api_url=settings.telegram_api_url,
+    )
     state = StateStore(settings.state_file_path)
+    outbox_worker = OutboxWorker(outbox, notifier, max_pending=settings.outbox_max_pending)
+    sinks: List[EventSink] = [TelegramSink(outbox, outbox_worker, notifier)]
+    if settings.event_log_enabled:
+        sinks.append(
+            JsonlFileSink(
+                settings.event_log_file_path,
+                max_bytes=settings.event_log_max_mb * 1024 * 1024,
+                backups=settings.event_log_backups,
+            )
+        )
+    if settings.webhook_url:
+        sinks.append(
+            WebhookSink(
+                settings.webhook_url,
+                transport,
+                token=settings.webhook_token,
+                batch_size=settings.webhook_batch_size,
+            )
+        )
+    fanout = SinkFanout(sinks, queue_size=settings.sink_queue_size)
+    fanout.start()
+    rt = Runtime(
+        client,
+        notifier,
+        state,
+        price_client,
+        settings,
+        outbox,
+        outbox_worker,
+        fanout,
+        status=status,
+        ledger=ledger,
+        offloader=offloader,
+        fee_bursts=FeeBursts(settings.fee_burst_window_seconds),
+    )
+    _restore_snapshot(rt, sections)
+
+    tasks = [
+        asyncio.create_task(outbox_worker.run()),
+        asyncio.create_task(
+            FileWatcher(settings.manual_price_file_path, manual_store.refresh, settings.watch_interval_seconds).run()
+        ),
+        asyncio.create_task(
+            FileWatcher(settings.pool_price_file_path, pool_pricer.refresh, settings.watch_interval_seconds).run()
+        ),
+        asyncio.create_task(
+            FileWatcher(settings.config_file_path, lambda: _reload_settings(rt), settings.watch_interval_seconds).run()
+        ),
+    ]
+    if settings.finality_reconcile:
+        rt.reconciler = FinalityReconciler(
+            client,
+            state,
+            notifier,
+            interval_seconds=settings.finality_reconcile_interval_seconds,
+            drop_after_seconds=settings.finality_drop_after_seconds,
+            outbox=outbox,
+            sinks=fanout,
+            store=pending_store,
+        )
+        rt.reconciler.load()
+        tasks.append(asyncio.create_task(rt.reconciler.run()))
+    if settings.sharding_enabled:
+        rt.shards = ShardCoordinator(settings.shard_db_path, settings.instance_id, settings.shard_lease_ttl_seconds)
+        rt.shards.refresh()
+        tasks.append(asyncio.create_task(rt.shards.run()))
+    if settings.burn_watch_enabled and not settings.bullieve_mint_address:
+        logger.info("[burnwatch] BULLIEVE_MINT_ADDRESS is not set, burn watcher disabled")
+    elif settings.burn_watch_enabled:
+        burn_watcher = BurnWatcher(
+            client,
+            state,
+            _transaction_parser(settings),
+            lambda stream, tx, details: process_mint_burn(rt, stream, tx, details),
+            settings.bullieve_mint_address,
+            settings.burn_incinerator_address,
+            recent=rt.recent,
+            shards=rt.shards,
+            offloader=offloader,
+            interval_seconds=settings.burn_watch_interval_seconds,
+            max_pages=settings.burn_watch_max_pages,
+            fetch_concurrency=settings.tx_prefetch_concurrency,
+        )
+        tasks.append(asyncio.create_task(burn_watcher.run()))
+    rt.memory = MemoryBudget(
+        int(settings.memory_ceiling_mb * 1024 * 1024),
+        cache_fraction=settings.memory_cache_fraction,
+        trace_frames=settings.memory_trace_frames,
+    )
+    rt.memory.register("token_accounts", client)
+    rt.memory.register("prices", price_client)
+    rt.memory.register("recent_signatures", rt.recent)
+    rt.memory.register("sink_queues", fanout)
+    if rt.reconciler is not None:
+        rt.memory.register("finality_pending", rt.reconciler)
+    if settings.ingest_mode != "signatures":
+        block_parser = _transaction_parser(settings)
+        rt.block_scanner = BlockScanner(
+            client,
+            state,
+            lambda matches: process_block_matches(rt, block_parser, matches),
+            mode=settings.ingest_mode,
+            poll_interval_seconds=settings.poll_interval_seconds,
+            interval_seconds=settings.block_scan_interval_seconds,
+            max_slots=settings.block_scan_max_slots,
+            fetch_concurrency=settings.block_fetch_concurrency,
+            window_seconds=settings.ingest_mode_window_seconds,
+            memory=rt.memory,
+        )
+        tasks.append(asyncio.create_task(rt.block_scanner.run()))
+    if settings.telegram_commands_enabled and settings.telegram_bot_token:
+        commands = CommandBot(
+            rt,
+            settings.telegram_bot_token,
+            transport,
+            api_url=settings.telegram_api_url,
+            admin_user_ids=settings.telegram_admin_user_ids,
+            rate_per_minute=settings.command_rate_per_minute,
+        )
+        tasks.append(asyncio.create_task(commands.run()))
+
+    last_snapshot = time.monotonic()
     try:
-        while True:
+        while not stop.is_set():
+            cycle = asyncio.create_task(run_cycle(rt))
+            stopper = asyncio.create_task(stop.wait())
+            await asyncio.wait({cycle, stopper}, return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            if not cycle.done():
+                # Stop requested mid-cycle: let it finish within the drain deadline.
+                logger.info("[stop] signal received, finishing current cycle")
+                try:
+                    await asyncio.wait_for(cycle, timeout=settings.shutdown_deadline_seconds / 2)
+                except asyncio.TimeoutError:
+                    logger.warning("[stop] cycle cut short; checkpoints hold the last processed signature")
+                break
+            if cycle.exception() is not None:
+                logger.error(f"[error] poll cycle failed: {cycle.exception()}")
+            if time.monotonic() - last_snapshot > settings.snapshot_interval_seconds:
+                last_snapshot = time.monotonic()
+                await asyncio.to_thread(snapshot.save, _snapshot_sections(rt))
             try:
-                manual_store.refresh()
-            except Exception as exc:
-                logger.error(f"Failed to refresh manual prices: {exc}")
+                await asyncio.wait_for(stop.wait(), timeout=settings.poll_interval_seconds)
+            except asyncio.TimeoutError:
                 pass
-            await process_wallet_and_token_accounts(client, notifier, state, settings.primary_wallet_address, settings)
-            await process_wallet_and_token_accounts(client, notifier, state, settings.secondary_wallet_address, settings)
-            await asyncio.sleep(settings.poll_interval_seconds)
+        await _shutdown(rt, snapshot, settings.shutdown_deadline_seconds / 2)
     finally:
+        for task in tasks:
+            task.cancel()
+        if rt.shards is not None:
+            rt.shards.leave()
+        outbox.close()
+        message_index.close()
+        if pending_store is not None:
+            pending_store.close()
+        ledger.close()
         await notifier.close()
         await client.close()
         await price_client.close()
+        await transport.close()
+        offloader.close()
 
 
 if __name__ == "__main__":
+    load_dotenv(os.getenv("CONFIG_FILE_PATH", ".env"))
+    if load_settings().use_uvloop:
+        install_uvloop()
     asyncio.run(main())
-
-
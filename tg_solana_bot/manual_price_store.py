@@ -1,7 +1,9 @@
 import json
 import logging
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+from tg_solana_bot.watcher import file_stamp
 
 logger = logging.getLogger(__name__)
 
@@ -9,8 +11,11 @@ class ManualPriceStore:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.prices: Dict[str, float] = {}
+        # (exact, lowercased) lookup tables, swapped together on reload
+        self._tables: Tuple[Dict[str, float], Dict[str, float]] = ({}, {})
+        self._stamp = None
         self._ensure_directory()
-        self.refresh()
+        self.refresh(force=True)
 
     def _ensure_directory(self):
         """Ensure the directory for the price file exists."""
@@ -18,41 +23,47 @@ class ManualPriceStore:
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
 
-    def refresh(self):
-        """Load prices from the JSON file."""
+    def refresh(self, force: bool = False) -> bool:
+        """Reload prices if the file changed (inode, mtime or size); returns True on reload."""
+        stamp = file_stamp(self.file_path)
+        if not force and stamp == self._stamp:
+            return False
         try:
-            if os.path.exists(self.file_path):
+            if stamp is not None:
                 with open(self.file_path, 'r') as f:
                     data = json.load(f)
-                    self.prices = data
+                self._swap(data)
                 logger.info(f"Loaded {len(self.prices)} manual prices from {self.file_path}")
             else:
                 logger.info(f"Manual price file not found: {self.file_path}")
-                self.prices = {}
+                self._swap({})
         except Exception as e:
+            # Keep serving the previous prices; a half-written file is retried next check.
             logger.error(f"Error loading manual prices: {e}")
-            self.prices = {}
+            return False
+        self._stamp = stamp
+        return True
+
+    def _swap(self, data: Dict[str, float]):
+        prices = {str(k): float(v) for k, v in data.items()}
+        lowered = {k.lower(): v for k, v in prices.items()}
+        self.prices = prices
+        self._tables = (prices, lowered)
 
     def get_price(self, mint_or_symbol: str) -> Optional[float]:
-        """Get price for a mint address or symbol."""
-        # Direct match
-        if mint_or_symbol in self.prices:
-            return self.prices[mint_or_symbol]
-        
-        # Try uppercase symbol
-        if mint_or_symbol.upper() in self.prices:
-            return self.prices[mint_or_symbol.upper()]
-        
-        # Try lowercase symbol
-        if mint_or_symbol.lower() in self.prices:
-            return self.prices[mint_or_symbol.lower()]
-        
-        return None
+        """Get price for a mint address or symbol (symbols match case-insensitively)."""
+        exact, lowered = self._tables
+        price = exact.get(mint_or_symbol)
+        if price is None:
+            price = lowered.get(mint_or_symbol.lower())
+        return price
 
     def set_price(self, mint_or_symbol: str, price: float) -> bool:
         """Set price for a mint address or symbol."""
         try:
-            self.prices[mint_or_symbol] = price
+            prices = dict(self.prices)
+            prices[mint_or_symbol] = price
+            self._swap(prices)
             self._save_prices()
             logger.info(f"Set price for {mint_or_symbol}: ${price}")
             return True
@@ -63,8 +74,12 @@ class ManualPriceStore:
     def _save_prices(self):
         """Save prices to the JSON file."""
         try:
-            with open(self.file_path, 'w') as f:
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'w') as f:
                 json.dump(self.prices, f, indent=2)
+            os.replace(tmp_path, self.file_path)
+            # Our own write is not a change worth reloading.
+            self._stamp = file_stamp(self.file_path)
         except Exception as e:
             logger.error(f"Error saving manual prices: {e}")
 
@@ -75,7 +90,7 @@ class ManualPriceStore:
     def clear_prices(self) -> bool:
         """Clear all manual prices."""
         try:
-            self.prices = {}
+            self._swap({})
             self._save_prices()
             logger.info("Cleared all manual prices")
             return True
@@ -0,0 +1,199 @@
+import gc
+import itertools
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def approx_size(obj: Any, depth: int = 3) -> int:
+    """``sys.getsizeof`` of ``obj`` plus its contents, ``depth`` levels down."""
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += approx_size(key, depth - 1) + approx_size(value, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approx_size(item, depth - 1)
+    elif hasattr(obj, "__slots__"):
+        for name in obj.__slots__:
+            size += approx_size(getattr(obj, name, None), depth - 1)
+    return size
+
+
+def sampled_size(mapping: Dict[Any, Any], sample: int = 16) -> int:
+    """Estimate a large dict's footprint from its first ``sample`` items.
+
+    Caches hold uniform entries, so a handful is representative and the
+    estimate stays O(sample) no matter how big the cache gets.
+    """
+    count = len(mapping)
+    if not count:
+        return sys.getsizeof(mapping)
+    taken = list(itertools.islice(mapping.items(), sample))
+    per_item = sum(approx_size(k, 2) + approx_size(v, 3) for k, v in taken) / len(taken)
+    return sys.getsizeof(mapping) + int(per_item * count)
+
+
+class MemoryBudget:
+    """Keeps the caches the bot owns under a byte budget.
+
+    Every registered cache exposes ``approx_bytes()`` and
+    ``shrink(fraction) -> int`` (entries dropped, oldest first). When the
+    tracked total exceeds ``cache_budget_bytes``, or the memory traced by
+    tracemalloc exceeds ``ceiling_bytes``, the largest cache is halved
+    until both are below ``low_water`` of their limit, so one runaway cache
+    cannot push the VM into the OOM killer. RSS is only reported: the
+    allocator rarely hands freed memory back, so it would keep triggering.
+
+    Caches that lowered their capacity while shrinking may also expose
+    ``restore() -> bool``. It is called once usage has stayed under the low
+    water mark for ``cooldown_seconds`` since the last eviction.
+    """
+
+    def __init__(
+        self,
+        ceiling_bytes: int,
+        cache_fraction: float = 0.25,
+        trace_frames: int = 0,
+        low_water: float = 0.8,
+        cooldown_seconds: float = 300.0,
+    ):
+        self.ceiling_bytes = ceiling_bytes
+        self.cache_budget_bytes = int(ceiling_bytes * cache_fraction)
+        self.low_water = low_water
+        self.cooldown_seconds = cooldown_seconds
+        self._caches: Dict[str, Any] = {}
+        self._last_eviction: Optional[float] = None
+        # baseline name -> snapshot of the previous top_allocators call
+        self._trace_snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        if trace_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(trace_frames)
+
+    def register(self, name: str, cache: Any):
+        self._caches[name] = cache
+
+    def usage(self) -> Dict[str, int]:
+        sizes = {}
+        for name, cache in self._caches.items():
+            try:
+                sizes[name] = cache.approx_bytes()
+            except Exception as exc:
+                logger.error(f"[memory] sizing {name} failed: {exc}")
+                sizes[name] = 0
+        return sizes
+
+    def traced_bytes(self) -> Optional[int]:
+        """Memory currently allocated by Python, or None when tracemalloc is off."""
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.get_traced_memory()[0]
+
+    def _over(self, sizes: Dict[str, int], scale: float) -> bool:
+        if sum(sizes.values()) > self.cache_budget_bytes * scale:
+            return True
+        traced = self.traced_bytes()
+        return traced is not None and traced > self.ceiling_bytes * scale
+
+    def enforce(self, max_rounds: int = 8) -> Dict[str, int]:
+        """Shrink caches when over budget, or restore their capacity once well under it.
+
+        Returns entries dropped per cache.
+        """
+        dropped: Dict[str, int] = {}
+        sizes = self.usage()
+        if self._over(sizes, 1.0):
+            for _ in range(max_rounds):
+                name = max(sizes, key=sizes.get, default=None)
+                if name is None or sizes[name] == 0:
+                    break
+                removed = self._caches[name].shrink(0.5)
+                if not removed:
+                    break
+                dropped[name] = dropped.get(name, 0) + removed
+                sizes = self.usage()
+                if not self._over(sizes, self.low_water):
+                    break
+        elif not self._over(sizes, self.low_water) and self._cooled_down():
+            self._restore()
+        if dropped:
+            self._last_eviction = time.monotonic()
+            gc.collect()
+            logger.warning(f"[memory] over budget, evicted {dropped} (traced={_mb(self.traced_bytes())})")
+        return dropped
+
+    def _cooled_down(self) -> bool:
+        return self._last_eviction is None or time.monotonic() - self._last_eviction >= self.cooldown_seconds
+
+    def _restore(self):
+        restored = []
+        for name, cache in self._caches.items():
+            restore = getattr(cache, "restore", None)
+            if restore is None:
+                continue
+            try:
+                if restore():
+                    restored.append(name)
+            except Exception as exc:
+                logger.error(f"[memory] restoring {name} failed: {exc}")
+        if restored:
+            logger.info(f"[memory] under budget, raised capacity of {', '.join(restored)}")
+
+    def headroom(self) -> Optional[int]:
+        """Bytes left under the ceiling, or None where RSS is unknown."""
+        rss = rss_bytes()
+        if rss is None:
+            return None
+        return max(self.ceiling_bytes - rss, 0)
+
+    def report(self) -> str:
+        sizes = self.usage()
+        parts = [f"{name}={_mb(size)}" for name, size in sorted(sizes.items(), key=lambda kv: -kv[1])]
+        return (
+            f"rss={_mb(rss_bytes())}/{_mb(self.ceiling_bytes)} traced={_mb(self.traced_bytes())} "
+            f"caches={_mb(sum(sizes.values()))}/{_mb(self.cache_budget_bytes)} " + " ".join(parts)
+        )
+
+    def top_allocators(self, limit: int = 10, baseline: str = "cycle") -> List[Tuple[str, int, int]]:
+        """(location, size, growth since the last call with the same ``baseline``) of the biggest allocation sites.
+
+        The periodic report and the ``/mem`` command keep separate
+        baselines, so asking in chat does not reset the report's growth.
+        Empty unless tracing was enabled with ``trace_frames``.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        previous = self._trace_snapshots.get(baseline)
+        if previous is not None:
+            stats = snapshot.compare_to(previous, "lineno")
+            top = [(str(s.traceback), s.size, s.size_diff) for s in stats[:limit]]
+        else:
+            top = [(str(s.traceback), s.size, 0) for s in snapshot.statistics("lineno")[:limit]]
+        self._trace_snapshots[baseline] = snapshot
+        return top
+
+
+def _mb(size: Optional[int]) -> str:
+    if size is None:
+        return "n/a"
+    return f"{size / (1024 * 1024):.1f}MB"
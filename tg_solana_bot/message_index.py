@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    event_key TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    sent_at REAL NOT NULL,
+    PRIMARY KEY (event_key, chat_id)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_sent_at ON messages (sent_at);
+"""
+
+
+class MessageIndex:
+    """Map of event key -> {chat_id: message_id} for sent alerts, kept in SQLite.
+
+    Stored next to the outbox so instances sharing a data directory can
+    edit or retract messages sent by each other. Rows older than the
+    outbox retention are purged; older alerts are never edited again.
+    """
+
+    def __init__(self, db_path: str, legacy_path: Optional[str] = None):
+        self.db_path = db_path
+        self._ensure_directory()
+        # Opened off-loop at startup, then only used from the event loop thread.
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        if legacy_path:
+            self._import_legacy(legacy_path)
+
+    def _ensure_directory(self):
+        """Ensure the directory for the index database exists."""
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def _import_legacy(self, path: str):
+        """Move the message ids of the old JSON index into the database, once."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                events = json.load(f)
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO messages (event_key, chat_id, message_id, sent_at) VALUES (?, ?, ?, ?)",
+                    [
+                        (event_key, str(chat_id), int(message_id), now)
+                        for event_key, chats in events.items()
+                        for chat_id, message_id in chats.items()
+                    ],
+                )
+            os.replace(path, f"{path}.migrated")
+            logger.info(f"Imported {len(events)} events from {path} into the message index")
+        except Exception as e:
+            logger.error(f"Error importing message index {path}: {e}")
+
+    def record(self, event_key: str, chat_id: str, message_id: int):
+        """Remember the message id sent to a chat for an event."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (event_key, chat_id, message_id, sent_at) VALUES (?, ?, ?, ?)",
+                (event_key, str(chat_id), int(message_id), time.time()),
+            )
+
+    def get(self, event_key: str) -> Dict[str, int]:
+        """Return {chat_id: message_id} for an event (empty if unknown)."""
+        rows = self._conn.execute(
+            "SELECT chat_id, message_id FROM messages WHERE event_key = ?", (event_key,)
+        ).fetchall()
+        return {chat_id: message_id for chat_id, message_id in rows}
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(DISTINCT event_key) FROM messages").fetchone()[0]
+
+    def purge(self, older_than_seconds: float) -> int:
+        with self._conn:
+            cur = self._conn.execute("DELETE FROM messages WHERE sent_at < ?", (time.time() - older_than_seconds,))
+        return cur.rowcount
+
+    def close(self):
+        self._conn.close()
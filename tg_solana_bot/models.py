@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TokenBalance:
+    """One entry of a transaction's pre/post token balance list."""
+
+    __slots__ = ("account_index", "mint", "owner", "amount", "decimals", "ui_amount")
+
+    def __init__(self, account_index: int, mint: str, owner: str, amount: int, decimals: int, ui_amount: float):
+        self.account_index = account_index
+        self.mint = mint
+        self.owner = owner
+        self.amount = amount
+        self.decimals = decimals
+        self.ui_amount = ui_amount
+
+    @classmethod
+    def from_rpc(cls, entry: Dict[str, Any]) -> "TokenBalance":
+        ui = entry.get("uiTokenAmount") or {}
+        return cls(
+            account_index=int(entry.get("accountIndex", -1)),
+            mint=entry.get("mint", ""),
+            owner=entry.get("owner", ""),
+            amount=int(ui.get("amount") or 0),
+            decimals=int(ui.get("decimals") or 0),
+            ui_amount=float(ui.get("uiAmount") or 0),
+        )
+
+    def __repr__(self) -> str:
+        return f"TokenBalance(mint={self.mint}, owner={self.owner}, amount={self.amount})"
+
+
+class ParsedTransaction:
+    """Compact view of a getTransaction result, built once at fetch time.
+
+    Only the fields the parser, caches and notifications need are kept;
+    the decoded JSON tree can be released as soon as this is built.
+    """
+
+    __slots__ = (
+        "signature",
+        "slot",
+        "block_time",
+        "signer",
+        "fee",
+        "err",
+        "pre_token_balances",
+        "post_token_balances",
+        "token_deltas",
+        "native_deltas",
+    )
+
+    def __init__(
+        self,
+        signature: str,
+        slot: int,
+        block_time: Optional[int],
+        signer: Optional[str],
+        fee: int,
+        err: Any,
+        pre_token_balances: Tuple[TokenBalance, ...],
+        post_token_balances: Tuple[TokenBalance, ...],
+        token_deltas: Dict[Tuple[str, str], int],
+        native_deltas: Dict[str, int],
+    ):
+        self.signature = signature
+        self.slot = slot
+        self.block_time = block_time
+        self.signer = signer
+        self.fee = fee
+        self.err = err
+        self.pre_token_balances = pre_token_balances
+        self.post_token_balances = post_token_balances
+        self.token_deltas = token_deltas
+        self.native_deltas = native_deltas
+
+    @classmethod
+    def from_rpc(cls, tx: Dict[str, Any], signature: Optional[str] = None) -> "ParsedTransaction":
+        """Build the model from a decoded getTransaction (or getBlock entry) dict."""
+        meta = tx.get("meta") or {}
+        message = (tx.get("transaction") or {}).get("message") or {}
+        account_keys = _account_keys(message, meta)
+
+        if signature is None:
+            signatures = (tx.get("transaction") or {}).get("signatures") or []
+            signature = signatures[0] if signatures else ""
+
+        pre = tuple(TokenBalance.from_rpc(b) for b in meta.get("preTokenBalances") or [])
+        post = tuple(TokenBalance.from_rpc(b) for b in meta.get("postTokenBalances") or [])
+
+        token_deltas: Dict[Tuple[str, str], int] = {}
+        for b in pre:
+            key = (b.owner, b.mint)
+            token_deltas[key] = token_deltas.get(key, 0) - b.amount
+        for b in post:
+            key = (b.owner, b.mint)
+            token_deltas[key] = token_deltas.get(key, 0) + b.amount
+        token_deltas = {k: v for k, v in token_deltas.items() if v}
+
+        native_deltas: Dict[str, int] = {}
+        pre_lamports = meta.get("preBalances") or []
+        post_lamports = meta.get("postBalances") or []
+        for i, (before, after) in enumerate(zip(pre_lamports, post_lamports)):
+            if after != before and i < len(account_keys):
+                native_deltas[account_keys[i]] = after - before
+
+        return cls(
+            signature=signature,
+            slot=int(tx.get("slot") or 0),
+            block_time=tx.get("blockTime"),
+            signer=account_keys[0] if account_keys else None,
+            fee=int(meta.get("fee") or 0),
+            err=meta.get("err"),
+            pre_token_balances=pre,
+            post_token_balances=post,
+            token_deltas=token_deltas,
+            native_deltas=native_deltas,
+        )
+
+    def decimals_for(self, mint: str) -> int:
+        for b in self.post_token_balances + self.pre_token_balances:
+            if b.mint == mint:
+                return b.decimals
+        return 0
+
+    def __repr__(self) -> str:
+        return f"ParsedTransaction(signature={self.signature}, slot={self.slot}, signer={self.signer})"
+
+
+def account_keys(tx: Dict[str, Any]) -> List[str]:
+    """Static and lookup-table account keys of a decoded transaction."""
+    message = (tx.get("transaction") or {}).get("message") or {}
+    return _account_keys(message, tx.get("meta") or {})
+
+
+def _account_keys(message: Dict[str, Any], meta: Dict[str, Any]) -> List[str]:
+    keys = []
+    for key in message.get("accountKeys") or []:
+        # jsonParsed encoding returns objects, json encoding plain strings
+        keys.append(key.get("pubkey", "") if isinstance(key, dict) else key)
+    loaded = meta.get("loadedAddresses") or {}
+    keys.extend(loaded.get("writable") or [])
+    keys.extend(loaded.get("readonly") or [])
+    return keys
@@ -3,15 +3,29 @@ import logging
 import os
 from typing import Optional, List
 
+from tg_solana_bot.message_index import MessageIndex
+from tg_solana_bot.transport import HttpTransport
+
 logger = logging.getLogger(__name__)
 
 class TelegramNotifier:
-    def __init__(self, bot_token: str, chat_id: str, chat_ids: Optional[List[str]] = None):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        chat_ids: Optional[List[str]] = None,
+        transport: Optional[HttpTransport] = None,
+        message_index: Optional[MessageIndex] = None,
+        api_url: str = "https://api.telegram.org",
+    ):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.chat_ids = chat_ids or [chat_id] if chat_id else []
+        self.transport = transport or HttpTransport()
+        self._owns_transport = transport is None
+        self.message_index = message_index
         self.session: Optional[aiohttp.ClientSession] = None
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{api_url.rstrip('/')}/bot{bot_token}"
 
     async def __aenter__(self):
         await self._ensure_session()
@@ -21,13 +35,13 @@ class TelegramNotifier:
         await self.close()
 
     async def _ensure_session(self):
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        if self.session is None or self.session.closed:
+            self.session = await self.transport.get_session()
 
     async def close(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self._owns_transport:
+            await self.transport.close()
+        self.session = None
 
     async def send_message(self, text: str) -> bool:
         """Send a text message to all configured chat IDs."""
@@ -42,7 +56,7 @@ class TelegramNotifier:
                     "parse_mode": "HTML"
                 }
                 
-                async with self.session.post(f"{self.base_url}/sendMessage", json=payload, timeout=30) as response:
+                async with self.session.post(f"{self.base_url}/sendMessage", json=payload) as response:
                     if response.status != 200:
                         logger.error(f"Failed to send message to {chat_id}: {response.status}")
                         success = False
@@ -55,63 +69,126 @@ class TelegramNotifier:
                 
         return success
 
-    async def send_media(self, media_url: str, caption: str = "", media_type: str = "photo") -> bool:
-        """Send media (photo, video, etc.) with caption to all configured chat IDs."""
-        await self._ensure_session()
-        
+    async def send_media(
+        self, media_url: str, caption: str = "", media_type: str = "photo", event_key: Optional[str] = None
+    ) -> bool:
+        """Send media (photo, video, etc.) with caption to all configured chat IDs.
+
+        When ``event_key`` is given, the resulting message ids are recorded so
+        the caption can later be updated with ``edit_caption``.
+        """
         success = True
         for chat_id in self.chat_ids:
-            try:
-                # Check if it's a local file
-                if os.path.exists(media_url):
-                    # Local file - use sendDocument or sendPhoto
-                    with open(media_url, 'rb') as file:
-                        files = {'document': file} if media_type == "document" else {'photo': file}
-                        data = {
-                            "chat_id": chat_id,
-                            "caption": caption,
-                            "parse_mode": "HTML"
-                        }
-                        
-                        async with self.session.post(f"{self.base_url}/sendDocument" if media_type == "document" else f"{self.base_url}/sendPhoto", 
-                                                   data=data, files=files, timeout=30) as response:
-                            if response.status != 200:
-                                logger.error(f"Failed to send local media to {chat_id}: {response.status}")
-                                success = False
-                            else:
-                                logger.info(f"Local media sent successfully to {chat_id}")
-                else:
-                    # Remote URL
-                    payload = {
-                        "chat_id": chat_id,
-                        "caption": caption,
-                        "parse_mode": "HTML"
-                    }
-                    
-                    if media_type == "photo":
-                        payload["photo"] = media_url
-                        endpoint = "/sendPhoto"
-                    elif media_type == "video":
-                        payload["video"] = media_url
-                        endpoint = "/sendVideo"
-                    elif media_type == "animation":
-                        payload["animation"] = media_url
-                        endpoint = "/sendAnimation"
-                    else:
-                        payload["document"] = media_url
-                        endpoint = "/sendDocument"
-                    
-                    async with self.session.post(f"{self.base_url}{endpoint}", json=payload, timeout=30) as response:
+            message_id = await self.send_media_to(chat_id, media_url, caption, media_type)
+            if message_id is None:
+                success = False
+            elif event_key and message_id and self.message_index is not None:
+                self.message_index.record(event_key, chat_id, message_id)
+        return success
+
+    async def send_media_to(
+        self, chat_id: str, media_url: str, caption: str = "", media_type: str = "photo"
+    ) -> Optional[int]:
+        """Send media to a single chat and return the Telegram message id (None on failure)."""
+        await self._ensure_session()
+
+        try:
+            # Check if it's a local file
+            if os.path.exists(media_url):
+                # Local file - use sendDocument or sendPhoto
+                with open(media_url, 'rb') as file:
+                    field = 'document' if media_type == "document" else 'photo'
+                    data = aiohttp.FormData()
+                    data.add_field("chat_id", str(chat_id))
+                    data.add_field("caption", caption)
+                    data.add_field("parse_mode", "HTML")
+                    data.add_field(field, file, filename=os.path.basename(media_url))
+
+                    endpoint = "/sendDocument" if media_type == "document" else "/sendPhoto"
+                    async with self.session.post(f"{self.base_url}{endpoint}", data=data) as response:
                         if response.status != 200:
-                            logger.error(f"Failed to send remote media to {chat_id}: {response.status}")
-                            success = False
-                        else:
-                            logger.info(f"Remote media sent successfully to {chat_id}")
-                            
-            except Exception as e:
-                logger.error(f"Error sending media to {chat_id}: {e}")
+                            logger.error(f"Failed to send local media to {chat_id}: {response.status}")
+                            return None
+                        message_id = await self._message_id(response)
+                        logger.info(f"Local media sent successfully to {chat_id}")
+                        return message_id
+
+            # Remote URL
+            payload = {
+                "chat_id": chat_id,
+                "caption": caption,
+                "parse_mode": "HTML"
+            }
+
+            if media_type == "photo":
+                payload["photo"] = media_url
+                endpoint = "/sendPhoto"
+            elif media_type == "video":
+                payload["video"] = media_url
+                endpoint = "/sendVideo"
+            elif media_type == "animation":
+                payload["animation"] = media_url
+                endpoint = "/sendAnimation"
+            else:
+                payload["document"] = media_url
+                endpoint = "/sendDocument"
+
+            async with self.session.post(f"{self.base_url}{endpoint}", json=payload) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to send remote media to {chat_id}: {response.status}")
+                    return None
+                message_id = await self._message_id(response)
+                logger.info(f"Remote media sent successfully to {chat_id}")
+                return message_id
+
+        except Exception as e:
+            logger.error(f"Error sending media to {chat_id}: {e}")
+            return None
+
+    async def edit_caption(self, event_key: str, caption: str) -> bool:
+        """Replace the caption of every message previously sent for an event."""
+        if self.message_index is None:
+            return False
+        messages = self.message_index.get(event_key)
+        if not messages:
+            logger.warning(f"No sent messages recorded for event {event_key}")
+            return False
+
+        success = True
+        for chat_id, message_id in messages.items():
+            if not await self.edit_caption_in(chat_id, message_id, caption):
                 success = False
-                
         return success
 
+    async def edit_caption_in(self, chat_id: str, message_id: int, caption: str) -> bool:
+        """Edit the caption of a single message."""
+        await self._ensure_session()
+
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "caption": caption,
+            "parse_mode": "HTML"
+        }
+        try:
+            async with self.session.post(f"{self.base_url}/editMessageCaption", json=payload) as response:
+                if response.status == 200:
+                    logger.info(f"Caption edited for message {message_id} in {chat_id}")
+                    return True
+                body = await response.text()
+                if "message is not modified" in body:
+                    return True
+                logger.error(f"Failed to edit caption in {chat_id}: {response.status} {body}")
+                return False
+        except Exception as e:
+            logger.error(f"Error editing caption in {chat_id}: {e}")
+            return False
 
+    async def _message_id(self, response: aiohttp.ClientResponse) -> Optional[int]:
+        try:
+            data = await self.transport.read_json(response)
+            return int(data["result"]["message_id"])
+        except Exception as e:
+            # The message went out; we just cannot edit it later.
+            logger.warning(f"Could not read message_id from Telegram response: {e}")
+            return 0
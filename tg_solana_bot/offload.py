@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OFFLOAD_MODES = ("inline", "thread", "process")
+
+
+class Offloader:
+    """Runs CPU-bound work (JSON decode, classification) off the event loop thread.
+
+    ``inline`` calls the function directly, ``thread`` uses a thread pool
+    and ``process`` a spawned process pool. Functions and arguments must be
+    module-level and picklable for the process pool.
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 2):
+        if mode not in OFFLOAD_MODES:
+            logger.warning(f"[offload] unknown mode {mode!r}, running inline")
+            mode = "inline"
+        self.mode = mode
+        self.workers = max(1, workers)
+        self._executor: Optional[Executor] = None
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="offload")
+        elif mode == "process":
+            # spawn: forking a process that already runs threads and an event loop is unsafe.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def install_uvloop() -> bool:
+    """Make new event loops uvloop loops when uvloop is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
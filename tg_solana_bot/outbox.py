@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_key TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    owner TEXT,
+    lease_until REAL,
+    UNIQUE (event_key, chat_id, kind)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+# Columns added after the first release; created on older databases at open.
+_ADDED_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+
+
+class OutboxEntry:
+    __slots__ = ("id", "event_key", "chat_id", "kind", "payload", "attempts")
+
+    def __init__(self, id: int, event_key: str, chat_id: str, kind: str, payload: Dict[str, Any], attempts: int):
+        self.id = id
+        self.event_key = event_key
+        self.chat_id = chat_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+class Outbox:
+    """Durable SQLite queue of Telegram deliveries.
+
+    Every (event, chat, kind) is stored once, so re-enqueueing the same alert
+    after a restart is a no-op. ``send`` rows post the alert; ``edit`` rows
+    replace its caption and collapse to the latest caption while pending.
+
+    Instances sharing the database claim rows with a lease under their
+    ``owner`` id, so each row is delivered by one instance at a time; a
+    crashed instance's rows are picked up again once the lease expires.
+    Rows leased to our own ``owner`` are always claimable: only one worker
+    per owner delivers at a time, so those are left over from a cancelled
+    pass or an earlier run. The worker renews its leases during long
+    batches, so the lease only needs to cover a single send.
+    """
+
+    def __init__(self, file_path: str, owner: str = "", lease_seconds: float = 90.0):
+        self.file_path = file_path
+        self.owner = owner or f"pid-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self._ensure_directory()
+        # Opened off-loop at startup, then only used from the event loop thread.
+        self._conn = sqlite3.connect(self.file_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for name, kind in _ADDED_COLUMNS.items():
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {kind}")
+        self._conn.commit()
+
+    def _ensure_directory(self):
+        """Ensure the directory for the outbox database exists."""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def enqueue_send(self, event_key: str, chat_ids: Iterable[str], payload: Dict[str, Any]) -> int:
+        """Queue an alert for each chat; already-queued (event, chat) pairs are ignored."""
+        now = time.time()
+        body = json.dumps(payload)
+        with self._conn:
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (event_key, chat_id, kind, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, 'send', ?, ?, ?)",
+                [(event_key, str(chat_id), body, now, now) for chat_id in chat_ids],
+            )
+        return cur.rowcount
+
+    def enqueue_edit(self, event_key: str, chat_ids: Iterable[str], caption: str) -> None:
+        """Queue a caption update; a newer caption replaces an older one."""
+        now = time.time()
+        body = json.dumps({"caption": caption})
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO outbox (event_key, chat_id, kind, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, 'edit', ?, ?, ?) "
+                "ON CONFLICT (event_key, chat_id, kind) DO UPDATE SET "
+                "payload = excluded.payload, status = 'pending', attempts = 0, "
+                "next_attempt_at = excluded.next_attempt_at, delivered_at = NULL, "
+                # Drop any claim: a delivery of the old caption must not mark this one delivered.
+                "owner = NULL, lease_until = NULL",
+                [(event_key, str(chat_id), body, now, now) for chat_id in chat_ids],
+            )
+
+    def due(self, limit: int = 20) -> List[OutboxEntry]:
+        """Claim up to ``limit`` due rows for this owner, oldest first."""
+        now = time.time()
+        with self._conn:
+            rows = self._conn.execute(
+                "UPDATE outbox SET owner = ?, lease_until = ? WHERE id IN ("
+                "SELECT id FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "AND (lease_until IS NULL OR lease_until < ? OR owner = ?) ORDER BY id LIMIT ?"
+                ") RETURNING id, event_key, chat_id, kind, payload, attempts",
+                (self.owner, now + self.lease_seconds, now, now, self.owner, limit),
+            ).fetchall()
+        rows.sort(key=lambda r: r[0])
+        return [OutboxEntry(r[0], r[1], r[2], r[3], json.loads(r[4]), r[5]) for r in rows]
+
+    def has_due(self) -> bool:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT 1 FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+            "AND (lease_until IS NULL OR lease_until < ? OR owner = ?) LIMIT 1",
+            (now, now, self.owner),
+        ).fetchone()
+        return row is not None
+
+    def renew(self, ids: List[int]) -> None:
+        """Extend our lease on rows still being delivered."""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET lease_until = ? WHERE id = ? AND owner = ?",
+                [(time.time() + self.lease_seconds, i, self.owner) for i in ids],
+            )
+
+    def release(self, ids: List[int]) -> None:
+        """Give up our lease on rows that were not delivered, so anyone can claim them now."""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET owner = NULL, lease_until = NULL WHERE id = ? AND owner = ? AND status = 'pending'",
+                [(i, self.owner) for i in ids],
+            )
+
+    def is_pending(self, event_key: str, chat_id: str, kind: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM outbox WHERE event_key = ? AND chat_id = ? AND kind = ? AND status = 'pending'",
+            (event_key, str(chat_id), kind),
+        ).fetchone()
+        return row is not None
+
+    def mark_delivered(self, ids: List[int]) -> None:
+        """Mark a batch of rows delivered in a single transaction."""
+        if not ids:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'delivered', delivered_at = ?, owner = NULL, lease_until = NULL "
+                "WHERE id = ? AND owner = ?",
+                [(now, i, self.owner) for i in ids],
+            )
+
+    def reschedule(self, entry: OutboxEntry, delay: float, count_attempt: bool = True) -> None:
+        attempts = entry.attempts + 1 if count_attempt else entry.attempts
+        with self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, owner = NULL, lease_until = NULL "
+                "WHERE id = ? AND owner = ?",
+                (attempts, time.time() + delay, entry.id, self.owner),
+            )
+
+    def mark_dead(self, entry: OutboxEntry) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'dead', owner = NULL, lease_until = NULL WHERE id = ? AND owner = ?",
+                (entry.id, self.owner),
+            )
+
+    def pending_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def purge_delivered(self, older_than_seconds: float) -> int:
+        with self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM outbox WHERE status != 'pending' AND created_at < ?",
+                (time.time() - older_than_seconds,),
+            )
+        return cur.rowcount
+
+    def close(self):
+        self._conn.close()
+
+
+class OutboxWorker:
+    """Delivers outbox rows through the notifier with retries and backoff."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        notifier,
+        batch_size: int = 20,
+        max_attempts: int = 12,
+        max_pending: int = 500,
+        retention_seconds: float = 7 * 24 * 3600,
+    ):
+        self.outbox = outbox
+        self.notifier = notifier
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._wakeup = asyncio.Event()
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def wait_for_capacity(self):
+        """Block ingestion while the backlog is above ``max_pending``."""
+        if self.outbox.pending_count() < self.max_pending:
+            return
+        logger.warning(f"[outbox] backlog above {self.max_pending}, pausing ingestion")
+        self._capacity.clear()
+        await self._capacity.wait()
+
+    async def run(self, idle_seconds: float = 5.0):
+        self._task = asyncio.current_task()
+        last_purge = 0.0
+        while not self._stopping:
+            try:
+                delivered = await self.deliver_once()
+            except Exception as exc:
+                logger.error(f"[outbox] delivery pass failed: {exc}")
+                delivered = 0
+            if self.outbox.pending_count() < self.max_pending:
+                self._capacity.set()
+            if time.time() - last_purge > 3600:
+                last_purge = time.time()
+                self.outbox.purge_delivered(self.retention_seconds)
+                if self.notifier.message_index is not None:
+                    self.notifier.message_index.purge(self.retention_seconds)
+            if delivered:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=idle_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float):
+        """Let the ``run`` loop finish its current pass, cancelling it after ``timeout``."""
+        self._stopping = True
+        self._wakeup.set()
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop the ``run`` loop, then deliver whatever is due until nothing is left or ``timeout`` expires.
+
+        Rows claimed by a pass that was cancelled are released, or still
+        leased to our owner, so the drain picks them up.
+        """
+        deadline = time.monotonic() + timeout
+        await self.stop(max(timeout / 2, 0.1))
+        while time.monotonic() < deadline:
+            if not self.outbox.has_due():
+                return True
+            try:
+                await asyncio.wait_for(self.deliver_once(), timeout=max(deadline - time.monotonic(), 0.1))
+            except asyncio.TimeoutError:
+                break
+        remaining = self.outbox.pending_count()
+        if remaining:
+            logger.warning(f"[outbox] {remaining} deliveries left for the next start")
+        return remaining == 0
+
+    async def deliver_once(self) -> int:
+        """Attempt one batch of due rows; returns how many were delivered."""
+        entries = self.outbox.due(self.batch_size)
+        delivered: List[int] = []
+        claimed_at = time.monotonic()
+        try:
+            for i, entry in enumerate(entries):
+                if time.monotonic() - claimed_at > self.outbox.lease_seconds / 2:
+                    self.outbox.renew([e.id for e in entries[i:]])
+                    claimed_at = time.monotonic()
+                self._settle(entry, await self._deliver(entry), delivered)
+        except BaseException:
+            # Cancelled mid-batch: keep what went out, hand the rest back.
+            self.outbox.mark_delivered(delivered)
+            self.outbox.release([e.id for e in entries if e.id not in delivered])
+            raise
+        self.outbox.mark_delivered(delivered)
+        return len(delivered)
+
+    def _settle(self, entry: OutboxEntry, ok: Optional[bool], delivered: List[int]):
+        if ok:
+            delivered.append(entry.id)
+        elif ok is None:
+            # Edit waiting for its send to go out first.
+            self.outbox.reschedule(entry, delay=2.0, count_attempt=False)
+        elif entry.attempts + 1 >= self.max_attempts:
+            logger.error(f"[outbox] giving up on {entry.kind} {entry.event_key} -> {entry.chat_id}")
+            self.outbox.mark_dead(entry)
+        else:
+            delay = min(2 ** entry.attempts, 300)
+            logger.warning(f"[outbox] {entry.kind} {entry.event_key} -> {entry.chat_id} failed, retry in {delay}s")
+            self.outbox.reschedule(entry, delay=delay)
+
+    async def _deliver(self, entry: OutboxEntry) -> Optional[bool]:
+        payload = entry.payload
+        if entry.kind == "send":
+            index = self.notifier.message_index
+            if index is not None and entry.chat_id in index.get(entry.event_key):
+                # Sent before a crash but not yet marked delivered.
+                return True
+            message_id = await self.notifier.send_media_to(
+                entry.chat_id, payload.get("media_url", ""), payload.get("caption", ""), payload.get("media_type", "photo")
+            )
+            if message_id is None:
+                return False
+            if message_id and self.notifier.message_index is not None:
+                self.notifier.message_index.record(entry.event_key, entry.chat_id, message_id)
+            return True
+
+        if entry.kind == "edit":
+            index = self.notifier.message_index
+            message_id = index.get(entry.event_key).get(entry.chat_id) if index is not None else None
+            if message_id is None:
+                if self.outbox.is_pending(entry.event_key, entry.chat_id, "send"):
+                    return None
+                logger.warning(f"[outbox] no message to edit for {entry.event_key} in {entry.chat_id}")
+                return True
+            return await self.notifier.edit_caption_in(entry.chat_id, message_id, payload.get("caption", ""))
+
+        logger.error(f"[outbox] unknown entry kind {entry.kind}")
+        return True
@@ -0,0 +1,78 @@
+import logging
+import os
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_finality (
+    owner TEXT NOT NULL,
+    address TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    caption TEXT,
+    tracked_at REAL NOT NULL,
+    PRIMARY KEY (owner, address, signature)
+);
+CREATE INDEX IF NOT EXISTS idx_pending_finality_owner ON pending_finality (owner, tracked_at);
+"""
+
+
+class PendingStore:
+    """Signatures the finality reconciler still has to check, kept in SQLite.
+
+    Stored next to the outbox and message index so alerts sent shortly
+    before a restart are still finalized or retracted afterwards. Rows are
+    keyed by owner so instances sharing a data directory each reload only
+    their own.
+    """
+
+    def __init__(self, db_path: str, owner: str):
+        self.db_path = db_path
+        self.owner = owner
+        self._ensure_directory()
+        # Opened off-loop at startup, then only used from the event loop thread.
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _ensure_directory(self):
+        """Ensure the directory for the database exists."""
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def add(self, address: str, signature: str, caption: Optional[str], tracked_at: float):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_finality (owner, address, signature, caption, tracked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.owner, address, signature, caption, tracked_at),
+            )
+
+    def set_caption(self, address: str, signature: str, caption: str):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE pending_finality SET caption = ? WHERE owner = ? AND address = ? AND signature = ?",
+                (caption, self.owner, address, signature),
+            )
+
+    def remove(self, entries: Iterable[Tuple[str, str]]):
+        """Forget (address, signature) pairs that were finalized, dropped or evicted."""
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM pending_finality WHERE owner = ? AND address = ? AND signature = ?",
+                [(self.owner, address, signature) for address, signature in entries],
+            )
+
+    def load(self) -> List[Tuple[str, str, Optional[str], float]]:
+        """Return (address, signature, caption, tracked_at) rows, oldest first."""
+        return self._conn.execute(
+            "SELECT address, signature, caption, tracked_at FROM pending_finality "
+            "WHERE owner = ? ORDER BY tracked_at, rowid",
+            (self.owner,),
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
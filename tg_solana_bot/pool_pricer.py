@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tg_solana_bot.watcher import file_stamp
+
+logger = logging.getLogger(__name__)
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+STABLE_QUOTES = {
+    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",
+}
+
+UsdLookup = Callable[[str], Awaitable[Optional[float]]]
+
+
+class PoolConfig:
+    __slots__ = ("key", "symbol", "base_vault", "quote_vault", "quote")
+
+    def __init__(self, key: str, symbol: str, base_vault: str, quote_vault: str, quote: str):
+        self.key = key
+        self.symbol = symbol
+        self.base_vault = base_vault
+        self.quote_vault = quote_vault
+        self.quote = quote
+
+
+class PoolQuote:
+    """A pool price in quote units, stamped with the slot it was read at."""
+
+    __slots__ = ("price", "quote", "slot", "fetched_at")
+
+    def __init__(self, price: float, quote: str, slot: int, fetched_at: float):
+        self.price = price
+        self.quote = quote
+        self.slot = slot
+        self.fetched_at = fetched_at
+
+
+class PoolPricer:
+    """Prices tokens from the reserves of constant-product AMM pools.
+
+    The pool file maps a mint to its pool's vaults::
+
+        {"<mint>": {"symbol": "BULLIEVE", "base_vault": "...", "quote_vault": "...", "quote": "SOL"}}
+
+    ``quote`` is SOL, USDC, USDT or another configured key. All vaults
+    are read with one ``getMultipleAccounts`` call per refresh. A SOL
+    quote is chained to SOL/USD from a "SOL" pool entry when configured,
+    otherwise from the lookup passed by the caller. Vault ratios are only
+    the spot price for constant-product pools, not concentrated liquidity.
+    """
+
+    def __init__(self, client, file_path: str, ttl_seconds: float = 30.0):
+        self.client = client
+        self.file_path = file_path
+        self.ttl_seconds = ttl_seconds
+        self.pools: Dict[str, PoolConfig] = {}
+        self._aliases: Dict[str, str] = {}
+        self._quotes: Dict[str, PoolQuote] = {}
+        self._lock = asyncio.Lock()
+        self._refreshed_at = 0.0
+        self._stamp = None
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the pool file if it changed; returns True on reload."""
+        stamp = file_stamp(self.file_path)
+        if not force and stamp == self._stamp:
+            return False
+        try:
+            data: Dict[str, Any] = {}
+            if stamp is not None:
+                with open(self.file_path, 'r') as f:
+                    data = json.load(f)
+            pools = {
+                key: PoolConfig(key, entry.get("symbol", ""), entry["base_vault"], entry["quote_vault"], entry.get("quote", "SOL"))
+                for key, entry in data.items()
+            }
+        except Exception as e:
+            logger.error(f"Error loading pool config: {e}")
+            return False
+        self.pools = pools
+        self._aliases = {p.symbol.lower(): key for key, p in pools.items() if p.symbol}
+        self._quotes = {k: q for k, q in self._quotes.items() if k in pools}
+        self._refreshed_at = 0.0
+        self._stamp = stamp
+        if pools:
+            logger.info(f"Loaded {len(pools)} price pools from {self.file_path}")
+        return True
+
+    def resolve(self, mint_or_symbol: str) -> Optional[str]:
+        if mint_or_symbol in self.pools:
+            return mint_or_symbol
+        return self._aliases.get(mint_or_symbol.lower())
+
+    def has(self, mint_or_symbol: str) -> bool:
+        return self.resolve(mint_or_symbol) is not None
+
+    def quote(self, mint_or_symbol: str) -> Optional[PoolQuote]:
+        key = self.resolve(mint_or_symbol)
+        return self._quotes.get(key) if key else None
+
+    async def get_usd_price(self, mint_or_symbol: str, usd_lookup: Optional[UsdLookup] = None) -> Optional[float]:
+        key = self.resolve(mint_or_symbol)
+        if key is None:
+            return None
+        await self._ensure_fresh()
+        return await self._usd(key, usd_lookup, depth=0)
+
+    async def _usd(self, key: str, usd_lookup: Optional[UsdLookup], depth: int) -> Optional[float]:
+        quote = self._quotes.get(key)
+        # A failing RPC keeps the last quotes around; stop trusting them after a while.
+        if quote is None or depth > 3 or time.time() - quote.fetched_at > self.ttl_seconds * 10:
+            return None
+        quote_usd = await self._quote_usd(quote.quote, usd_lookup, depth)
+        if quote_usd is None:
+            return None
+        return quote.price * quote_usd
+
+    async def _quote_usd(self, quote: str, usd_lookup: Optional[UsdLookup], depth: int) -> Optional[float]:
+        if quote.upper() in STABLE_QUOTES or quote in STABLE_QUOTES.values():
+            return 1.0
+        chained = self.resolve(quote) or (self.resolve("SOL") if quote == SOL_MINT else None)
+        if chained is not None:
+            return await self._usd(chained, usd_lookup, depth + 1)
+        if usd_lookup is not None:
+            return await usd_lookup(quote)
+        return None
+
+    async def _ensure_fresh(self):
+        async with self._lock:
+            if time.time() - self._refreshed_at < self.ttl_seconds:
+                return
+            try:
+                await self.refresh_quotes()
+            except Exception as exc:
+                logger.error(f"[pool] refresh failed: {exc}")
+                return
+            self._refreshed_at = time.time()
+
+    async def refresh_quotes(self) -> int:
+        """Read every configured pool's vaults in one batched call; returns pools priced."""
+        pools = list(self.pools.values())
+        if not pools:
+            return 0
+        vaults: List[str] = []
+        for pool in pools:
+            vaults.extend((pool.base_vault, pool.quote_vault))
+        slot, accounts = await self.client.get_multiple_accounts(vaults)
+        now = time.time()
+        priced = 0
+        for i, pool in enumerate(pools):
+            base = _token_amount(accounts[2 * i] if 2 * i < len(accounts) else None)
+            quote = _token_amount(accounts[2 * i + 1] if 2 * i + 1 < len(accounts) else None)
+            if not base or not quote:
+                logger.warning(f"[pool] no reserves for {pool.key}, keeping the previous price")
+                continue
+            previous = self._quotes.get(pool.key)
+            if previous is not None and previous.slot > slot:
+                # Answered by a node that is behind the one we read last time.
+                continue
+            self._quotes[pool.key] = PoolQuote(quote / base, pool.quote, slot, now)
+            priced += 1
+        logger.info(f"[pool] refreshed {priced}/{len(pools)} pool prices at slot {slot}")
+        return priced
+
+
+def _token_amount(account: Optional[Dict[str, Any]]) -> Optional[float]:
+    """UI amount of a jsonParsed token account, or None."""
+    try:
+        amount = account["data"]["parsed"]["info"]["tokenAmount"]
+        return int(amount["amount"]) / (10 ** int(amount["decimals"]))
+    except (TypeError, KeyError, ValueError):
+        return None
@@ -1,13 +1,34 @@
 import aiohttp
+import asyncio
 import logging
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Set, Tuple
+
+from tg_solana_bot.memory import sampled_size
+from tg_solana_bot.pool_pricer import SOL_MINT
+from tg_solana_bot.transport import HttpTransport
 
 logger = logging.getLogger(__name__)
 
 class PriceClient:
-    def __init__(self, manual_price_store):
+    def __init__(
+        self,
+        manual_price_store,
+        transport: Optional[HttpTransport] = None,
+        cache_ttl_seconds: float = 60.0,
+        pool_pricer=None,
+    ):
         self.manual_price_store = manual_price_store
+        self.pool_pricer = pool_pricer
+        self.cache_ttl_seconds = cache_ttl_seconds
+        # mint -> (price, fetched_at epoch) for prices fetched from Jupiter
+        self._cache: Dict[str, Tuple[float, float]] = {}
+        # Prices restored from the warm-start snapshot and not refetched since.
+        self._restored: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self.transport = transport or HttpTransport()
+        self._owns_transport = transport is None
         self.session: Optional[aiohttp.ClientSession] = None
         self.jupiter_url = "https://price.jup.ag/v4/price"
 
@@ -19,21 +40,46 @@ class PriceClient:
         await self.close()
 
     async def _ensure_session(self):
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        if self.session is None or self.session.closed:
+            self.session = await self.transport.get_session()
 
     async def close(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self._owns_transport:
+            await self.transport.close()
+        self.session = None
 
     async def get_usd_price(self, mint: str) -> Optional[float]:
-        """Get USD price for a token mint address or symbol."""
+        """Get USD price for a token mint address or symbol.
+
+        An expired price restored from the warm-start snapshot is served once
+        as is while it is refetched in the background.
+        """
+        cached = self.cached_price(mint)
+        if cached is not None:
+            return cached
+        if mint in self._restored and mint in self._cache:
+            self._restored.discard(mint)
+            task = asyncio.create_task(self._fetch_usd_price(mint))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return self._cache[mint][0]
+        return await self._fetch_usd_price(mint)
+
+    async def _fetch_usd_price(self, mint: str) -> Optional[float]:
         try:
-            # Try Jupiter first
+            # Configured on-chain pools are authoritative for their tokens
+            if self.pool_pricer is not None and self.pool_pricer.has(mint):
+                pool_price = await self.pool_pricer.get_usd_price(mint, self._quote_usd_price)
+                if pool_price is not None:
+                    logger.info(f"Got pool price for {mint}: ${pool_price}")
+                    self._cache[mint] = (pool_price, time.time())
+                    return pool_price
+
+            # Then Jupiter
             jupiter_price = await self._get_jupiter_price(mint)
             if jupiter_price is not None:
                 logger.info(f"Got Jupiter price for {mint}: ${jupiter_price}")
+                self._cache[mint] = (jupiter_price, time.time())
                 return jupiter_price
 
             # Try manual prices
@@ -50,18 +96,65 @@ class PriceClient:
             logger.error(f"Error getting price for {mint}: {e}")
             return None
 
+    async def _quote_usd_price(self, quote: str) -> Optional[float]:
+        """USD price of a pool's quote token (e.g. SOL) from the non-pool sources."""
+        cached = self.cached_price(quote)
+        if cached is not None:
+            return cached
+        price = await self._get_jupiter_price(quote)
+        if price is not None:
+            self._cache[quote] = (price, time.time())
+            return price
+        manual = self.manual_price_store.get_price(quote)
+        if manual is None and quote == SOL_MINT:
+            manual = self.manual_price_store.get_price("SOL")
+        return manual
+
+    def cached_price(self, mint: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Return a cached price younger than ``max_age`` (defaults to the cache TTL)."""
+        entry = self._cache.get(mint)
+        if entry is None:
+            return None
+        ttl = self.cache_ttl_seconds if max_age is None else max_age
+        if time.time() - entry[1] > ttl:
+            return None
+        return entry[0]
+
+    def cached_entry(self, mint: str) -> Optional[Tuple[float, float]]:
+        """(price, fetched_at) regardless of age, without any network call."""
+        return self._cache.get(mint)
+
+    def approx_bytes(self) -> int:
+        return sampled_size(self._cache)
+
+    def shrink(self, fraction: float) -> int:
+        """Drop the oldest ``fraction`` of cached prices."""
+        count = int(len(self._cache) * fraction)
+        for mint, _ in sorted(self._cache.items(), key=lambda kv: kv[1][1])[:count]:
+            del self._cache[mint]
+        self._cache = dict(self._cache)
+        return count
+
+    def export_cache(self) -> Dict[str, Any]:
+        return {mint: [price, ts] for mint, (price, ts) in self._cache.items()}
+
+    def import_cache(self, data: Dict[str, Any]):
+        for mint, (price, ts) in data.items():
+            self._cache[mint] = (float(price), float(ts))
+            self._restored.add(mint)
+
     async def _get_jupiter_price(self, mint: str) -> Optional[float]:
         """Get price from Jupiter API."""
         try:
             await self._ensure_session()
             
             params = {"ids": mint}
-            async with self.session.get(self.jupiter_url, params=params, timeout=10) as response:
+            async with self.session.get(self.jupiter_url, params=params, timeout=self.transport.timeout(read=10)) as response:
                 if response.status != 200:
                     logger.warning(f"Jupiter API returned {response.status}")
                     return None
                 
-                data = await response.json()
+                data = await self.transport.read_json(response)
                 if "data" in data and mint in data["data"]:
                     return float(data["data"][mint]["price"])
                 
@@ -0,0 +1,229 @@
+import asyncio
+import html
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from tg_solana_bot.memory import sampled_size
+from tg_solana_bot.sinks import SinkEvent
+
+logger = logging.getLogger(__name__)
+
+
+class PendingSignature:
+    """A signature processed at `confirmed` that is not yet finalized."""
+
+    __slots__ = ("signature", "address", "tracked_at", "caption")
+
+    def __init__(
+        self, signature: str, address: str, caption: Optional[str] = None, tracked_at: Optional[float] = None
+    ):
+        self.signature = signature
+        self.address = address
+        # Wall clock, so entries reloaded after a restart keep their age.
+        self.tracked_at = time.time() if tracked_at is None else tracked_at
+        self.caption = caption
+
+
+class FinalityReconciler:
+    """Re-checks signatures processed at `confirmed` until they finalize.
+
+    Alerts go out as soon as a transaction is confirmed; this background task
+    polls ``getSignatureStatuses`` in bulk, advances the finalized checkpoint
+    per address and retracts any alert whose transaction was dropped.
+    With a ``store``, pending signatures survive a restart; call ``load``
+    once at startup.
+    """
+
+    def __init__(
+        self,
+        client,
+        state,
+        notifier,
+        interval_seconds: float = 20.0,
+        drop_after_seconds: float = 150.0,
+        max_pending: int = 5000,
+        outbox=None,
+        sinks=None,
+        store=None,
+    ):
+        self.client = client
+        self.state = state
+        self.notifier = notifier
+        self.outbox = outbox
+        self.sinks = sinks
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.drop_after_seconds = drop_after_seconds
+        self.max_pending = max_pending
+        # address -> signature -> pending entry, oldest first
+        self._pending: Dict[str, "OrderedDict[str, PendingSignature]"] = {}
+        self._count = 0
+
+    @property
+    def pending_count(self) -> int:
+        return self._count
+
+    def load(self) -> int:
+        """Reload the signatures still pending when the previous run stopped."""
+        if self.store is None:
+            return 0
+        loaded = 0
+        for address, signature, caption, tracked_at in self.store.load():
+            queue = self._pending.setdefault(address, OrderedDict())
+            if signature not in queue:
+                queue[signature] = PendingSignature(signature, address, caption, tracked_at)
+                self._count += 1
+                loaded += 1
+        if loaded:
+            logger.info(f"[finality] reloaded {loaded} pending signatures")
+        return loaded
+
+    def track(self, address: str, signature: str, caption: Optional[str] = None):
+        """Remember a processed signature; pass the caption if an alert was sent."""
+        queue = self._pending.setdefault(address, OrderedDict())
+        if signature in queue:
+            if caption:
+                queue[signature].caption = caption
+                self._persist_caption(queue[signature])
+            return
+        entry = PendingSignature(signature, address, caption)
+        queue[signature] = entry
+        self._count += 1
+        if self.store is not None:
+            self.store.add(address, signature, caption, entry.tracked_at)
+        if self._count > self.max_pending:
+            self._evict_oldest()
+
+    def update_caption(self, signature: str, caption: str) -> bool:
+        """Change the caption a pending alert is finalized or retracted with."""
+        for queue in self._pending.values():
+            entry = queue.get(signature)
+            if entry is not None and entry.caption:
+                entry.caption = caption
+                self._persist_caption(entry)
+                return True
+        return False
+
+    def _persist_caption(self, entry: PendingSignature):
+        if self.store is not None:
+            self.store.set_caption(entry.address, entry.signature, entry.caption)
+
+    def _forget(self, entries: List[PendingSignature]):
+        if self.store is not None and entries:
+            self.store.remove((e.address, e.signature) for e in entries)
+
+    def approx_bytes(self) -> int:
+        return sum(sampled_size(q) for q in self._pending.values())
+
+    def shrink(self, fraction: float) -> int:
+        """Stop tracking the oldest ``fraction`` of pending signatures."""
+        count = int(self._count * fraction)
+        for _ in range(count):
+            self._evict_oldest()
+        return count
+
+    def _evict_oldest(self):
+        oldest: Optional[PendingSignature] = None
+        for queue in self._pending.values():
+            if queue:
+                entry = next(iter(queue.values()))
+                if oldest is None or entry.tracked_at < oldest.tracked_at:
+                    oldest = entry
+        if oldest is not None:
+            del self._pending[oldest.address][oldest.signature]
+            self._count -= 1
+            self._forget([oldest])
+            logger.warning(f"[finality] pending limit reached, no longer tracking {oldest.signature}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.reconcile_once()
+            except Exception as exc:
+                logger.error(f"[finality] reconcile failed: {exc}")
+
+    async def reconcile_once(self):
+        entries: List[PendingSignature] = [e for q in self._pending.values() for e in q.values()]
+        if not entries:
+            return
+        statuses = await self.client.get_signature_statuses([e.signature for e in entries])
+        now = time.time()
+        finalized = set()
+        dropped: List[PendingSignature] = []
+        for entry, status in zip(entries, statuses):
+            if status is None:
+                if now - entry.tracked_at > self.drop_after_seconds:
+                    dropped.append(entry)
+            elif status.get("err") is not None:
+                dropped.append(entry)
+            elif status.get("confirmationStatus") == "finalized":
+                finalized.add(entry.signature)
+
+        for entry in dropped:
+            self._pending[entry.address].pop(entry.signature, None)
+            self._count -= 1
+            logger.warning(f"[finality] signature dropped before finalization: {entry.signature}")
+            if entry.caption:
+                await self._retract(entry)
+        # Forgotten only once the edit is queued, so a restart in between repeats it.
+        self._forget(dropped)
+
+        for address, queue in list(self._pending.items()):
+            done: List[PendingSignature] = []
+            while queue:
+                signature = next(iter(queue))
+                if signature not in finalized:
+                    break
+                _, entry = queue.popitem(last=False)
+                self._count -= 1
+                done.append(entry)
+            if not done:
+                continue
+            self.state.save_finalized_signature(address, done[-1].signature)
+            for entry in done:
+                if entry.caption:
+                    await self._mark_finalized(entry)
+            self._forget(done)
+
+        logger.info(
+            f"[finality] checked={len(entries)} finalized={len(finalized)} dropped={len(dropped)} pending={self._count}"
+        )
+
+    async def _retract(self, entry: PendingSignature):
+        try:
+            caption = (
+                f"<s>{html.escape(entry.caption)}</s>\n\n"
+                "⚠️ RETRACTED: transaction dropped before finalization"
+            )
+            if self.sinks is not None:
+                await self.sinks.emit(SinkEvent("update", entry.signature, status="retracted", caption=caption))
+                return
+            if self.outbox is not None:
+                self.outbox.enqueue_edit(entry.signature, self.notifier.chat_ids, caption)
+                return
+            if await self.notifier.edit_caption(entry.signature, caption):
+                return
+            # No message id recorded (e.g. sent before a restart): post a correction instead.
+            await self.notifier.send_message(
+                "⚠️ ALERT RETRACTED\n\n"
+                f"Transaction {entry.signature} was dropped before finalization; "
+                "the previous alert for it did not happen on-chain."
+            )
+        except Exception as exc:
+            logger.error(f"[finality] could not retract alert for {entry.signature}: {exc}")
+
+    async def _mark_finalized(self, entry: PendingSignature):
+        try:
+            caption = f"{entry.caption}\n\n✅ Finalized"
+            if self.sinks is not None:
+                await self.sinks.emit(SinkEvent("update", entry.signature, status="finalized", caption=caption))
+                return
+            if self.outbox is not None:
+                self.outbox.enqueue_edit(entry.signature, self.notifier.chat_ids, caption)
+                return
+            await self.notifier.edit_caption(entry.signature, caption)
+        except Exception as exc:
+            logger.error(f"[finality] could not mark {entry.signature} finalized: {exc}")
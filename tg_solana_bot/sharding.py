@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processed (
+    signature TEXT PRIMARY KEY,
+    instance_id TEXT NOT NULL,
+    processed_at REAL NOT NULL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_processed_at ON processed (processed_at);
+"""
+
+# Columns added after the first release; created on older databases at open.
+_ADDED_COLUMNS = {"lease_until": "REAL"}
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring; adding or removing a node only moves its share of keys."""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        self.nodes = sorted(set(nodes))
+        points: List[Tuple[int, str]] = []
+        for node in self.nodes:
+            for i in range(replicas):
+                points.append((_hash(f"{node}#{i}"), node))
+        points.sort()
+        self._hashes = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+class ShardCoordinator:
+    """Splits watched addresses between bot instances sharing a SQLite file.
+
+    Each instance heartbeats into ``instances``; live instances form a
+    consistent-hash ring and each polls only the addresses that hash to it.
+    When a heartbeat expires the ring is rebuilt and the dead instance's
+    addresses move to the survivors. ``claim`` records processed signatures
+    so an event seen through two addresses is only notified once.
+
+    A claim is leased until ``complete`` marks the signature processed. If
+    the instance dies or is cancelled before that, the signature is claimed
+    again once the lease runs out, or straight away by the same instance
+    after a restart.
+
+    Another instance can hold the database's write lock for a while, so
+    the async methods run their queries in a worker thread.
+    """
+
+    def __init__(
+        self, db_path: str, instance_id: str, lease_ttl_seconds: float = 30.0, claim_lease_seconds: float = 120.0
+    ):
+        self.db_path = db_path
+        self.instance_id = instance_id
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.claim_lease_seconds = claim_lease_seconds
+        self._ensure_directory()
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        # The connection is shared by worker threads; one query at a time.
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(processed)")}
+        for name, kind in _ADDED_COLUMNS.items():
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE processed ADD COLUMN {name} {kind}")
+        self._conn.commit()
+        # Signatures this process is working on right now.
+        self._inflight: Set[str] = set()
+        self._members: Tuple[str, ...] = ()
+        self._ring = HashRing([instance_id])
+
+    def _ensure_directory(self):
+        """Ensure the directory for the shard database exists."""
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def members(self) -> Tuple[str, ...]:
+        return self._members
+
+    def heartbeat(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO instances (instance_id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT (instance_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (self.instance_id, time.time()),
+            )
+
+    def live_instances(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT instance_id FROM instances WHERE heartbeat_at >= ?",
+                (time.time() - self.lease_ttl_seconds,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def refresh(self):
+        """Heartbeat and rebuild the ring if membership changed."""
+        self.heartbeat()
+        members = tuple(sorted(set(self.live_instances()) | {self.instance_id}))
+        if members != self._members:
+            logger.info(f"[shard] {self.instance_id} rebalanced: members={list(members)}")
+            self._members = members
+            self._ring = HashRing(members)
+
+    def owns(self, address: str) -> bool:
+        return self._ring.node_for(address) == self.instance_id
+
+    async def claim(self, signature: str) -> Optional[bool]:
+        """Claim ``signature`` for this instance.
+
+        True: process it, then call ``complete`` (or ``release`` on failure).
+        False: it was already processed. None: another instance holds a live
+        claim; try again later.
+        """
+        return await asyncio.to_thread(self._claim, signature)
+
+    def _claim(self, signature: str) -> Optional[bool]:
+        now = time.time()
+        # A leftover claim of our own is from before a restart, unless it is in flight here.
+        reclaim_own = signature not in self._inflight
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO processed (signature, instance_id, processed_at, lease_until) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (signature) DO UPDATE SET instance_id = excluded.instance_id, "
+                "processed_at = excluded.processed_at, lease_until = excluded.lease_until "
+                "WHERE processed.lease_until IS NOT NULL "
+                "AND (processed.lease_until < ? OR (processed.instance_id = ? AND ?))",
+                (signature, self.instance_id, now, now + self.claim_lease_seconds, now, self.instance_id, reclaim_own),
+            )
+            if cur.rowcount == 1:
+                self._inflight.add(signature)
+                return True
+            row = self._conn.execute("SELECT lease_until FROM processed WHERE signature = ?", (signature,)).fetchone()
+        return None if row is not None and row[0] is not None else False
+
+    async def run_once(self, signature: str, work: Callable[[], Awaitable[Any]]) -> Optional[bool]:
+        """Claim ``signature``, await ``work()`` and complete the claim.
+
+        Returns what ``claim`` returned. If ``work`` raises or is cancelled,
+        the claim is released before the exception propagates.
+        """
+        claimed = await self.claim(signature)
+        if not claimed:
+            return claimed
+        try:
+            await work()
+        except Exception:
+            await self.release(signature)
+            raise
+        except BaseException:
+            # Cancelled: awaiting here could be cancelled too.
+            self.release_now(signature)
+            raise
+        await self.complete(signature)
+        return True
+
+    async def complete(self, signature: str):
+        """Mark a claimed signature processed; later claims return False."""
+        await asyncio.to_thread(self._complete, signature)
+
+    def _complete(self, signature: str):
+        self._inflight.discard(signature)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE processed SET lease_until = NULL, processed_at = ? WHERE signature = ? AND instance_id = ?",
+                (time.time(), signature, self.instance_id),
+            )
+
+    async def release(self, signature: str):
+        """Undo a claim whose processing failed, so it can be retried."""
+        await asyncio.to_thread(self.release_now, signature)
+
+    def release_now(self, signature: str):
+        """``release`` without awaiting, for cancellation paths."""
+        self._inflight.discard(signature)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM processed WHERE signature = ? AND instance_id = ? AND lease_until IS NOT NULL",
+                (signature, self.instance_id),
+            )
+
+    def purge(self, older_than_seconds: float = 7 * 24 * 3600):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM processed WHERE processed_at < ?", (time.time() - older_than_seconds,))
+
+    def leave(self):
+        """Drop our lease so the others take over immediately."""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM instances WHERE instance_id = ?", (self.instance_id,))
+        finally:
+            self._conn.close()
+
+    async def run(self):
+        last_purge = 0.0
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    await asyncio.to_thread(self.purge)
+            except Exception as exc:
+                logger.error(f"[shard] heartbeat failed: {exc}")
+            await asyncio.sleep(self.lease_ttl_seconds / 3)
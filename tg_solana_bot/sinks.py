@@ -0,0 +1,296 @@
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from tg_solana_bot.memory import approx_size
+from tg_solana_bot.transport import HttpTransport
+
+logger = logging.getLogger(__name__)
+
+
+class SinkEvent:
+    """One classified event, or a later update to it, as handed to every sink.
+
+    ``kind`` is ``alert`` (new notifiable event), ``event`` (classified but
+    not alerted, e.g. a transfer to the secondary wallet) or ``update`` (a
+    new caption or status for an earlier alert).
+    """
+
+    __slots__ = ("kind", "key", "event_type", "status", "caption", "media_url", "details", "usd", "slot", "block_time", "created_at")
+
+    def __init__(
+        self,
+        kind: str,
+        key: str,
+        event_type: str = "",
+        status: str = "confirmed",
+        caption: str = "",
+        media_url: str = "",
+        details: Optional[Dict[str, Any]] = None,
+        usd: Optional[float] = None,
+        slot: int = 0,
+        block_time: Optional[int] = None,
+    ):
+        self.kind = kind
+        self.key = key
+        self.event_type = event_type
+        self.status = status
+        self.caption = caption
+        self.media_url = media_url
+        self.details = details or {}
+        self.usd = usd
+        self.slot = slot
+        self.block_time = block_time
+        self.created_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class EventSink:
+    """Destination for events.
+
+    Sinks run behind their own queue and worker in ``SinkFanout``, so a slow
+    or failing sink only backs up itself. A ``durable`` sink is written
+    synchronously on emit instead, because it keeps its own persistent queue
+    and must not lose events that the checkpoint has already moved past.
+    """
+
+    name = "sink"
+    durable = False
+    batch_size = 1
+    linger_seconds = 0.0
+
+    async def send(self, events: List[SinkEvent]) -> None:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class TelegramSink(EventSink):
+    """Alerts and caption updates go into the durable Telegram outbox."""
+
+    name = "telegram"
+    durable = True
+
+    def __init__(self, outbox, outbox_worker, notifier):
+        self.outbox = outbox
+        self.outbox_worker = outbox_worker
+        self.notifier = notifier
+
+    async def send(self, events: List[SinkEvent]) -> None:
+        for event in events:
+            if event.kind == "alert":
+                await self.outbox_worker.wait_for_capacity()
+                payload = {"media_url": event.media_url, "caption": event.caption, "media_type": "photo"}
+                self.outbox.enqueue_send(event.key, self.notifier.chat_ids, payload)
+            elif event.kind == "update" and event.caption:
+                self.outbox.enqueue_edit(event.key, self.notifier.chat_ids, event.caption)
+            else:
+                continue
+            self.outbox_worker.wake()
+
+
+class JsonlFileSink(EventSink):
+    """Appends events as JSON lines, rotating into gzip files at ``max_bytes``."""
+
+    name = "jsonl"
+    batch_size = 200
+    linger_seconds = 0.5
+
+    def __init__(self, file_path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 10):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._ensure_directory()
+
+    def _ensure_directory(self):
+        """Ensure the directory for the event log exists."""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    async def send(self, events: List[SinkEvent]) -> None:
+        lines = "".join(json.dumps(e.to_dict(), separators=(",", ":")) + "\n" for e in events)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: str):
+        with open(self.file_path, "a") as f:
+            f.write(lines)
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        rotated = f"{self.file_path}.{stamp}"
+        n = 1
+        while os.path.exists(f"{rotated}.gz"):
+            rotated = f"{self.file_path}.{stamp}-{n}"
+            n += 1
+        os.replace(self.file_path, rotated)
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        archives = sorted(glob.glob(f"{glob.escape(self.file_path)}.*.gz"), key=os.path.getmtime)
+        for old in archives[:max(len(archives) - self.backups, 0)]:
+            os.remove(old)
+        logger.info(f"[sink] rotated {self.file_path} -> {rotated}.gz")
+
+
+class WebhookSink(EventSink):
+    """POSTs batches of events as ``{"events": [...]}`` over the shared keep-alive pool."""
+
+    name = "webhook"
+
+    def __init__(
+        self,
+        url: str,
+        transport: HttpTransport,
+        token: str = "",
+        batch_size: int = 50,
+        linger_seconds: float = 1.0,
+        max_attempts: int = 5,
+    ):
+        self.url = url
+        self.transport = transport
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.max_attempts = max_attempts
+
+    async def send(self, events: List[SinkEvent]) -> None:
+        body = {"events": [e.to_dict() for e in events]}
+        for attempt in range(self.max_attempts):
+            try:
+                session = await self.transport.get_session()
+                async with session.post(self.url, json=body, headers=self.headers, timeout=self.transport.timeout(read=10)) as response:
+                    if response.status < 300:
+                        return
+                    if 400 <= response.status < 500 and response.status != 429:
+                        logger.error(f"[sink] webhook rejected {len(events)} events: HTTP {response.status}")
+                        return
+                    logger.warning(f"[sink] webhook HTTP {response.status}, attempt {attempt + 1}/{self.max_attempts}")
+            except Exception as exc:
+                logger.warning(f"[sink] webhook failed: {exc}, attempt {attempt + 1}/{self.max_attempts}")
+            await asyncio.sleep(min(2 ** attempt, 30))
+        logger.error(f"[sink] webhook dropped {len(events)} events after {self.max_attempts} attempts")
+
+
+class SinkFanout:
+    """Hands every event to all sinks concurrently, each behind its own bounded queue.
+
+    ``emit`` never waits on a queued sink: when a sink's queue is full its
+    oldest event is dropped and counted, and ingestion carries on. The
+    queues are registered with the memory budget, which drops their oldest
+    events the same way when memory runs short.
+    """
+
+    def __init__(self, sinks: List[EventSink], queue_size: int = 1000):
+        self.sinks = sinks
+        self.queue_size = queue_size
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.dropped: Dict[str, int] = {}
+        self._last_event: Optional[SinkEvent] = None
+
+    def start(self):
+        for sink in self.sinks:
+            if sink.durable:
+                continue
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[sink.name] = queue
+            self._tasks.append(asyncio.create_task(self._worker(sink, queue)))
+        logger.info(f"[sink] fan-out to {', '.join(s.name for s in self.sinks)}")
+
+    async def emit(self, event: SinkEvent):
+        """Queue ``event`` for every sink, then write it to the durable ones.
+
+        Queued sinks get the event first so a slow durable write never
+        delays them. Raises if a durable sink cannot take it.
+        """
+        for sink in self.sinks:
+            queue = self._queues.get(sink.name)
+            if sink.durable or queue is None:
+                continue
+            if queue.full():
+                queue.get_nowait()
+                queue.task_done()
+                self._count_dropped(sink.name, 1)
+            queue.put_nowait(event)
+        self._last_event = event
+        for sink in self.sinks:
+            if sink.durable:
+                await sink.send([event])
+
+    def _count_dropped(self, name: str, count: int):
+        before = self.dropped.get(name, 0)
+        self.dropped[name] = before + count
+        if not before or before // 100 != self.dropped[name] // 100:
+            logger.warning(f"[sink] {name} queue full, dropped {self.dropped[name]} events so far")
+
+    def approx_bytes(self) -> int:
+        """Estimated size of the queued events, from the most recent one."""
+        if self._last_event is None:
+            return 0
+        return approx_size(self._last_event) * sum(self.pending().values())
+
+    def shrink(self, fraction: float) -> int:
+        """Drop the oldest ``fraction`` of every sink's queued events."""
+        removed = 0
+        for name, queue in self._queues.items():
+            count = int(queue.qsize() * fraction)
+            for _ in range(count):
+                queue.get_nowait()
+                queue.task_done()
+            if count:
+                self._count_dropped(name, count)
+            removed += count
+        return removed
+
+    def pending(self) -> Dict[str, int]:
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    async def _worker(self, sink: EventSink, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + sink.linger_seconds
+            while len(batch) < sink.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await sink.send(batch)
+            except Exception as exc:
+                logger.error(f"[sink] {sink.name} failed on {len(batch)} events: {exc}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def close(self, timeout: float = 5.0):
+        """Flush queued events within ``timeout``, then stop the workers and close the sinks."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues.values())), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[sink] unflushed events at shutdown: {self.pending()}")
+        for task in self._tasks:
+            task.cancel()
+        for sink in self.sinks:
+            try:
+                await sink.close()
+            except Exception as exc:
+                logger.error(f"[sink] closing {sink.name} failed: {exc}")
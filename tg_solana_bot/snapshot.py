@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class WarmStartSnapshot:
+    """JSON snapshot of in-memory caches, reloaded on the next start.
+
+    Holds the token-account registry, price cache, mint metadata and the
+    recent-signature dedup window so a restarted machine can poll right
+    away instead of rediscovering everything.
+    """
+
+    def __init__(self, file_path: str, max_age_seconds: float = 6 * 3600):
+        self.file_path = file_path
+        self.max_age_seconds = max_age_seconds
+        self._ensure_directory()
+
+    def _ensure_directory(self):
+        """Ensure the directory for the snapshot file exists."""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def load(self) -> Dict[str, Any]:
+        """Return the saved sections, or {} if missing, stale or unreadable."""
+        try:
+            if not os.path.exists(self.file_path):
+                return {}
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                logger.info("Ignoring snapshot written by another version")
+                return {}
+            age = time.time() - float(data.get("saved_at", 0))
+            if age > self.max_age_seconds:
+                logger.info(f"Ignoring stale snapshot ({age:.0f}s old)")
+                return {}
+            return data.get("sections", {})
+        except Exception as e:
+            logger.error(f"Error loading snapshot: {e}")
+            return {}
+
+    def save(self, sections: Dict[str, Any]) -> bool:
+        try:
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": SNAPSHOT_VERSION, "saved_at": time.time(), "sections": sections}, f)
+            os.replace(tmp_path, self.file_path)
+            logger.info(f"Saved warm-start snapshot to {self.file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving snapshot: {e}")
+            return False
@@ -1,14 +1,49 @@
 import aiohttp
 import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import Callable, FrozenSet, List, Dict, Any, Optional, Set, Tuple, Union
+
+from tg_solana_bot.governor import RequestGovernor
+from tg_solana_bot.memory import sampled_size
+from tg_solana_bot.models import ParsedTransaction
+from tg_solana_bot.transport import HttpTransport
+from tg_solana_bot.offload import Offloader
+from tg_solana_bot.tx_decoder import decode_block_matches, decode_parsed_transaction, decode_transaction_response
 
 logger = logging.getLogger(__name__)
 
 class SolanaClient:
-    def __init__(self, rpc_url: str, alt_rpc_url: str = ""):
+    def __init__(
+        self,
+        rpc_url: str,
+        alt_rpc_url: str = "",
+        transport: Optional[HttpTransport] = None,
+        fast_decode: bool = True,
+        rpc_trim: bool = False,
+        commitment: Optional[str] = "confirmed",
+        token_accounts_ttl_seconds: float = 600.0,
+        offloader: Optional[Offloader] = None,
+        governor: Optional[RequestGovernor] = None,
+    ):
         self.rpc_url = rpc_url
         self.alt_rpc_url = alt_rpc_url
+        self.commitment = commitment
+        self.token_accounts_ttl_seconds = token_accounts_ttl_seconds
+        # owner -> (fetched_at epoch, token account pubkeys)
+        self._token_accounts: Dict[str, Tuple[float, List[str]]] = {}
+        # Owners restored from the warm-start snapshot and not refetched since.
+        self._restored_owners: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self.fast_decode = fast_decode
+        self.rpc_trim = rpc_trim
+        # Runs response decoders off the event loop when set.
+        self.offloader = offloader
+        # Admits requests by priority under the provider's rate limit when set.
+        self.governor = governor
+        self.transport = transport or HttpTransport()
+        self._owns_transport = transport is None
         self.session: Optional[aiohttp.ClientSession] = None
         self._retry_delays = [1, 2, 4, 8, 16]  # Exponential backoff
 
@@ -20,15 +55,22 @@ class SolanaClient:
         await self.close()
 
     async def _ensure_session(self):
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        if self.session is None or self.session.closed:
+            self.session = await self.transport.get_session()
 
     async def close(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self._owns_transport:
+            await self.transport.close()
+        self.session = None
 
-    async def _make_request(self, method: str, params: List[Any], max_retries: int = 3) -> Optional[Dict[str, Any]]:
+    async def _make_request(
+        self,
+        method: str,
+        params: List[Any],
+        max_retries: int = 3,
+        decoder: Optional[Callable[[bytes], Dict[str, Any]]] = None,
+        priority: str = "polling",
+    ) -> Optional[Dict[str, Any]]:
         await self._ensure_session()
         
         payload = {
@@ -40,10 +82,17 @@ class SolanaClient:
 
         for attempt in range(max_retries):
             try:
-                async with self.session.post(self.rpc_url, json=payload, timeout=30) as response:
+                if self.governor is not None:
+                    await self.governor.acquire(method, priority)
+                async with self.session.post(self.rpc_url, json=payload) as response:
                     if response.status == 429:  # Rate limit
                         if attempt < len(self._retry_delays):
                             delay = self._retry_delays[attempt]
+                            if self.governor is not None:
+                                # Pause every caller, not just this one; the retry queues by priority.
+                                retry_after = response.headers.get("Retry-After", "")
+                                self.governor.penalize(float(retry_after) if retry_after.isdigit() else delay)
+                                continue
                             logger.warning(f"Rate limited, retrying in {delay}s...")
                             await asyncio.sleep(delay)
                             continue
@@ -55,8 +104,15 @@ class SolanaClient:
                         logger.error(f"HTTP {response.status}: {await response.text()}")
                         return None
                     
-                    data = await response.json()
-                    if "error" in data:
+                    if decoder is not None:
+                        body = await response.read()
+                        if self.offloader is not None:
+                            data = await self.offloader.run(decoder, body)
+                        else:
+                            data = decoder(body)
+                    else:
+                        data = await self.transport.read_json(response)
+                    if data.get("error") is not None:
                         logger.error(f"RPC error: {data['error']}")
                         return None
                     
@@ -75,26 +131,191 @@ class SolanaClient:
         
         return None
 
-    async def get_signatures_for_address(self, address: str, before: Optional[str] = None, limit: int = 25) -> List[Dict[str, Any]]:
-        params = [address, {"limit": limit}]
+    def _with_commitment(self, config: Dict[str, Any], commitment: Optional[str] = None) -> Dict[str, Any]:
+        level = commitment or self.commitment
+        if level:
+            config["commitment"] = level
+        return config
+
+    async def get_signatures_for_address(
+        self,
+        address: str,
+        before: Optional[str] = None,
+        limit: int = 25,
+        commitment: Optional[str] = None,
+        until: Optional[str] = None,
+        priority: str = "polling",
+    ) -> List[Dict[str, Any]]:
+        params = [address, self._with_commitment({"limit": limit}, commitment)]
         if before:
             params[1]["before"] = before
+        if until:
+            params[1]["until"] = until
         
-        result = await self._make_request("getSignaturesForAddress", params)
+        result = await self._make_request("getSignaturesForAddress", params, priority=priority)
         return result or []
 
-    async def get_transaction(self, signature: str) -> Optional[Dict[str, Any]]:
-        params = [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0}]
-        return await self._make_request("getTransaction", params)
+    async def get_transaction(
+        self,
+        signature: str,
+        fast: Optional[bool] = None,
+        commitment: Optional[str] = None,
+        priority: str = "live",
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch a transaction; the fast path decodes only the fields the parser reads."""
+        use_fast = self.fast_decode if fast is None else fast
+        decoder = decode_transaction_response if use_fast else None
+        params = self._transaction_params(signature, commitment)
+        return await self._make_request("getTransaction", params, decoder=decoder, priority=priority)
+
+    async def get_parsed_transaction(self, signature: str, priority: str = "live") -> Optional[ParsedTransaction]:
+        """Fetch a transaction and reduce it to a ParsedTransaction straight away.
+
+        Decoding and the reduction happen in a single decoder call, so with an
+        offloader neither touches the event loop thread.
+        """
+        decoder = functools.partial(decode_parsed_transaction, signature=signature, fast=self.fast_decode)
+        params = self._transaction_params(signature)
+        return await self._make_request("getTransaction", params, decoder=decoder, priority=priority)
+
+    def _transaction_params(self, signature: str, commitment: Optional[str] = None) -> List[Any]:
+        config: Dict[str, Any] = self._with_commitment(
+            {"encoding": "json", "maxSupportedTransactionVersion": 0}, commitment
+        )
+        if self.rpc_trim:
+            # Honoured by providers that accept getBlock-style trimming on getTransaction.
+            config["rewards"] = False
+        return [signature, config]
+
+    def _block_commitment(self) -> Dict[str, Any]:
+        # Block methods reject "processed".
+        return {"commitment": self.commitment if self.commitment == "finalized" else "confirmed"}
+
+    async def get_slot(self, priority: str = "polling") -> int:
+        result = await self._make_request("getSlot", [self._block_commitment()], priority=priority)
+        if result is None:
+            raise RuntimeError("getSlot returned no result")
+        return int(result)
+
+    async def get_blocks(self, start_slot: int, end_slot: int, priority: str = "polling") -> List[int]:
+        """Slots between ``start_slot`` and ``end_slot`` (inclusive) that produced a block."""
+        params = [start_slot, end_slot, self._block_commitment()]
+        result = await self._make_request("getBlocks", params, priority=priority)
+        if result is None:
+            raise RuntimeError("getBlocks returned no result")
+        return result
+
+    async def get_block_matches(
+        self, slot: int, watched: FrozenSet[str], priority: str = "polling"
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch a full block and keep the transactions touching ``watched`` (see ``decode_block_matches``)."""
+        config = {
+            "encoding": "json",
+            "maxSupportedTransactionVersion": 0,
+            "transactionDetails": "full",
+            "rewards": False,
+        }
+        config.update(self._block_commitment())
+        decoder = functools.partial(decode_block_matches, slot=slot, watched=watched, fast=self.fast_decode)
+        return await self._make_request("getBlock", [slot, config], decoder=decoder, priority=priority)
+
+    async def get_signature_statuses(
+        self, signatures: List[str], search_transaction_history: bool = True
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Return the status of each signature (None when the cluster does not know it)."""
+        statuses: List[Optional[Dict[str, Any]]] = []
+        for i in range(0, len(signatures), 256):  # RPC limit per call
+            chunk = signatures[i:i + 256]
+            params = [chunk, {"searchTransactionHistory": search_transaction_history}]
+            result = await self._make_request("getSignatureStatuses", params, priority="polling")
+            if not result or "value" not in result:
+                raise RuntimeError("getSignatureStatuses returned no result")
+            statuses.extend(result["value"])
+        return statuses
+
+    async def get_multiple_accounts(
+        self, pubkeys: List[str], encoding: str = "jsonParsed", priority: str = "polling"
+    ) -> Tuple[int, List[Optional[Dict[str, Any]]]]:
+        """Return (slot, accounts) for ``pubkeys``, None for accounts that do not exist."""
+        slot = 0
+        accounts: List[Optional[Dict[str, Any]]] = []
+        for i in range(0, len(pubkeys), 100):  # RPC limit per call
+            params = [pubkeys[i:i + 100], self._with_commitment({"encoding": encoding})]
+            result = await self._make_request("getMultipleAccounts", params, priority=priority)
+            if not result or "value" not in result:
+                raise RuntimeError("getMultipleAccounts returned no result")
+            slot = max(slot, int((result.get("context") or {}).get("slot") or 0))
+            accounts.extend(result["value"])
+        return slot, accounts
 
     async def get_token_accounts_by_owner(self, owner: str) -> List[str]:
+        """Token accounts of ``owner``, served from the registry while fresh.
+
+        An expired entry restored from the warm-start snapshot is served
+        once as is while it is refetched in the background.
+        """
+        cached = self._token_accounts.get(owner)
+        if cached and time.time() - cached[0] < self.token_accounts_ttl_seconds:
+            return list(cached[1])
+        if cached and owner in self._restored_owners:
+            self._restored_owners.discard(owner)
+            task = asyncio.create_task(self._refresh_token_accounts(owner))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return list(cached[1])
+        return await self._refresh_token_accounts(owner)
+
+    async def _refresh_token_accounts(self, owner: str) -> List[str]:
+        cached = self._token_accounts.get(owner)
+        try:
+            token_accounts = await self._fetch_token_accounts_by_owner(owner)
+        except Exception as exc:
+            if cached is None:
+                raise
+            logger.error(f"Refreshing token accounts for {owner} failed: {exc}")
+            return list(cached[1])
+        if token_accounts or cached is None:
+            self._token_accounts[owner] = (time.time(), token_accounts)
+            return token_accounts
+        # Keep the previous list rather than dropping accounts on a failed lookup.
+        return list(cached[1])
+
+    def approx_bytes(self) -> int:
+        return sampled_size(self._token_accounts)
+
+    def shrink(self, fraction: float) -> int:
+        """Forget the least recently fetched ``fraction`` of owners; they are refetched on demand."""
+        count = int(len(self._token_accounts) * fraction)
+        for owner, _ in sorted(self._token_accounts.items(), key=lambda kv: kv[1][0])[:count]:
+            del self._token_accounts[owner]
+        self._token_accounts = dict(self._token_accounts)
+        return count
+
+    def export_token_accounts(self) -> Dict[str, Any]:
+        return {owner: {"fetched_at": ts, "accounts": accounts} for owner, (ts, accounts) in self._token_accounts.items()}
+
+    def import_token_accounts(self, data: Dict[str, Any]):
+        for owner, entry in data.items():
+            self._token_accounts[owner] = (float(entry.get("fetched_at", 0)), list(entry.get("accounts", [])))
+            self._restored_owners.add(owner)
+
+    async def get_token_accounts_for_mint(self, owner: str, mint: str) -> List[str]:
+        """Token accounts of ``owner`` holding ``mint``; not cached."""
+        params = [owner, {"mint": mint}, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}]
+        result = await self._make_request("getTokenAccountsByOwner", params, priority="discovery")
+        if not result or "value" not in result:
+            raise RuntimeError("getTokenAccountsByOwner returned no result")
+        return [account["pubkey"] for account in result["value"] if "pubkey" in account]
+
+    async def _fetch_token_accounts_by_owner(self, owner: str) -> List[str]:
         params = [
             owner,
             {"programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"},
-            {"encoding": "jsonParsed"}
+            # Only the pubkeys are used: skip the account data entirely.
+            {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}},
         ]
         
-        result = await self._make_request("getTokenAccountsByOwner", params)
+        result = await self._make_request("getTokenAccountsByOwner", params, priority="discovery")
         if not result or "value" not in result:
             return []
         
@@ -105,7 +326,9 @@ class SolanaClient:
         
         return token_accounts
 
-    def get_first_signer_address(self, transaction: Dict[str, Any]) -> Optional[str]:
+    def get_first_signer_address(self, transaction: Union[ParsedTransaction, Dict[str, Any]]) -> Optional[str]:
+        if isinstance(transaction, ParsedTransaction):
+            return transaction.signer
         try:
             if "transaction" in transaction and "message" in transaction["transaction"]:
                 message = transaction["transaction"]["message"]
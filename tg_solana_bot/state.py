@@ -1,10 +1,27 @@
 import json
 import logging
 import os
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from tg_solana_bot.memory import sampled_size
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Reserved key holding the per-address finalized checkpoints; top-level
+# address keys remain the confirmed checkpoints used for polling.
+FINALIZED_KEY = "_finalized"
+# Reserved key holding signatures skipped after repeated fetch failures.
+DEAD_LETTER_KEY = "_dead_letters"
+MAX_DEAD_LETTERS = 500
+
 class StateStore:
     def __init__(self, file_path: str):
         self.file_path = file_path
@@ -16,6 +33,25 @@ class StateStore:
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
 
+    @contextmanager
+    def _locked(self):
+        """Serialise read-modify-write cycles between processes sharing the file."""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.file_path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, data: Dict):
+        tmp_path = f"{self.file_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.file_path)
+
     def load_last_signature(self, address: str) -> Optional[str]:
         """Load the last processed signature for a given address."""
         try:
@@ -32,18 +68,18 @@ class StateStore:
     def save_last_signature(self, address: str, signature: str) -> bool:
         """Save the last processed signature for a given address."""
         try:
-            # Load existing data
-            data = {}
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
-            
-            # Update with new signature
-            data[address] = signature
-            
-            # Save back to file
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            with self._locked():
+                # Load existing data
+                data = {}
+                if os.path.exists(self.file_path):
+                    with open(self.file_path, 'r') as f:
+                        data = json.load(f)
+
+                # Update with new signature
+                data[address] = signature
+
+                # Save back to file
+                self._write(data)
             
             logger.info(f"Saved last signature for {address}: {signature[:50]}...")
             return True
@@ -51,14 +87,101 @@ class StateStore:
             logger.error(f"Error saving last signature for {address}: {e}")
             return False
 
+    def save_last_signatures(self, signatures: Dict[str, str]) -> bool:
+        """Save several checkpoints with a single write."""
+        try:
+            with self._locked():
+                data = {}
+                if os.path.exists(self.file_path):
+                    with open(self.file_path, 'r') as f:
+                        data = json.load(f)
+
+                data.update(signatures)
+
+                self._write(data)
+
+            logger.info(f"Saved last signatures for {len(signatures)} keys")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving last signatures: {e}")
+            return False
+
+    def load_finalized_signature(self, address: str) -> Optional[str]:
+        """Load the last signature known to be finalized for a given address."""
+        try:
+            if not os.path.exists(self.file_path):
+                return None
+
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+                return data.get(FINALIZED_KEY, {}).get(address)
+        except Exception as e:
+            logger.error(f"Error loading finalized signature for {address}: {e}")
+            return None
+
+    def save_finalized_signature(self, address: str, signature: str) -> bool:
+        """Save the last signature known to be finalized for a given address."""
+        try:
+            with self._locked():
+                data = {}
+                if os.path.exists(self.file_path):
+                    with open(self.file_path, 'r') as f:
+                        data = json.load(f)
+
+                data.setdefault(FINALIZED_KEY, {})[address] = signature
+
+                self._write(data)
+
+            logger.info(f"Saved finalized signature for {address}: {signature[:50]}...")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving finalized signature for {address}: {e}")
+            return False
+
+    def record_dead_letter(self, signature: str, address: str, reason: str) -> bool:
+        """Record a signature the checkpoint moved past without processing it."""
+        try:
+            with self._locked():
+                data = {}
+                if os.path.exists(self.file_path):
+                    with open(self.file_path, 'r') as f:
+                        data = json.load(f)
+
+                dead = data.setdefault(DEAD_LETTER_KEY, {})
+                dead[signature] = {"address": address, "reason": reason, "at": time.time()}
+                for old in list(dead)[:max(len(dead) - MAX_DEAD_LETTERS, 0)]:
+                    del dead[old]
+
+                self._write(data)
+
+            logger.warning(f"Dead-lettered signature {signature} for {address}: {reason}")
+            return True
+        except Exception as e:
+            logger.error(f"Error recording dead letter {signature}: {e}")
+            return False
+
+    def load_dead_letters(self) -> Dict[str, Dict]:
+        """Signatures skipped after repeated failures, oldest first."""
+        try:
+            if not os.path.exists(self.file_path):
+                return {}
+
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+                return data.get(DEAD_LETTER_KEY, {})
+        except Exception as e:
+            logger.error(f"Error loading dead letters: {e}")
+            return {}
+
     def get_all_signatures(self) -> Dict[str, str]:
-        """Get all saved signatures."""
+        """Get all saved (confirmed) signatures."""
         try:
             if not os.path.exists(self.file_path):
                 return {}
             
             with open(self.file_path, 'r') as f:
-                return json.load(f)
+                data = json.load(f)
+                return {k: v for k, v in data.items() if k not in (FINALIZED_KEY, DEAD_LETTER_KEY)}
         except Exception as e:
             logger.error(f"Error loading all signatures: {e}")
             return {}
@@ -75,3 +198,51 @@ class StateStore:
             return False
 
 
+
+
+class RecentSignatures:
+    """Bounded, insertion-ordered window of recently processed signatures."""
+
+    def __init__(self, max_size: int = 2000):
+        self.max_size = max_size
+        self.capacity = max_size
+        self._sigs: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, signature: str) -> bool:
+        return signature in self._sigs
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def add(self, signature: str):
+        self._sigs[signature] = None
+        self._sigs.move_to_end(signature)
+        while len(self._sigs) > self.max_size:
+            self._sigs.popitem(last=False)
+
+    def approx_bytes(self) -> int:
+        return sampled_size(self._sigs)
+
+    def shrink(self, fraction: float, floor: int = 100) -> int:
+        """Drop the oldest ``fraction`` and lower ``max_size`` so the window stays smaller."""
+        count = min(int(len(self._sigs) * fraction), max(len(self._sigs) - floor, 0))
+        for _ in range(count):
+            self._sigs.popitem(last=False)
+        # Dicts never give back their hash table; copying does.
+        self._sigs = OrderedDict(self._sigs)
+        self.max_size = max(len(self._sigs), floor)
+        return count
+
+    def restore(self) -> bool:
+        """Double ``max_size`` back towards its configured capacity; False if already there."""
+        if self.max_size >= self.capacity:
+            return False
+        self.max_size = min(self.max_size * 2, self.capacity)
+        return True
+
+    def export(self) -> List[str]:
+        return list(self._sigs)
+
+    def load(self, signatures: List[str]):
+        for signature in signatures[-self.max_size:]:
+            self.add(signature)
@@ -0,0 +1,29 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+
+@dataclass
+class RuntimeStatus:
+    """In-memory counters describing what the bot is doing."""
+    started_at: float = field(default_factory=time.monotonic)
+    started_wall: float = field(default_factory=time.time)
+    first_poll_at: Optional[float] = None
+    cycles: int = 0
+    last_cycle_started: Optional[float] = None
+    last_cycle_seconds: Optional[float] = None
+    last_poll_by_wallet: Dict[str, float] = field(default_factory=dict)
+    events_by_type: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def time_to_first_poll(self) -> Optional[float]:
+        if self.first_poll_at is None:
+            return None
+        return self.first_poll_at - self.started_at
+
+    @property
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def record_event(self, event_type: str):
+        self.events_by_type[event_type] = self.events_by_type.get(event_type, 0) + 1
@@ -0,0 +1,97 @@
+import aiohttp
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from tg_solana_bot.fastjson import json_loads
+
+logger = logging.getLogger(__name__)
+
+
+class HttpTransport:
+    """Shared, connection-pooled aiohttp session used by every client.
+
+    One ``TCPConnector`` keeps keep-alive connections per host, caches DNS
+    lookups and caps the number of sockets, so the RPC, price and Telegram
+    clients reuse TLS connections instead of each opening their own pool.
+    """
+
+    def __init__(
+        self,
+        limit: int = 20,
+        limit_per_host: int = 8,
+        dns_ttl_seconds: int = 300,
+        keepalive_seconds: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl_seconds = dns_ttl_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> "HttpTransport":
+        return cls(
+            limit=settings.http_pool_limit,
+            limit_per_host=settings.http_pool_limit_per_host,
+            dns_ttl_seconds=settings.http_dns_ttl_seconds,
+            keepalive_seconds=settings.http_keepalive_seconds,
+            connect_timeout=settings.http_connect_timeout_seconds,
+            read_timeout=settings.http_read_timeout_seconds,
+        )
+
+    async def __aenter__(self):
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            async with self._lock:
+                if self.session is None or self.session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=self.limit,
+                        limit_per_host=self.limit_per_host,
+                        ttl_dns_cache=self.dns_ttl_seconds,
+                        keepalive_timeout=self.keepalive_seconds,
+                        enable_cleanup_closed=True,
+                    )
+                    self.session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=self.timeout(),
+                        json_serialize=json.dumps,
+                    )
+                    logger.info(
+                        f"HTTP transport started (limit={self.limit}, per_host={self.limit_per_host}, "
+                        f"dns_ttl={self.dns_ttl_seconds}s, keepalive={self.keepalive_seconds}s)"
+                    )
+        return self.session
+
+    def timeout(self, read: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """Build a timeout with separate connect and socket-read limits."""
+        sock_read = read if read is not None else self.read_timeout
+        return aiohttp.ClientTimeout(
+            total=self.connect_timeout + 2 * sock_read,
+            connect=self.connect_timeout,
+            sock_connect=self.connect_timeout,
+            sock_read=sock_read,
+        )
+
+    async def read_json(self, response: aiohttp.ClientResponse) -> Any:
+        """Read a response body and decode it with the fast JSON path."""
+        body = await response.read()
+        return json_loads(body)
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
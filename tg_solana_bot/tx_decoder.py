@@ -0,0 +1,173 @@
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from tg_solana_bot.fastjson import json_loads
+from tg_solana_bot.models import ParsedTransaction, account_keys
+
+try:
+    import msgspec
+    from typing import TypedDict
+except ImportError:  # pragma: no cover - optional speedup
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+# Keys of a getTransaction result that TransactionParser never reads. They are
+# usually the bulk of the payload (program logs, CPI trees, rewards).
+_UNUSED_META_KEYS = (
+    "logMessages",
+    "innerInstructions",
+    "rewards",
+    "returnData",
+    "computeUnitsConsumed",
+    "status",
+)
+
+
+if msgspec is not None:
+
+    class _UiTokenAmount(TypedDict, total=False):
+        amount: str
+        decimals: int
+        uiAmount: Optional[float]
+        uiAmountString: str
+
+    class _TokenBalance(TypedDict, total=False):
+        accountIndex: int
+        mint: str
+        owner: str
+        programId: str
+        uiTokenAmount: _UiTokenAmount
+
+    class _LoadedAddresses(TypedDict, total=False):
+        writable: List[str]
+        readonly: List[str]
+
+    class _Meta(TypedDict, total=False):
+        err: Any
+        fee: int
+        preBalances: List[int]
+        postBalances: List[int]
+        preTokenBalances: List[_TokenBalance]
+        postTokenBalances: List[_TokenBalance]
+        loadedAddresses: _LoadedAddresses
+
+    class _Instruction(TypedDict, total=False):
+        programIdIndex: int
+        accounts: List[int]
+        data: str
+
+    class _Message(TypedDict, total=False):
+        accountKeys: List[Any]
+        instructions: List[_Instruction]
+
+    class _Transaction(TypedDict, total=False):
+        signatures: List[str]
+        message: _Message
+
+    class _TransactionResult(TypedDict, total=False):
+        slot: int
+        blockTime: Optional[int]
+        meta: Optional[_Meta]
+        transaction: _Transaction
+
+    class _TransactionResponse(TypedDict, total=False):
+        jsonrpc: str
+        id: Any
+        result: Optional[_TransactionResult]
+        error: Any
+
+    class _BlockResult(TypedDict, total=False):
+        blockTime: Optional[int]
+        parentSlot: int
+        transactions: List[_TransactionResult]
+
+    class _BlockResponse(TypedDict, total=False):
+        jsonrpc: str
+        id: Any
+        result: Optional[_BlockResult]
+        error: Any
+
+    _msgspec_decoder = msgspec.json.Decoder(_TransactionResponse)
+    _msgspec_block_decoder = msgspec.json.Decoder(_BlockResponse)
+else:
+    _msgspec_decoder = None
+    _msgspec_block_decoder = None
+
+
+def trim_transaction(tx: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Drop the parts of a decoded transaction the parser does not use."""
+    if not tx:
+        return tx
+    meta = tx.get("meta")
+    if meta:
+        for key in _UNUSED_META_KEYS:
+            meta.pop(key, None)
+    tx.pop("version", None)
+    message = tx.get("transaction", {}).get("message")
+    if message:
+        message.pop("addressTableLookups", None)
+        message.pop("header", None)
+        message.pop("recentBlockhash", None)
+    return tx
+
+
+def decode_transaction_response(body: bytes) -> Dict[str, Any]:
+    """Decode a getTransaction JSON-RPC response keeping only parser fields.
+
+    Uses msgspec typed decoding when installed (unused fields are never
+    materialised), otherwise orjson/stdlib followed by ``trim_transaction``.
+    """
+    if _msgspec_decoder is not None:
+        return _msgspec_decoder.decode(body)
+    data = json_loads(body)
+    if isinstance(data, dict):
+        trim_transaction(data.get("result"))
+    return data
+
+
+def decode_parsed_transaction(body: bytes, signature: Optional[str] = None, fast: bool = True) -> Dict[str, Any]:
+    """Decode a getTransaction response and reduce ``result`` to a ParsedTransaction.
+
+    Module-level so the whole step can run in an offload worker, which then
+    hands back only the small model instead of the decoded tree.
+    """
+    data = decode_transaction_response(body) if fast else json_loads(body)
+    if isinstance(data, dict) and data.get("result"):
+        data["result"] = ParsedTransaction.from_rpc(data["result"], signature)
+    return data
+
+
+def decode_block_matches(body: bytes, slot: int, watched: FrozenSet[str], fast: bool = True) -> Dict[str, Any]:
+    """Decode a getBlock response, keeping only successful transactions that touch ``watched``.
+
+    ``result`` becomes ``{"blockTime": ..., "matches": [(ParsedTransaction,
+    matched addresses), ...]}`` in block order, so a worker hands back a
+    few small models instead of the whole block.
+    """
+    if fast and _msgspec_block_decoder is not None:
+        data = _msgspec_block_decoder.decode(body)
+    else:
+        data = json_loads(body)
+    block = data.get("result") if isinstance(data, dict) else None
+    if block:
+        block_time = block.get("blockTime")
+        matches = []
+        for tx in block.get("transactions") or []:
+            if (tx.get("meta") or {}).get("err") is not None:
+                continue
+            matched = tuple(dict.fromkeys(k for k in account_keys(tx) if k in watched))
+            if not matched:
+                continue
+            tx["slot"] = slot
+            tx["blockTime"] = block_time
+            matches.append((ParsedTransaction.from_rpc(tx), matched))
+        data["result"] = {"blockTime": block_time, "matches": matches}
+    return data
+
+
+def decoder_name() -> str:
+    if _msgspec_decoder is not None:
+        return "msgspec"
+    from tg_solana_bot import fastjson
+    return "orjson+trim" if fastjson.orjson is not None else "json+trim"
@@ -1,5 +1,8 @@
 import logging
-from typing import Dict, Any, Tuple, Optional
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Tuple, Optional, Union
+
+from tg_solana_bot.models import ParsedTransaction, TokenBalance
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +13,7 @@ class TransactionParser:
         self.bullieve_mint = bullieve_mint
         self.incinerator = incinerator
 
-    def parse_transaction_raw(self, tx: Dict[str, Any], primary_wallet: str, secondary_wallet: str, bullieve_mint: str, incinerator: str) -> Tuple[str, Dict[str, Any]]:
+    def parse_transaction_raw(self, tx: Union[ParsedTransaction, Dict[str, Any]], primary_wallet: str, secondary_wallet: str, bullieve_mint: str, incinerator: str) -> Tuple[str, Dict[str, Any]]:
         """Parse a raw transaction and classify the event type."""
         try:
             # Update instance variables with passed parameters
@@ -24,9 +27,12 @@ class TransactionParser:
             logger.error(f"Error parsing transaction: {e}")
             return "unknown", {}
 
-    def classify_event(self, tx: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    def classify_event(self, tx: Union[ParsedTransaction, Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
         """Classify the type of event in the transaction."""
         try:
+            if not isinstance(tx, ParsedTransaction):
+                tx = ParsedTransaction.from_rpc(tx)
+
             # Check for burn events first (explicit burn instructions)
             burn_details = self._check_burn_event(tx)
             if burn_details:
@@ -42,14 +48,11 @@ class TransactionParser:
             logger.error(f"Error classifying event: {e}")
             return "unknown", {}
 
-    def _check_burn_event(self, tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Check for explicit burn instructions or significant balance reductions."""
+    def _check_burn_event(self, tx: ParsedTransaction) -> Optional[Dict[str, Any]]:
+        """Check for significant reductions of the Bullieve balance."""
         try:
-            if "meta" not in tx or "postTokenBalances" not in tx["meta"] or "preTokenBalances" not in tx["meta"]:
-                return None
-
-            pre_balances = {b["mint"]: float(b["uiTokenAmount"]["uiAmount"] or 0) for b in tx["meta"]["preTokenBalances"]}
-            post_balances = {b["mint"]: float(b["uiTokenAmount"]["uiAmount"] or 0) for b in tx["meta"]["postTokenBalances"]}
+            pre_balances = _mint_balances(tx.pre_token_balances)
+            post_balances = _mint_balances(tx.post_token_balances)
 
             # Check for Bullieve token burn (significant reduction)
             if self.bullieve_mint in pre_balances and self.bullieve_mint in post_balances:
@@ -61,56 +64,75 @@ class TransactionParser:
                 if burned_amount > 0.001:  # Minimum threshold
                     return {
                         "amount": str(burned_amount),
+                        "amount_base": -_base_change(tx, self.bullieve_mint),
                         "mint": self.bullieve_mint,
                         "type": "burn"
                     }
 
-            # Check for explicit burn instructions in transaction
-            if "transaction" in tx and "message" in tx["transaction"]:
-                message = tx["transaction"]["message"]
-                if "instructions" in message:
-                    for instruction in message["instructions"]:
-                        if "programId" in instruction and instruction["programId"] == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                            # This is a token program instruction, could be a burn
-                            # We'll rely on balance changes for now as they're more reliable
-                            pass
-
             return None
         except Exception as e:
             logger.error(f"Error checking burn event: {e}")
             return None
 
-    def _check_transfers(self, tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Check for various types of transfers."""
+    def classify_mint_burn(self, tx: ParsedTransaction) -> Optional[Dict[str, Any]]:
+        """Detect a true burn of the Bullieve mint by any holder.
+
+        Transfers net to zero across the mint's token accounts, so a net
+        decrease means supply was burned. A transfer into the incinerator
+        counts as a burn too even though the supply does not change.
+        """
         try:
-            if "meta" not in tx or "postTokenBalances" not in tx["meta"] or "preTokenBalances" not in tx["meta"]:
+            if tx.err is not None:
                 return None
+            net = 0
+            incinerated = 0
+            burner, largest_outflow = None, 0
+            for (owner, mint), delta in tx.token_deltas.items():
+                if mint != self.bullieve_mint:
+                    continue
+                net += delta
+                if owner == self.incinerator and delta > 0:
+                    incinerated += delta
+                if delta < largest_outflow:
+                    burner, largest_outflow = owner, delta
+            if net < 0:
+                amount_base, method = -net, "burn"
+            elif incinerated > 0:
+                amount_base, method = incinerated, "incinerator"
+            else:
+                return None
+            decimals = tx.decimals_for(self.bullieve_mint)
+            return {
+                "type": "burn",
+                "mint": self.bullieve_mint,
+                "amount": str(Decimal(amount_base) / (Decimal(10) ** decimals)),
+                "amount_base": amount_base,
+                "burner": burner or tx.signer,
+                "method": method,
+            }
+        except Exception as e:
+            logger.error(f"Error classifying mint burn: {e}")
+            return None
 
-            pre_balances = {}
-            post_balances = {}
-
-            # Build pre-balances map
-            for balance in tx["meta"]["preTokenBalances"]:
-                if "mint" in balance and "uiTokenAmount" in balance:
-                    mint = balance["mint"]
-                    amount = float(balance["uiTokenAmount"]["uiAmount"] or 0)
-                    pre_balances[mint] = amount
+    def _check_transfers(self, tx: ParsedTransaction) -> Optional[Dict[str, Any]]:
+        """Check for various types of transfers."""
+        try:
+            if not tx.pre_token_balances and not tx.post_token_balances:
+                return None
 
-            # Build post-balances map
-            for balance in tx["meta"]["postTokenBalances"]:
-                if "mint" in balance and "uiTokenAmount" in balance:
-                    mint = balance["mint"]
-                    amount = float(balance["uiTokenAmount"]["uiAmount"] or 0)
-                    post_balances[mint] = amount
+            pre_balances = _mint_balances(tx.pre_token_balances)
+            post_balances = _mint_balances(tx.post_token_balances)
 
             # Check for fee income to primary wallet
             primary_fee = self._check_primary_wallet_fee(pre_balances, post_balances)
             if primary_fee:
+                primary_fee["amount_base"] = _received_base(tx, self.primary_wallet, primary_fee["mint"])
                 return primary_fee
 
             # Check for transfer to secondary wallet
             secondary_transfer = self._check_secondary_wallet_transfer(pre_balances, post_balances)
             if secondary_transfer:
+                secondary_transfer["amount_base"] = _received_base(tx, self.secondary_wallet, secondary_transfer["mint"])
                 return secondary_transfer
 
             return None
@@ -163,3 +185,29 @@ class TransactionParser:
             return None
 
 
+def _mint_balances(balances: Iterable[TokenBalance]) -> Dict[str, float]:
+    """Map mint -> ui amount; later entries for the same mint win."""
+    return {b.mint: b.ui_amount for b in balances}
+
+
+def _base_change(tx: ParsedTransaction, mint: str) -> int:
+    """Integer counterpart of the ``_mint_balances`` change for ``mint``."""
+    pre = {b.mint: b.amount for b in tx.pre_token_balances}
+    post = {b.mint: b.amount for b in tx.post_token_balances}
+    return post.get(mint, 0) - pre.get(mint, 0)
+
+
+def _received_base(tx: ParsedTransaction, wallet: str, mint: str) -> int:
+    """Base units of ``mint`` that ``wallet`` received, from the exact per-owner deltas."""
+    received = tx.token_deltas.get((wallet, mint), 0)
+    return received if received > 0 else _base_change(tx, mint)
+
+
+def classify_batch(parser: TransactionParser, txs: List[ParsedTransaction]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Classify several transactions in one call (one round-trip when offloaded)."""
+    return [parser.classify_event(tx) for tx in txs]
+
+
+def classify_mint_burns(parser: TransactionParser, txs: List[ParsedTransaction]) -> List[Optional[Dict[str, Any]]]:
+    """``classify_mint_burn`` over a batch (one round-trip when offloaded)."""
+    return [parser.classify_mint_burn(tx) for tx in txs]
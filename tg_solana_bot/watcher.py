@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+FileStamp = Tuple[int, int, int]
+
+
+def file_stamp(path: str) -> Optional[FileStamp]:
+    """Identity of a file version: (inode, mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class FileWatcher:
+    """Calls ``callback`` whenever a file is created, replaced or modified.
+
+    Polls ``os.stat`` (one syscall per interval), which also catches the
+    atomic rename-over used by editors and ``fly sftp``, where inotify
+    watches on the old inode would go stale.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        callback: Callable[[], Union[None, Awaitable[None]]],
+        interval_seconds: float = 2.0,
+    ):
+        self.path = path
+        self.callback = callback
+        self.interval_seconds = interval_seconds
+        self._stamp = file_stamp(path)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.check()
+
+    async def check(self) -> bool:
+        stamp = file_stamp(self.path)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        logger.info(f"[watch] {self.path} changed")
+        try:
+            result = self.callback()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as exc:
+            logger.error(f"[watch] reload of {self.path} failed: {exc}")
+        return True